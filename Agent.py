@@ -1,5 +1,7 @@
 import numpy as np
 
+from EventLog import EventKind
+
 
 class Agent:
 
@@ -11,10 +13,24 @@ class Agent:
         self.radius = radius
 
         self.spawn_time = spawn_time
+
+        # Stałe ID (nadaje Environment) i bieżący indeks w env.agents
+        self.id = None
+        self.index = None
         self.active = (self.spawn_time <= 0.0)
 
         self.is_waiting = False
         self.wait_timer = 0.0
+        # Planista zdarzeń (EventScheduler) – jeśli ustawiony, koniec czekania
+        # jest zdarzeniem zamiast odliczania wait_timer w każdym kroku
+        self.scheduler = None
+        self._wait_event = None
+        # Dziennik zdarzeń (EventLog) – None = bez logowania
+        self.event_log = None
+        # Zaparkowany: czeka na zdarzenie planisty, Simulation go nie aktualizuje
+        self.parked = False
+        # Poziom szczegółowości (LOD): True = pełny SFM, False = ruch kinematyczny (samotny agent)
+        self.lod_full = True
         self.finished_path = False 
         self.exited = False     
         if path is not None:
@@ -57,15 +73,49 @@ class Agent:
             current_node = self.path[self.path_index]
             wait_time = current_node.get('wait', 0.0)
 
+            if self.event_log is not None:
+                if 'poi' in current_node:
+                    self.event_log.emit(EventKind.WAYPOINT, self, poi=current_node['poi'])
+                if wait_time > 0:
+                    self.event_log.emit(EventKind.DWELL_START, self, poi=current_node.get('poi', -1))
+
             if wait_time > 0:
                 # Rozpoczynamy czekanie
                 self.is_waiting = True
                 self.wait_timer = wait_time
+                if self.scheduler is not None:
+                    self.scheduler.cancel(self._wait_event)
+                    self._wait_event = self.scheduler.schedule_in(wait_time, self._end_wait)
                 # NIE zwiększamy path_index, zrobimy to jak czas minie
             else:
                 # Brak czekania, idziemy dalej
                 self._next_waypoint()
 
+    def _end_wait(self):
+        """Zdarzenie planisty: minął czas czekania w punkcie ścieżki."""
+        self._wait_event = None
+        if not self.is_waiting:
+            return
+        self.is_waiting = False
+        self.wait_timer = 0.0
+        self._log_dwell_end()
+        self._next_waypoint()
+
+    def _log_dwell_end(self):
+        if self.event_log is not None:
+            node = self.path[self.path_index] if self.path is not None and self.path_index < len(self.path) else {}
+            self.event_log.emit(EventKind.DWELL_END, self, poi=node.get('poi', -1))
+
+    def park(self, dt, damping=0.8):
+        """
+        Zatrzymuje czekającego agenta od razu: dokłada całe wygaszanie prędkości
+        z update() (v *= damping co krok) jako jedno przesunięcie
+        sum(damping^n) * v * dt = damping / (1 - damping) * v * dt.
+        """
+        self.position += self.velocity * (dt * damping / (1.0 - damping))
+        self.velocity = np.zeros(2)
+        self.parked = True
+
     def _next_waypoint(self):
         """Przełącza na kolejny punkt ścieżki"""
         self.path_index += 1
@@ -76,6 +126,45 @@ class Agent:
             self.finished_path = True
             self.goal = None
 
+    def move_kinematic(self, dt, push=None, speed=None, tau=None):
+        """
+        Ruch kinematyczny wzdłuż ścieżki (bez sił SFM):
+        agent idzie prosto do bieżącego celu z prędkością desired_speed
+        i nie przestrzeliwuje punktu.
+        push: opcjonalna korekta (np. siła od ścian) dodawana do prędkości jako push * dt.
+        speed, tau: inna prędkość docelowa i dochodzenie do niej wykładniczo
+                    ze stałą czasową tau (zamiast natychmiastowej zmiany prędkości).
+        """
+        if not self.active:
+            return
+
+        # Czekanie obsługujemy tak samo jak w zwykłym update
+        if self.is_waiting or self.goal is None:
+            self.update(np.zeros(2), dt)
+            return
+
+        if speed is None:
+            speed = self.desired_speed
+
+        dir_vec = self.goal - self.position
+        dist = np.linalg.norm(dir_vec)
+        if dist > 1e-6:
+            step = min(speed * dt, dist)
+            target = dir_vec / dist * (step / dt)
+        else:
+            target = np.zeros(2)
+
+        if tau:
+            self.velocity = target + (self.velocity - target) * np.exp(-dt / tau)
+        else:
+            self.velocity = target
+
+        if push is not None:
+            self.velocity = self.velocity + push * dt
+
+        self.position += self.velocity * dt
+        self.advance_path()
+
     def update(self, force, dt):
         """Update agent’s velocity and position under given force and timestep."""
         if not self.active:
@@ -83,14 +172,18 @@ class Agent:
 
         # LOGIKA CZEKANIA 
         if self.is_waiting:
-            self.wait_timer -= dt
-
             # Wygaszamy prędkość (tarcie), żeby agent stanął w miejscu
             self.velocity *= 0.8
             self.position += self.velocity * dt
 
+            # Z planistą koniec czekania przychodzi jako zdarzenie (_end_wait)
+            if self.scheduler is not None:
+                return
+
+            self.wait_timer -= dt
             if self.wait_timer <= 0:
                 self.is_waiting = False
+                self._log_dwell_end()
                 self._next_waypoint()  # Czas minął, idziemy dalej
 
             return  # Nie aplikujemy sił SFM podczas czekania
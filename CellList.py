@@ -0,0 +1,126 @@
+import numpy as np
+
+
+# Przesunięcia komórek sąsiednich (pełny stencil 3x3)
+NEIGHBOR_OFFSETS = [(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)]
+
+# Połowa stencila: każda para sąsiednich komórek odwiedzana tylko raz
+HALF_OFFSETS = [(0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+
+class CellList:
+    """
+    Siatka komórek (cell list) do szukania sąsiadów w promieniu <= cell_size.
+
+    Agenci są sortowani po kluczu komórki (wiersz * ncols + kolumna), więc
+    sąsiedzi z jednej komórki leżą w ciągłym fragmencie tablicy, a zapytanie
+    dla wielu punktów naraz to kilka searchsorted zamiast pętli po parach.
+    Budowa O(N log N), zapytanie O(liczba kandydatów).
+    """
+
+    def __init__(self, positions, cell_size, mask=None):
+        self.positions = np.asarray(positions, dtype=float)
+        self.cell_size = float(cell_size)
+
+        if mask is None:
+            self.indices = np.arange(len(self.positions))
+        else:
+            self.indices = np.flatnonzero(mask)
+
+        pts = self.positions[self.indices]
+        if len(pts):
+            self.origin = pts.min(axis=0)
+            cells = self._cells(pts)
+            self.ncols = int(cells[:, 0].max()) + 1
+            self.nrows = int(cells[:, 1].max()) + 1
+        else:
+            self.origin = np.zeros(2)
+            cells = np.zeros((0, 2), dtype=np.int64)
+            self.ncols = 1
+            self.nrows = 1
+
+        keys = cells[:, 1] * self.ncols + cells[:, 0]
+        order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[order]
+        self._sorted_idx = self.indices[order]
+
+    def _cells(self, pts):
+        return np.floor((pts - self.origin) / self.cell_size).astype(np.int64)
+
+    def rows_of(self, idx):
+        """Numer wiersza komórki dla agentów o indeksach idx (do podziału na pasy)."""
+        return self._cells(self.positions[idx])[:, 1]
+
+    def candidate_pairs(self, query_idx):
+        """
+        Pary kandydatów (i, j) dla i z query_idx i j z sąsiednich komórek (i != j).
+        Wymaga jeszcze filtrowania po odległości (patrz pairs_within).
+        """
+        i, j = self._stencil_pairs(query_idx, NEIGHBOR_OFFSETS)
+        keep = i != j
+        return i[keep], j[keep]
+
+    def unique_pairs_within(self, radius):
+        """
+        Każda nieuporządkowana para agentów z siatki w odległości < radius dokładnie raz
+        (połowa stencila + i < j w tej samej komórce). Zwraca (i, j, d_vec, dist), d = pos[i] - pos[j].
+        """
+        i, j = self._stencil_pairs(self.indices, HALF_OFFSETS, unique=True)
+        d_vec = self.positions[i] - self.positions[j]
+        dist = np.hypot(d_vec[:, 0], d_vec[:, 1])
+        keep = dist < radius
+        return i[keep], j[keep], d_vec[keep], dist[keep]
+
+    def _stencil_pairs(self, query_idx, stencil, unique=False):
+        """
+        Wszystkie pary (i, j): i z query_idx, j z komórek przesuniętych o stencil (razem z i == j).
+        unique=True: w tej samej komórce tylko i < j.
+        """
+        query_idx = np.asarray(query_idx, dtype=np.int64)
+        if len(query_idx) == 0 or len(self._sorted_idx) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+
+        cells = self._cells(self.positions[query_idx])
+        out_i = []
+        out_j = []
+
+        for dx, dy in stencil:
+            cx = cells[:, 0] + dx
+            cy = cells[:, 1] + dy
+            valid = (cx >= 0) & (cx < self.ncols) & (cy >= 0) & (cy < self.nrows)
+            keys = cy * self.ncols + cx
+
+            start = np.searchsorted(self._sorted_keys, keys, side="left")
+            end = np.searchsorted(self._sorted_keys, keys, side="right")
+            counts = np.where(valid, end - start, 0)
+            total = int(counts.sum())
+            if total == 0:
+                continue
+
+            # Rozwinięcie zakresów [start, end) bez pętli w Pythonie
+            offsets = np.repeat(start - (np.cumsum(counts) - counts), counts)
+            i = np.repeat(query_idx, counts)
+            j = self._sorted_idx[np.arange(total) + offsets]
+            if unique and dx == 0 and dy == 0:
+                keep = i < j
+                i, j = i[keep], j[keep]
+            out_i.append(i)
+            out_j.append(j)
+
+        if not out_i:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+
+        return np.concatenate(out_i), np.concatenate(out_j)
+
+    def pairs_within(self, query_idx, radius):
+        """
+        Pary (i, j) w odległości < radius wraz z wektorami d = pos[i] - pos[j] i odległościami.
+        radius nie może być większy niż cell_size.
+        """
+        i, j = self.candidate_pairs(query_idx)
+        d_vec = self.positions[i] - self.positions[j]
+        dist = np.hypot(d_vec[:, 0], d_vec[:, 1])
+        keep = dist < radius
+        return i[keep], j[keep], d_vec[keep], dist[keep]
@@ -0,0 +1,235 @@
+import csv
+import heapq
+import math
+import random
+
+import numpy as np
+
+from EventLog import EventKind
+from QueueManager import QueueManager
+
+
+# Rozkłady czasu obsługi przy kasie
+
+def make_service_sampler(checkout_conf):
+    """
+    Zwraca funkcję losującą czas obsługi (sekundy) wg konfiguracji "checkout":
+    - "uniform":     random.uniform(*service_range)  (jak w QueueManager, 6-10 s)
+    - "exponential": rozkład wykładniczy o średniej service_mean (M/M/c)
+    - "empirical":   losowanie z próbek service_samples lub z pliku service_trace_csv
+    """
+    kind = checkout_conf.get("service", "uniform")
+
+    if kind == "uniform":
+        lo, hi = checkout_conf.get("service_range", (6.0, 10.0))
+        return lambda: random.uniform(lo, hi)
+
+    if kind == "exponential":
+        mean = float(checkout_conf.get("service_mean", 8.0))
+        return lambda: random.expovariate(1.0 / mean)
+
+    if kind == "empirical":
+        samples = list(checkout_conf.get("service_samples", []))
+        trace_path = checkout_conf.get("service_trace_csv")
+        if trace_path:
+            samples.extend(load_service_trace(trace_path, checkout_conf.get("service_trace_col", "service_time")))
+        if not samples:
+            raise ValueError("checkout.service='empirical' wymaga service_samples lub service_trace_csv")
+        return lambda: random.choice(samples)
+
+    raise ValueError(f"Nieznany rozkład czasu obsługi: {kind}")
+
+
+def load_service_trace(path, column="service_time"):
+    """Wczytuje zmierzone czasy obsługi (sekundy) z kolumny pliku CSV."""
+    samples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            v = row.get(column)
+            if v not in (None, ""):
+                samples.append(float(v))
+    return samples
+
+
+# Czysty model zdarzeniowy (bez fizyki) – do szybkiego przeglądu scenariuszy
+
+def simulate_checkout(arrivals, n_cashiers, sample_service, walk_time=0.0):
+    """
+    Symulacja zdarzeniowa wspólnej kolejki FIFO do n_cashiers kas.
+
+    arrivals: rosnące czasy dojścia klientów do strefy kas (np. z AnalyticCheckout.arrival_log)
+    walk_time: czas przejścia z kolejki do kasy (kasa jest w tym czasie zarezerwowana)
+
+    Zwraca słownik ze statystykami: served, throughput_per_min, mean_wait,
+    p90_wait, mean_system_time, max_queue, utilization.
+    """
+    arrivals = sorted(float(t) for t in arrivals)
+    if not arrivals or n_cashiers <= 0:
+        return {
+            "served": 0, "throughput_per_min": 0.0, "mean_wait": 0.0, "p90_wait": 0.0,
+            "mean_system_time": 0.0, "max_queue": len(arrivals), "utilization": 0.0,
+        }
+
+    free_at = [0.0] * n_cashiers  # kopiec: kiedy kasa się zwalnia
+    heapq.heapify(free_at)
+
+    waits = []
+    system_times = []
+    busy = 0.0
+    start_times = []
+    last_end = 0.0
+
+    for t in arrivals:
+        free = heapq.heappop(free_at)
+        start = max(t, free)
+        occupied = walk_time + sample_service()
+        end = start + occupied
+        heapq.heappush(free_at, end)
+
+        waits.append(start - t)
+        system_times.append(end - t)
+        start_times.append(start)
+        busy += occupied
+        last_end = max(last_end, end)
+
+    # Maksymalna kolejka: ilu klientów czekało jednocześnie (przybyli, a nie zaczęli obsługi)
+    events = [(t, 1) for t, s in zip(arrivals, start_times) if s > t]
+    events += [(s, -1) for t, s in zip(arrivals, start_times) if s > t]
+    events.sort()
+    q = 0
+    max_queue = 0
+    for _, d in events:
+        q += d
+        max_queue = max(max_queue, q)
+
+    span = max(last_end - arrivals[0], 1e-9)
+    waits_np = np.asarray(waits)
+    return {
+        "served": len(arrivals),
+        "throughput_per_min": len(arrivals) / span * 60.0,
+        "mean_wait": float(waits_np.mean()),
+        "p90_wait": float(np.percentile(waits_np, 90)),
+        "mean_system_time": float(np.mean(system_times)),
+        "max_queue": int(max_queue),
+        "utilization": busy / (span * n_cashiers),
+    }
+
+
+def erlang_c(arrival_rate, service_rate, n_cashiers):
+    """
+    Wzór Erlanga C dla M/M/c.
+    Zwraca (prawdopodobieństwo czekania, średni czas w kolejce Wq).
+    Dla ruchu >= pojemności zwraca (1.0, inf).
+    """
+    c = int(n_cashiers)
+    a = arrival_rate / service_rate  # natężenie ruchu (erlangi)
+    rho = a / c if c > 0 else float("inf")
+    if c <= 0 or rho >= 1.0:
+        return 1.0, float("inf")
+
+    s = sum(a ** k / math.factorial(k) for k in range(c))
+    top = a ** c / math.factorial(c) / (1.0 - rho)
+    p_wait = top / (s + top)
+    wq = p_wait / (c * service_rate - arrival_rate)
+    return p_wait, wq
+
+
+class AnalyticCheckout(QueueManager):
+    """
+    Hybrydowy model kas: fizyka (SFM) działa tylko dla klientów na sali,
+    a kolejka i obsługa przy kasach są symulowane zdarzeniowo.
+
+    - klient, który skończył zakupy, jest "zaparkowany" w kolejce (slot) albo przy kasie,
+      nie liczy się dla niego sił i nie odpycha innych (Simulation pomija self.held),
+    - zakończenia obsługi są zdarzeniami w planiście (env.scheduler),
+    - po obsłudze klient wraca do fizyki i idzie do wyjścia jak w QueueManager.
+
+    Interfejs (cashiers, queue, agent_phase) jest taki sam jak w QueueManager,
+    więc statystyki i wizualizacja działają bez zmian.
+    """
+
+    def __init__(self, env, config):
+        super().__init__(env, config)
+
+        checkout_conf = config.get("checkout", {})
+        self.sample_service = make_service_sampler(checkout_conf)
+        # kasa jest zajęta także w czasie dojścia z kolejki (jak rezerwacja w pełnym modelu)
+        self.include_walk = bool(checkout_conf.get("include_walk", True))
+
+        # czasy dojścia do strefy kas (wejście do modelu) – do simulate_checkout
+        self.arrival_log = []
+
+    def update(self, dt):
+        # 1) klienci, którzy skończyli zakupy, wchodzą do modelu kas
+        for agent in self.env.agents:
+            if not agent.active or getattr(agent, "exited", False):
+                continue
+            if self.agent_phase.get(agent, "shopping") == "shopping" and getattr(agent, "finished_path", False):
+                self._arrive(agent)
+
+        # 2) zakończenia obsługi przychodzą jako zdarzenia planisty (_finish_service)
+
+        # 3) agenci idący do wyjścia (fizyka jak w QueueManager)
+        for agent, phase in list(self.agent_phase.items()):
+            if phase == "to_exit" and getattr(agent, "finished_path", False) and not getattr(agent, "exited", False):
+                self._on_reached_destination(agent, phase)
+
+        # 4) wolne kasy pobierają klientów z kolejki
+        for idx in range(len(self.cashiers)):
+            if self._is_cashier_available(idx) and self.queue:
+                self._start_service(self.queue.pop(0), idx)
+                self._park_queue()
+
+    def _arrive(self, agent):
+        self.arrival_log.append(self.scheduler.now)
+        self.held.add(agent)
+        agent.is_waiting = True
+        agent.wait_timer = float("inf")
+        agent.velocity *= 0.0
+
+        available = [i for i in range(len(self.cashiers)) if self._is_cashier_available(i)]
+        if available and not self.queue:
+            nearest = min(
+                available,
+                key=lambda i: np.linalg.norm(self.cashiers[i]["service_point"] - agent.position),
+            )
+            self._start_service(agent, nearest)
+        else:
+            self.queue.append(agent)
+            self._park_queue()
+
+    def _start_service(self, agent, cashier_idx):
+        cashier = self.cashiers[cashier_idx]
+        service_point = cashier["service_point"]
+
+        occupied = self.sample_service()
+        if self.include_walk:
+            occupied += float(np.linalg.norm(service_point - agent.position)) / max(agent.desired_speed, 1e-6)
+
+        cashier["agent"] = agent
+        agent.position = np.array(service_point, dtype=np.float32)
+        agent.service_time = occupied
+        self._set_phase(agent, "to_cashier", cashier=cashier_idx)
+        if self.event_log is not None:
+            self.event_log.emit(EventKind.SERVICE_START, agent, cashier=cashier_idx)
+
+        self.scheduler.schedule_in(occupied, self._finish_service, cashier_idx)
+
+    def _finish_service(self, cashier_idx):
+        cashier = self.cashiers[cashier_idx]
+        agent = cashier["agent"]
+        cashier["agent"] = None
+        if agent is None:
+            return
+        if self.event_log is not None:
+            self.event_log.emit(EventKind.SERVICE_END, agent, cashier=cashier_idx)
+
+        self.held.discard(agent)
+        self._start_exit_for(agent)
+
+    def _park_queue(self):
+        """Ustawia zaparkowanych klientów na slotach kolejki wg kolejności."""
+        for idx, agent in enumerate(self.queue):
+            slot_index = min(idx, len(self.queue_slots) - 1)
+            agent.position = np.array(self.queue_slots[slot_index], dtype=np.float32)
+            self._set_phase(agent, "in_queue", slot=slot_index)
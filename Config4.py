@@ -389,10 +389,58 @@ CONFIG = {
         "B_w": 0.08,
         "desired_speed": 1.2,
         "tau": 0.6,
+        # backend: "native" (SocialForceModel) or "pysocialforce" (adapter, see ForceBackends.py;
+        #          compare both with bench_backends.py).
+        # Force kernel: "agent" (per-agent loop), "scalar" (same loop on plain floats, fastest
+        # for small crowds), "batched" (NumPy, all agents at once)
+        # or "numba" (JIT pair/wall loops + integration; "batched" if numba is missing).
+        # cutoff: agent-agent interaction radius for the cell list (None = all pairs).
+        # symmetric_pairs: batched kernel computes each pair once and applies +f/-f.
+        # threads: >1 computes spatial chunks of agents on a thread pool (implies "batched").
+        # integrator: "euler" (semi-implicit, default) or "verlet" (velocity Verlet, kick-drift-kick;
+        #             the closing half kick is merged into the next step, one force pass per substep).
+        # max_substeps: >1 splits dt adaptively so that |F| * dt_sub <= substep_dv
+        #               (only steps with strong contacts are subdivided; not used by workers).
+        # park_waiting: agents waiting for a scheduler event (shelf dwell, service) stop at once
+        #               and are skipped until the event fires (still repel others).
+        # isolation_check_every: >1 re-checks neighbours of the per-agent kernels every N steps;
+        #               agents with nobody within isolation_radius (default: cutoff or 2.5 m)
+        #               plus a motion margin skip the people loop meanwhile.
+        # lod: isolated agents follow their path kinematically (desired_speed + wall correction);
+        #      full SFM when someone is closer than lod_enter_radius, back to kinematic only
+        #      when nobody is within lod_exit_radius (hysteresis). Check with validate_lod.py.
+        # fast_forward: when nobody can interact (empty store, agents further apart than
+        #      fast_forward_radius, default cutoff or 2.5 m) time jumps by whole dt steps to the
+        #      next scheduler event / waypoint ETA (at most fast_forward_max seconds per jump).
+        # workers: >1 splits the store into x-strips integrated by worker processes
+        #          (shared-memory state, halo of width cutoff; requires cutoff, raises without it).
+        # seed: random seed of the worker processes (same seed + workers = same run).
+        "backend": "native",
+        "kernel": "agent",
+        "cutoff": None,
+        "symmetric_pairs": True,
+        "threads": 1,
+        "integrator": "euler",
+        "max_substeps": 1,
+        "substep_dv": 0.5,
+        "park_waiting": False,
+        "isolation_check_every": 1,
+        "isolation_radius": None,
+        "lod": False,
+        "lod_enter_radius": 1.5,
+        "lod_exit_radius": 2.5,
+        "fast_forward": False,
+        "fast_forward_max": 60.0,
+        "fast_forward_radius": None,
+        "workers": 1,
+        "seed": 0,
     },
 
     "agent_generation": {
         "spawn_rate": 0.6,
+        # Optional: pre-generate the whole arrival schedule for this many seconds
+        # (dormant agents are activated from a heap when their spawn_time comes).
+        # "pregenerate_seconds": 3600.0,
         # "n_agents": 20,
         # "max_spawn_time": 30.0,
 
@@ -485,6 +533,64 @@ CONFIG = {
     }
 ,
 
+    # Optional: checkout/queue options.
+    # kinematic_queue: agents in the cashier queue move slot-to-slot without SFM forces
+    # (cheaper in queue-heavy scenarios; they still repel passers-by).
+    # model: "physical" (full SFM queue) or "analytic" (discrete-event checkout,
+    # physics only on the sales floor). service: "uniform" | "exponential" | "empirical".
+    "checkout": {
+        "kinematic_queue": False,
+        "model": "physical",
+        "service": "uniform",
+        "service_range": (6.0, 10.0),
+        "service_mean": 8.0,
+        "service_samples": [],
+    },
+
+    # Optional: stats output (StatsWriter).
+    # Rows are written by a background thread and flushed every flush_rows rows
+    # or flush_interval seconds; background=False writes on the simulation thread.
+    # format: "csv" | "npy" (memory-mappable, chunk_rows rows per write) | "parquet" (needs pyarrow).
+    # flush_rows/flush_interval only apply to csv; npy/parquet files are written in whole
+    # chunks of chunk_rows rows plus the remainder on close.
+    # Crowd pressure field rho * Var(v) (stats.pressure): refreshed every pressure_every steps
+    # (0 = off) on a pressure_cell grid (None = heatmap cell) with a Gaussian kernel of pressure_sigma [m].
+    # exposure_radii [m]: time every agent pair spends closer than each radius (stats.exposure);
+    # per-agent totals -> stats_exposure, contact edge list -> stats_contacts. [] = off.
+    "stats": {
+        "flush_rows": 1000,
+        "flush_interval": 2.0,
+        "background": True,
+        "format": "csv",
+        "chunk_rows": 65536,
+        "pressure_every": 1,
+        "pressure_cell": None,
+        "pressure_sigma": 0.7,
+        "exposure_radii": [1.0, 1.5],
+    },
+
+    # Optional: full trajectory recording (stats.trajectory.TrajectoryRecorder) into
+    # <stats dir>/trajectory. encoding: "delta" (quantized to precision [m]) | "float16" | "float32";
+    # compression: "zlib" | "lz4" | None; one keyframed chunk every chunk_steps steps.
+    "trajectory": {
+        "enabled": False,
+        "chunk_steps": 200,
+        "encoding": "delta",
+        "precision": 0.001,
+        "compression": "zlib",
+    },
+
+    # Optional: structured lifecycle event log (EventLog) – spawn, waypoint, dwell start/end,
+    # queue phase changes, service start/end, exit. The last ring_size events stay in memory;
+    # events are appended to a binary file every flush_events events
+    # (path None -> <stats dir>/events.bin). Read back with EventLog.read(path).
+    "event_log": {
+        "enabled": False,
+        "path": None,
+        "ring_size": 4096,
+        "flush_events": 1024,
+    },
+
     # Optional: real-world measurements for live comparison in HUD.
     # Enable and provide a CSV with at least: time_s, entries_per_min, exits_per_min, queue_len
     "real_data": {
@@ -0,0 +1,257 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from CellList import CellList
+from SocialForceModel import SocialForceModel
+
+
+# Kolumny wspólnego bufora stanu (float64): x, y, vx, vy, gx, gy, radius, flags
+_COLS = 8
+_FLAG_ACTIVE = 1     # agent jest źródłem odpychania
+_FLAG_RECEIVER = 2   # agent jest całkowany przez właściciela pasa
+_FLAG_HAS_GOAL = 4
+
+
+class _SharedState:
+    """Dwa bufory w multiprocessing.shared_memory: stan wejściowy i wynik (pos, vel)."""
+
+    def __init__(self, capacity, names=None):
+        self.capacity = int(capacity)
+        in_size = self.capacity * _COLS * 8
+        out_size = self.capacity * 4 * 8
+        if names is None:
+            self.shm_in = shared_memory.SharedMemory(create=True, size=in_size)
+            self.shm_out = shared_memory.SharedMemory(create=True, size=out_size)
+            self.owner = True
+        else:
+            self.shm_in = shared_memory.SharedMemory(name=names[0])
+            self.shm_out = shared_memory.SharedMemory(name=names[1])
+            self.owner = False
+        self.state = np.ndarray((self.capacity, _COLS), dtype=np.float64, buffer=self.shm_in.buf)
+        self.result = np.ndarray((self.capacity, 4), dtype=np.float64, buffer=self.shm_out.buf)
+
+    @property
+    def names(self):
+        return (self.shm_in.name, self.shm_out.name)
+
+    def close(self):
+        self.state = None
+        self.result = None
+        for shm in (self.shm_in, self.shm_out):
+            shm.close()
+            if self.owner:
+                shm.unlink()
+
+
+def _strip_mask(x, strip, n_strips, bounds):
+    """Agenci należący do pasa `strip` (pierwszy/ostatni pas obejmuje też obszar poza sklepem)."""
+    lo = -np.inf if strip == 0 else bounds[strip]
+    hi = np.inf if strip == n_strips - 1 else bounds[strip + 1]
+    return (x >= lo) & (x < hi)
+
+
+def _worker_step(shared, n, dt, step, worker_id, n_workers, bounds, model, walls, seed):
+    """Jeden krok procesu roboczego (widoki na bufory żyją tylko w tej funkcji)."""
+    cutoff = model.cutoff
+    data = shared.state[:n]
+    x = data[:, 0]
+    flags = data[:, 7].astype(np.int64)
+
+    own = _strip_mask(x, worker_id, n_workers, bounds) & ((flags & _FLAG_RECEIVER) != 0)
+    if not np.any(own):
+        return
+
+    # Lokalny zbiór: własni agenci + halo (pas rozszerzony o cutoff)
+    if cutoff is None:
+        local = np.arange(n)
+    else:
+        lo = -np.inf if worker_id == 0 else bounds[worker_id] - cutoff
+        hi = np.inf if worker_id == n_workers - 1 else bounds[worker_id + 1] + cutoff
+        local = np.flatnonzero(own | ((x >= lo) & (x < hi)))
+
+    loc = data[local]
+    loc_flags = flags[local]
+    state = {
+        "pos": loc[:, 0:2].copy(),
+        "vel": loc[:, 2:4].copy(),
+        "goal": loc[:, 4:6].copy(),
+        "radius": loc[:, 6].copy(),
+        "active": (loc_flags & _FLAG_ACTIVE) != 0,
+        "waiting": np.zeros(len(local), dtype=bool),
+        "has_goal": (loc_flags & _FLAG_HAS_GOAL) != 0,
+    }
+    recv_local = np.flatnonzero(own[local])
+
+    cells = CellList(state["pos"], cutoff, mask=state["active"]) if cutoff is not None else None
+    forces = np.zeros((len(local), 2))
+    # Deterministyczne losowanie (rozsuwanie agentów w tym samym punkcie)
+    np.random.seed((seed * 1_000_003 + step * n_workers + worker_id) % (2 ** 32))
+    model._forces_chunk(state, recv_local, model._wall_array(walls), cells, forces)
+
+    # Semi-implicit Euler jak w Agent.update
+    vel = state["vel"][recv_local] + forces[recv_local] * dt
+    pos = state["pos"][recv_local] + vel * dt
+    rows = local[recv_local]
+    shared.result[rows, 0:2] = pos
+    shared.result[rows, 2:4] = vel
+
+
+def _worker_main(conn, worker_id, n_workers, bounds, params, walls, names, capacity, seed):
+    """
+    Pętla procesu roboczego: liczy siły i całkuje agentów ze swojego pasa.
+    Sąsiedzi z pasów obok (halo, w odległości cutoff od granicy) są czytani
+    ze wspólnego bufora wejściowego; wynik trafia do bufora wyjściowego.
+    """
+    model = SocialForceModel(params)
+    model.threads = 1
+    shared = _SharedState(capacity, names)
+
+    while True:
+        msg = conn.recv()
+        kind = msg[0]
+
+        if kind == "stop":
+            shared.close()
+            break
+
+        if kind == "remap":
+            shared.close()
+            _, names, capacity = msg
+            shared = _SharedState(capacity, names)
+            conn.send("ok")
+            continue
+
+        _, n, dt, step = msg
+        _worker_step(shared, n, dt, step, worker_id, n_workers, bounds, model, walls, seed)
+        conn.send("done")
+
+
+class DomainPool:
+    """
+    Dekompozycja przestrzenna: sklep podzielony na pionowe pasy (po x),
+    każdy pas należy do jednego procesu roboczego, który całkuje swoich agentów.
+
+    - stan wszystkich agentów jest co krok zapisywany do shared_memory całymi kolumnami
+      (bez pętli wiersz po wierszu), więc halo (agenci z sąsiednich pasów w zasięgu cutoff)
+      czyta się bez kopiowania przez pipe,
+    - wyniki idą do osobnego bufora (brak wyścigów odczyt/zapis),
+    - przynależność do pasa liczona co krok z pozycji: agent przekraczający granicę
+      migruje do sąsiedniej domeny automatycznie (licznik self.migrations),
+    - wymaga cutoff: bez niego halo obejmowałoby cały sklep i każdy proces liczyłby wszystkich,
+    - przy stałym seed i liczbie procesów wynik jest bit w bit powtarzalny.
+    """
+
+    def __init__(self, params, walls, n_workers, x_min, x_max, capacity=1024, seed=0):
+        if int(n_workers) > 1 and params.get("cutoff") is None:
+            raise ValueError("sfm.workers > 1 wymaga sfm.cutoff (szerokość halo między pasami)")
+        self.n_workers = int(n_workers)
+        self.bounds = np.linspace(float(x_min), float(x_max), self.n_workers + 1)
+        self.params = dict(params)
+        self.seed = int(seed)
+        self.step_count = 0
+        self.migrations = 0
+        # pas każdego agenta po poprzednim kroku (posortowane id -> pas), do liczenia migracji
+        self._owner_ids = np.zeros(0, dtype=np.int64)
+        self._owner_strip = np.zeros(0, dtype=np.int64)
+
+        walls_arr = np.array([(p1[0], p1[1], p2[0], p2[1]) for (p1, p2) in walls], dtype=float).reshape(-1, 4)
+        self._walls = [((w[0], w[1]), (w[2], w[3])) for w in walls_arr]
+        self.shared = _SharedState(capacity)
+
+        methods = mp.get_all_start_methods()
+        ctx = mp.get_context("fork" if "fork" in methods else "spawn")
+        self._conns = []
+        self._procs = []
+        for wid in range(self.n_workers):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(
+                target=_worker_main,
+                args=(child, wid, self.n_workers, self.bounds, self.params, self._walls,
+                      self.shared.names, self.shared.capacity, self.seed),
+                daemon=True,
+            )
+            proc.start()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+    def _ensure_capacity(self, n):
+        if n <= self.shared.capacity:
+            return
+        capacity = self.shared.capacity
+        while capacity < n:
+            capacity *= 2
+        new_shared = _SharedState(capacity)
+        for conn in self._conns:
+            conn.send(("remap", new_shared.names, capacity))
+        for conn in self._conns:
+            conn.recv()
+        self.shared.close()
+        self.shared = new_shared
+
+    def step(self, agents, receivers, dt):
+        """
+        Jeden krok fizyki dla agentów z maską receivers (całkowanie w procesach).
+        Zapisuje nowe position/velocity do obiektów Agent.
+        """
+        n = len(agents)
+        if n == 0:
+            return
+        self._ensure_capacity(n)
+
+        # Stan kolumnami: jedna lista na kolumnę i jedno kopiowanie do bufora wspólnego
+        receivers = np.asarray(receivers, dtype=bool)
+        data = self.shared.state[:n]
+        goals = [a.goal for a in agents]
+        has_goal = np.fromiter((g is not None for g in goals), dtype=bool, count=n)
+        active = np.fromiter((bool(a.active) for a in agents), dtype=bool, count=n)
+        data[:, 0:2] = [a.position for a in agents]
+        data[:, 2:4] = [a.velocity for a in agents]
+        data[:, 4:6] = [g if g is not None else a.position for g, a in zip(goals, agents)]
+        data[:, 6] = [a.radius for a in agents]
+        data[:, 7] = active * _FLAG_ACTIVE + receivers * _FLAG_RECEIVER + has_goal * _FLAG_HAS_GOAL
+
+        for conn in self._conns:
+            conn.send(("step", n, dt, self.step_count))
+        for conn in self._conns:
+            conn.recv()
+        self.step_count += 1
+
+        # Wynik też hurtem: każdy agent dostaje własny wiersz z tablic pos/vel tego kroku
+        rows = np.flatnonzero(receivers)
+        result = self.shared.result[rows]
+        vel = result[:, 2:4].copy()
+        pos = result[:, 0:2].astype(np.float32)
+        for k, row in enumerate(rows.tolist()):
+            a = agents[row]
+            a.velocity = vel[k]
+            a.position = pos[k]
+
+        # Migracje między pasami (porównanie z poprzednim krokiem po id agenta)
+        ids = np.fromiter((a.id if a.id is not None else id(a) for a in (agents[r] for r in rows.tolist())),
+                          dtype=np.int64, count=len(rows))
+        strip = np.searchsorted(self.bounds[1:-1], pos[:, 0], side="right")
+        at = np.searchsorted(self._owner_ids, ids)
+        seen = at < len(self._owner_ids)
+        seen[seen] = self._owner_ids[at[seen]] == ids[seen]
+        self.migrations += int(np.count_nonzero(self._owner_strip[at[seen]] != strip[seen]))
+        order = np.argsort(ids)
+        self._owner_ids = ids[order]
+        self._owner_strip = strip[order]
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=2.0)
+            if proc.is_alive():
+                proc.terminate()
+        self._conns = []
+        self._procs = []
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
@@ -1,9 +1,15 @@
+import heapq
+import itertools
+
 import numpy as np
 from Agent import Agent
-from SocialForceModel import SocialForceModel
+from ForceBackends import make_force_model
 from path_generation import generate_shopping_path
 from PathFinding import GridMap, a_star_search
 from QueueManager import QueueManager
+from CheckoutModel import AnalyticCheckout
+from Scheduler import EventScheduler
+from EventLog import EventKind, EventLog
 
 
 class Environment:
@@ -39,8 +45,8 @@ class Environment:
             obstacle_buffer=0.2
         )
 
-        # Model sił społecznych
-        self.model = SocialForceModel(sfm_conf)
+        # Model sił społecznych (sfm.backend: "native" albo "pysocialforce")
+        self.model = make_force_model(sfm_conf, config["dt"])
 
         # KONFIGURACJA GENEROWANIA AGENTÓW (jak w master)
         self.gen_conf = config["agent_generation"]
@@ -49,15 +55,47 @@ class Environment:
         # Na starcie brak agentów – będą się respić w trakcie
         self.agents = []
 
+        # Uśpieni agenci (spawn_time w przyszłości): kopiec (spawn_time, seq, agent),
+        # aktywacja zdejmuje tylko tych, których czas już nadszedł
+        self.pending_agents = []
+        self._pending_seq = itertools.count()
+
+        # Stałe ID agentów + indeks boczny id -> agent (nie zmienia się przy usuwaniu)
+        self._agent_ids = itertools.count()
+        self.agent_by_id = {}
+
+        # Agenci, którzy wyszli w tym kroku (zgłaszani przez QueueManager)
+        self._exited = []
+
+        # Wspólny planista zdarzeń czasowych (zegar prowadzi Simulation)
+        self.scheduler = EventScheduler()
+
+        # Dziennik zdarzeń cyklu życia agentów (opcjonalny, czas z planisty)
+        log_conf = config.get("event_log", {})
+        if log_conf.get("enabled", False):
+            self.event_log = EventLog(
+                clock=self.scheduler,
+                path=log_conf.get("path"),
+                ring_size=log_conf.get("ring_size", 4096),
+                flush_events=log_conf.get("flush_events", 1024),
+            )
+        else:
+            self.event_log = None
+
         # Menedżer kolejek do kas (z gałęzi „kolejki”)
-        self.queue_manager = QueueManager(self, config)
+        # "analytic" -> hybrydowy model zdarzeniowy kas (fizyka tylko na sali)
+        if config.get("checkout", {}).get("model", "physical") == "analytic":
+            self.queue_manager = AnalyticCheckout(self, config)
+        else:
+            self.queue_manager = QueueManager(self, config)
 
-    def spawn_agent(self):
+    def spawn_agent(self, spawn_time=0.0):
         """
         Tworzy i dodaje jednego nowego agenta:
         - generujemy ścieżkę zakupową (punkty POI),
         - rozwijamy ją do gęstego pathu A* (jak wcześniej w _create_agents),
-        - agent startuje od razu (spawn_time=0, active=True).
+        - agent startuje od razu (spawn_time=0, active=True)
+          albo czeka uśpiony do spawn_time (wstępnie wygenerowany harmonogram).
         """
 
         # 1. Punkty strategiczne (spawn -> wejście -> półki)
@@ -77,15 +115,50 @@ class Environment:
             position=start_pos,
             desired_speed=self.agent_speed,
             path=detailed_path,
-            spawn_time=0.0  # aktywny od razu
+            spawn_time=spawn_time  # 0.0 -> aktywny od razu
         )
-
-        self.agents.append(new_agent)
+        new_agent.scheduler = self.scheduler
+        new_agent.event_log = self.event_log
+
+        self.add_agent(new_agent)
+
+    def add_agent(self, agent):
+        """Dodaje agenta: aktywny trafia do self.agents, uśpiony do kopca pending_agents."""
+        agent.id = next(self._agent_ids)
+        self.agent_by_id[agent.id] = agent
+
+        if agent.active:
+            self._append_agent(agent)
+            if self.event_log is not None:
+                self.event_log.emit(EventKind.SPAWN, agent)
+        else:
+            heapq.heappush(self.pending_agents, (agent.spawn_time, next(self._pending_seq), agent))
+
+    def activate_due(self, now):
+        """Aktywuje uśpionych agentów, których spawn_time <= now (tylko ci są zdejmowani z kopca)."""
+        pending = self.pending_agents
+        while pending and pending[0][0] <= now:
+            _, _, agent = heapq.heappop(pending)
+            agent.active = True
+            self._append_agent(agent)
+            if self.event_log is not None:
+                self.event_log.emit(EventKind.SPAWN, agent, t=now)
+
+    def _append_agent(self, agent):
+        agent.index = len(self.agents)
+        self.agents.append(agent)
+
+    def mark_exited(self, agent):
+        """Zgłoszenie wyjścia agenta – usunięcie nastąpi w remove_exited_agents."""
+        self._exited.append(agent)
+        if self.event_log is not None:
+            self.event_log.emit(EventKind.EXIT, agent)
 
     def _calculate_full_path(self, waypoints):
         """
         Łączy rzadkie punkty (słowniki) gęstą ścieżką A*.
         waypoints: [{'pos': (x,y), 'wait': t}, ...]
+        Ostatni węzeł każdego odcinka dostaje 'poi' = numer punktu strategicznego.
         """
         if not waypoints or len(waypoints) < 2:
             return []
@@ -107,8 +180,10 @@ class Environment:
             for j in range(1, len(segment)):
                 pos = segment[j]
                 is_last_in_segment = (j == len(segment) - 1)
-                w = target_wait if is_last_in_segment else 0.0
-                full_path.append({'pos': pos, 'wait': w})
+                if is_last_in_segment:
+                    full_path.append({'pos': pos, 'wait': target_wait, 'poi': i})
+                else:
+                    full_path.append({'pos': pos, 'wait': 0.0})
 
             current_start_pos = segment[-1]
 
@@ -118,11 +193,29 @@ class Environment:
         return full_path
 
     def remove_exited_agents(self):
-        """Usuwa agentów, którzy opuścili sklep (oznaczonych jako exited=True)."""
-        self.agents = [
-            agent for agent in self.agents
-            if not getattr(agent, "exited", False)
-        ]
+        """
+        Usuwa agentów, którzy opuścili sklep (zgłoszonych przez mark_exited).
+        Usuwanie przez zamianę z ostatnim elementem – koszt O(liczba wyjść),
+        kolejność self.agents nie jest zachowywana (ID w agent_by_id są stałe).
+        """
+        if not self._exited:
+            return
+
+        agents = self.agents
+        for agent in self._exited:
+            i = agent.index
+            if i is None or i >= len(agents) or agents[i] is not agent:
+                i = agents.index(agent)  # agent dodany z pominięciem add_agent
+
+            last = agents.pop()
+            if last is not agent:
+                agents[i] = last
+                last.index = i
+
+            agent.index = None
+            self.agent_by_id.pop(agent.id, None)
+
+        self._exited.clear()
 
     def _cashier_rects_to_lines(self):
         """
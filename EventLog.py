@@ -0,0 +1,144 @@
+import os
+from enum import IntEnum
+
+import numpy as np
+
+
+class EventKind(IntEnum):
+    """Typy zdarzeń cyklu życia agenta."""
+
+    SPAWN = 1          # agent pojawił się w sklepie (aktywacja)
+    WAYPOINT = 2       # dojście do punktu strategicznego ścieżki (poi = nr punktu)
+    DWELL_START = 3    # początek czekania w punkcie (półka, kasa bez planisty)
+    DWELL_END = 4      # koniec czekania
+    PHASE = 5          # zmiana fazy QueueManager (phase, cashier/slot)
+    SERVICE_START = 6  # początek obsługi przy kasie (cashier)
+    SERVICE_END = 7    # koniec obsługi przy kasie (cashier)
+    EXIT = 8           # agent opuścił sklep
+
+
+# Fazy QueueManager.agent_phase -> kod w polu "phase"
+PHASES = ("none", "shopping", "to_queue_slot", "in_queue", "to_cashier", "to_exit", "exited")
+PHASE_CODE = {name: code for code, name in enumerate(PHASES)}
+
+# Rekord zdarzenia (stały rozmiar, -1 = nie dotyczy)
+EVENT_DTYPE = np.dtype([
+    ("t", "<f8"),
+    ("agent_id", "<i4"),
+    ("kind", "u1"),
+    ("phase", "u1"),
+    ("cashier", "<i2"),
+    ("slot", "<i2"),
+    ("poi", "<i4"),
+])
+
+MAGIC = b"CPSEVT01" + b"\0" * 8  # 16 bajtów nagłówka pliku
+
+
+class EventLog:
+    """
+    Strukturalny dziennik zdarzeń cyklu życia agentów.
+
+    - emit() dopisuje zdarzenie (t, agent_id, kind, phase, cashier, slot, poi),
+      czas bierze z zegara (EventScheduler.now), więc komponenty nie muszą go znać,
+    - ostatnie `ring_size` zdarzeń trzyma w buforze kołowym (recent()),
+    - jeśli podano plik, zdarzenia są dopisywane binarnie (append-only) co
+      `flush_events` zdarzeń i przy close(); read() czyta plik jako memmap.
+
+    Wstrzykiwany jako atrybut (env.event_log, agent.event_log, QueueManager.event_log)
+    tak jak planista; None = brak logowania i zero kosztu.
+    """
+
+    def __init__(self, clock=None, path=None, ring_size=4096, flush_events=1024):
+        self.clock = clock
+        self.ring = np.zeros(max(1, int(ring_size)), dtype=EVENT_DTYPE)
+        self.count = 0  # wszystkie zdarzenia od początku
+        self.flush_events = max(1, int(flush_events))
+        self._buf = []
+        self._f = None
+        self.path = None
+        if path is not None:
+            self.open(path)
+
+    def open(self, path):
+        """Zaczyna zapis do pliku (zdarzenia sprzed open() są tylko w buforze kołowym)."""
+        if self._f is not None:
+            self.close()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._f = open(path, "wb")
+        self._f.write(MAGIC)
+
+    def emit(self, kind, agent, phase=None, cashier=-1, slot=-1, poi=-1, t=None):
+        if t is None:
+            t = self.clock.now if self.clock is not None else 0.0
+        aid = getattr(agent, "id", None)
+        rec = (
+            float(t),
+            -1 if aid is None else int(aid),
+            int(kind),
+            PHASE_CODE.get(phase, 0),
+            -1 if cashier is None else int(cashier),
+            -1 if slot is None else int(slot),
+            -1 if poi is None else int(poi),
+        )
+        self.ring[self.count % len(self.ring)] = rec
+        self.count += 1
+        if self._f is not None:
+            self._buf.append(rec)
+            if len(self._buf) >= self.flush_events:
+                self.flush()
+
+    def recent(self, n=None):
+        """Ostatnie n zdarzeń (domyślnie cały bufor) w kolejności czasu."""
+        size = len(self.ring)
+        have = min(self.count, size)
+        n = have if n is None else min(int(n), have)
+        idx = (np.arange(self.count - n, self.count)) % size
+        return self.ring[idx]
+
+    def flush(self):
+        if self._f is None or not self._buf:
+            return
+        np.array(self._buf, dtype=EVENT_DTYPE).tofile(self._f)
+        self._f.flush()
+        self._buf = []
+
+    def close(self):
+        if self._f is None:
+            return
+        self.flush()
+        self._f.close()
+        self._f = None
+
+    @staticmethod
+    def read(path, mmap=True):
+        """Zdarzenia z pliku jako tablica EVENT_DTYPE (memmap bez kopiowania)."""
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"To nie jest plik EventLog: {path}")
+        if os.path.getsize(path) == len(MAGIC):
+            return np.zeros(0, dtype=EVENT_DTYPE)
+        if mmap:
+            return np.memmap(path, dtype=EVENT_DTYPE, mode="r", offset=len(MAGIC))
+        return np.fromfile(path, dtype=EVENT_DTYPE, offset=len(MAGIC))
+
+
+def pair_durations(events, start_kind, end_kind):
+    """
+    Czasy między zdarzeniem start_kind a najbliższym następnym end_kind tego samego agenta
+    (np. DWELL_START -> DWELL_END, SERVICE_START -> SERVICE_END).
+    Zwraca tablicę rekordów (agent_id, t_start, duration).
+    """
+    ev = events[(events["kind"] == int(start_kind)) | (events["kind"] == int(end_kind))]
+    order = np.lexsort((ev["t"], ev["agent_id"]))
+    ev = ev[order]
+    is_start = ev["kind"] == int(start_kind)
+    # start, po którym (u tego samego agenta) jest koniec
+    pair = is_start[:-1] & ~is_start[1:] & (ev["agent_id"][:-1] == ev["agent_id"][1:])
+    i = np.flatnonzero(pair)
+    out = np.zeros(len(i), dtype=[("agent_id", "<i4"), ("t_start", "<f8"), ("duration", "<f8")])
+    out["agent_id"] = ev["agent_id"][i]
+    out["t_start"] = ev["t"][i]
+    out["duration"] = ev["t"][i + 1] - ev["t"][i]
+    return out
@@ -0,0 +1,146 @@
+import logging
+import os
+
+import numpy as np
+
+from SocialForceModel import SocialForceModel
+
+
+def make_force_model(sfm_conf, dt):
+    """
+    Tworzy silnik fizyki wg sfm.backend:
+    - "native":        SocialForceModel (domyślnie),
+    - "pysocialforce": PySocialForceModel (adapter na bibliotekę pysocialforce).
+
+    Oba mają interfejs używany przez ścieżkę wsadową Simulation:
+    compute_forces(agents, walls, receivers) oraz atrybuty kernel / cutoff / threads.
+    compute_force(agent, agents, walls) (ścieżki kernel="agent"/"scalar") ma tylko
+    SocialForceModel – adapter zgłasza kernel="batched", więc nigdy nie jest o nią pytany.
+    """
+    backend = sfm_conf.get("backend", "native")
+    if backend == "native":
+        return SocialForceModel(sfm_conf)
+    if backend == "pysocialforce":
+        return PySocialForceModel(sfm_conf, dt)
+    raise ValueError(f"Nieznany backend fizyki: {backend}")
+
+
+class PySocialForceModel:
+    """
+    Adapter silnika pysocialforce (Helbing & Molnár + Moussaïd) do interfejsu SocialForceModel.
+
+    - ściany, półki i palety (odcinki ((x1, y1), (x2, y2))) -> przeszkody pysocialforce
+      w formacie (x1, x2, y1, y2), próbkowane raz (ściany są statyczne),
+    - stan [x, y, vx, vy, gx, gy, tau] budowany co krok z aktywnych agentów,
+      cel = bieżący waypoint agenta (agent.goal),
+    - liczone są siły DesiredForce + SocialForce + ObstacleForce (bez grup),
+      całkowanie zostaje po naszej stronie (Agent.update, krok dt).
+
+    Siły są liczone wsadowo dla wszystkich agentów, więc Simulation używa
+    ścieżki kernel="batched".
+    """
+
+    def __init__(self, params, dt):
+        # pysocialforce przy imporcie podpina pod logger "root" (czyli główny) swoje handlery
+        # (konsola + FileHandler("file.log") w katalogu roboczym) i ustawia mu poziom DEBUG.
+        # Na czas importu wyciszamy DEBUG/INFO (inaczej np. matplotlib wypisuje swoje DEBUG),
+        # potem odpinamy oba handlery, zamykamy plik i przywracamy poziom sprzed importu.
+        root = logging.getLogger()
+        root_level = root.level
+        disabled = logging.root.manager.disable
+        log_existed = os.path.exists("file.log")
+        logging.disable(logging.INFO)
+        try:
+            import pysocialforce as psf
+            from pysocialforce import forces as psf_forces
+            from pysocialforce.scene import PedState
+            from pysocialforce.utils import logging as psf_logging
+        except ImportError as exc:
+            raise ImportError("sfm.backend='pysocialforce' wymaga pakietu pysocialforce") from exc
+        finally:
+            logging.disable(disabled)
+            root.setLevel(root_level)
+        for handler in (psf_logging.c_handler, psf_logging.f_handler):
+            root.removeHandler(handler)
+        psf_logging.f_handler.close()
+        log_path = psf_logging.f_handler.baseFilename
+        if not log_existed and os.path.isfile(log_path) and os.path.getsize(log_path) == 0:
+            os.remove(log_path)  # pusty plik utworzony przez sam import
+
+        self.psf = psf
+        self.psf_forces = psf_forces
+        self.PedState = PedState
+        self.dt = dt
+
+        self.desired_speed = params.get("desired_speed", 1.2)
+        self.relax_time = params.get("tau", 0.5)
+
+        # Interfejs jak SocialForceModel (Simulation wybiera ścieżkę po kernel)
+        self.kernel = "batched"
+        self.cutoff = None
+        self.threads = 1
+
+        self._sim = None
+        self._walls_key = None
+
+    def _simulator(self, walls):
+        """Symulator pysocialforce z przeszkodami (tworzony ponownie tylko gdy zmienią się ściany)."""
+        key = (id(walls), len(walls))
+        if key != self._walls_key:
+            obstacles = [
+                (p1[0], p2[0], p1[1], p2[1])
+                for (p1, p2) in walls
+                if p1[0] != p2[0] or p1[1] != p2[1]
+            ]
+            dummy = np.zeros((1, 6))
+            sim = self.psf.Simulator(dummy, groups=None, obstacles=obstacles)
+            # tylko siły indywidualne (grupy nie są modelowane w sklepie)
+            keep = (self.psf_forces.DesiredForce, self.psf_forces.SocialForce, self.psf_forces.ObstacleForce)
+            sim.forces = [f for f in sim.forces if isinstance(f, keep)]
+            self._sim = sim
+            self._walls_key = key
+        return self._sim
+
+    def _set_state(self, sim, agents):
+        """
+        Nowy PedState z bieżącym stanem agentów (konstruktor pysocialforce; nowy obiekt
+        zamiast PedState.update, który dokładałby każdy krok do historii stanów).
+        Siły trzymają referencję do sim.peds, więc są inicjalizowane ponownie (Force.init).
+        """
+        n = len(agents)
+        state = np.empty((n, 7))
+        state[:, 0:2] = [a.position for a in agents]
+        state[:, 2:4] = [a.velocity for a in agents]
+        state[:, 4:6] = [a.goal if a.goal is not None else a.position for a in agents]
+        state[:, 6] = self.relax_time
+
+        peds = self.PedState(state, None, sim.config)
+        peds.step_width = self.dt
+        peds.max_speeds = np.full(n, self.desired_speed)
+        peds.initial_speeds = peds.max_speeds
+        peds.agent_radius = float(np.mean([a.radius for a in agents]))
+        sim.peds = peds
+        for force in sim.forces:
+            force.init(sim, sim.config)
+
+    def compute_forces(self, agents, walls, receivers=None):
+        """(N, 2) siły z pysocialforce; zero dla nieaktywnych, czekających i spoza receivers."""
+        n = len(agents)
+        forces = np.zeros((n, 2))
+        if n == 0:
+            return forces
+
+        active = np.array([bool(a.active) for a in agents])
+        waiting = np.array([bool(getattr(a, "is_waiting", False)) for a in agents])
+        recv = active & ~waiting
+        if receivers is not None:
+            recv &= np.asarray(receivers, dtype=bool)
+        if not np.any(recv):
+            return forces
+
+        sim = self._simulator(walls)
+        idx = np.flatnonzero(active)
+        self._set_state(sim, [agents[k] for k in idx])
+        forces[idx] = sim.compute_forces()
+        forces[~recv] = 0.0
+        return forces
@@ -0,0 +1,139 @@
+import math
+
+import numpy as np
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:  # numba jest opcjonalna – bez niej zostaje ścieżka NumPy
+    numba = None
+    NUMBA_AVAILABLE = False
+
+
+def _jit(func):
+    """njit (nogil, cache) gdy numba jest dostępna, w przeciwnym razie zwykła funkcja."""
+    if NUMBA_AVAILABLE:
+        return numba.njit(cache=True, nogil=True)(func)
+    return func
+
+
+@_jit
+def seed(value):
+    """
+    Ustawia ziarno generatora używanego w jądrach (np.random w @njit ma własny stan,
+    niezależny od np.random.seed wywołanego w Pythonie).
+    """
+    np.random.seed(value)
+
+
+# Jądra sił (te same wzory co SocialForceModel._force_from_people/_force_from_walls)
+
+@_jit
+def _pair_force(pos, radius, a, b, A, B, out, row):
+    """Siła od agenta b na agenta a, dodawana do out[row]."""
+    dx = pos[a, 0] - pos[b, 0]
+    dy = pos[a, 1] - pos[b, 1]
+    dist = math.sqrt(dx * dx + dy * dy)
+    if dist == 0.0:
+        # Ten sam punkt: lekko rozsuń w losowym kierunku
+        dx = np.random.random() * 0.01
+        dy = np.random.random() * 0.01
+        dist = math.sqrt(dx * dx + dy * dy)
+
+    overlap = radius[a] + radius[b] - dist
+    mag = A * math.exp(overlap / B)
+    if overlap > 0.0:
+        mag += 200.0 * overlap  # "Body force" przy kontakcie
+    out[row, 0] += mag * dx / dist
+    out[row, 1] += mag * dy / dist
+
+
+@_jit
+def people_forces_dense(pos, radius, active, idx, A, B, out):
+    """Odpychanie od wszystkich aktywnych agentów (bez cutoff); out ma len(idx) wierszy."""
+    n = pos.shape[0]
+    for r in range(idx.shape[0]):
+        a = idx[r]
+        for b in range(n):
+            if b == a or not active[b]:
+                continue
+            _pair_force(pos, radius, a, b, A, B, out, r)
+
+
+@_jit
+def people_forces_cells(pos, radius, idx, sorted_keys, sorted_idx,
+                        origin_x, origin_y, cell_size, ncols, nrows, cutoff, A, B, out):
+    """
+    Odpychanie od sąsiadów w promieniu cutoff, z tablic CellList
+    (_sorted_keys/_sorted_idx) – pary liczone w pętli, bez materializacji.
+    """
+    for r in range(idx.shape[0]):
+        a = idx[r]
+        cx = int(math.floor((pos[a, 0] - origin_x) / cell_size))
+        cy = int(math.floor((pos[a, 1] - origin_y) / cell_size))
+        for oy in range(-1, 2):
+            y = cy + oy
+            if y < 0 or y >= nrows:
+                continue
+            for ox in range(-1, 2):
+                x = cx + ox
+                if x < 0 or x >= ncols:
+                    continue
+                key = y * ncols + x
+                start = np.searchsorted(sorted_keys, key, side="left")
+                end = np.searchsorted(sorted_keys, key, side="right")
+                for s in range(start, end):
+                    b = sorted_idx[s]
+                    if b == a:
+                        continue
+                    dx = pos[a, 0] - pos[b, 0]
+                    dy = pos[a, 1] - pos[b, 1]
+                    if dx * dx + dy * dy >= cutoff * cutoff:
+                        continue
+                    _pair_force(pos, radius, a, b, A, B, out, r)
+
+
+@_jit
+def wall_forces(pos, radius, idx, walls_arr, A_w, B_w, out):
+    """Odpychanie od odcinków ścian [x1, y1, x2, y2] (bez odcinków zerowej długości)."""
+    for r in range(idx.shape[0]):
+        a = idx[r]
+        px = pos[a, 0]
+        py = pos[a, 1]
+        for s in range(walls_arr.shape[0]):
+            x1 = walls_arr[s, 0]
+            y1 = walls_arr[s, 1]
+            wx = walls_arr[s, 2] - x1
+            wy = walls_arr[s, 3] - y1
+            length = math.sqrt(wx * wx + wy * wy)
+            wx /= length
+            wy /= length
+
+            proj = (px - x1) * wx + (py - y1) * wy
+            proj = min(max(proj, 0.0), length)
+
+            dx = px - (x1 + proj * wx)
+            dy = py - (y1 + proj * wy)
+            dist = math.sqrt(dx * dx + dy * dy)
+            if dist == 0.0:
+                continue  # agent dokładnie na ścianie
+
+            overlap = radius[a] - dist
+            mag = A_w * math.exp(overlap / B_w)
+            if overlap > 0.0:
+                mag += 200.0 * overlap
+            out[r, 0] += mag * dx / dist
+            out[r, 1] += mag * dy / dist
+
+
+# Całkowanie (jak Agent.update poza czekaniem)
+
+@_jit
+def integrate_euler(pos, vel, force, idx, dt):
+    """Semi-implicit Euler w miejscu: v += F dt, x += v dt dla wierszy idx."""
+    for r in range(idx.shape[0]):
+        k = idx[r]
+        vel[k, 0] += force[k, 0] * dt
+        vel[k, 1] += force[k, 1] * dt
+        pos[k, 0] += vel[k, 0] * dt
+        pos[k, 1] += vel[k, 1] * dt
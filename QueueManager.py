@@ -1,6 +1,7 @@
 import numpy as np
 import random
 from PathFinding import a_star_search
+from EventLog import EventKind
 
 
 class QueueManager:
@@ -45,6 +46,46 @@ class QueueManager:
         # FAZY AGENTÓW
         self.agent_phase = {}
 
+        # Tryb kinematyczny kolejki: agenci w kolejce nie liczą sił SFM,
+        # tylko przesuwają się po slotach (nadal odpychają przechodniów)
+        checkout_conf = config.get("checkout", {})
+        self.kinematic_queue = bool(checkout_conf.get("kinematic_queue", False))
+
+        # Planista zdarzeń (koniec obsługi przy kasie jako zdarzenie zamiast
+        # sprawdzania is_waiting w każdym kroku)
+        self.scheduler = getattr(env, "scheduler", None)
+        # Dziennik zdarzeń (EventLog) – wstrzykiwany jak planista; None = bez logowania
+        self.event_log = getattr(env, "event_log", None)
+        self._logged_phase = {}  # agent -> (faza, slot) ostatnio zapisane w dzienniku
+
+        # Agenci "trzymani" przez model kas (bez fizyki) – w pełnym modelu pusty
+        self.held = set()
+
+    def holds(self, agent):
+        """Czy agent jest poza fizyką (obsługiwany przez model kas)."""
+        return agent in self.held
+
+    def is_kinematic(self, agent):
+        """Czy agent porusza się kinematycznie (tryb kolejki bez SFM)."""
+        if not self.kinematic_queue:
+            return False
+        return self.agent_phase.get(agent) in ("to_queue_slot", "in_queue")
+
+    def _set_phase(self, agent, phase, cashier=-1, slot=-1):
+        """Ustawia fazę agenta i (jeśli jest dziennik) zapisuje zmianę fazy/slotu."""
+        self.agent_phase[agent] = phase
+        if self.event_log is not None:
+            state = (phase, slot)
+            if self._logged_phase.get(agent) != state:
+                self._logged_phase[agent] = state
+                self.event_log.emit(EventKind.PHASE, agent, phase=phase, cashier=cashier, slot=slot)
+                if phase == "exited":
+                    del self._logged_phase[agent]
+
+    def _queue_slot_of(self, agent):
+        """Indeks slotu kolejki dla agenta (dodatkowi stoją przy ostatnim slocie)."""
+        return min(self.queue.index(agent), len(self.queue_slots) - 1)
+
     # Pomocnicze: planowanie ścieżek A*
 
     def _plan_path(self, agent, target_pos, wait_at_end=0.0):
@@ -85,7 +126,8 @@ class QueueManager:
 
         # 2) jeśli agent doszedł do cash_payment i zaczął CZEKAĆ,
         #    dopiero teraz faktycznie ZAJMUJE tę kasę
-        for agent, phase in list(self.agent_phase.items()):
+        #    (z planistą robi to _start_service w chwili dojścia)
+        for agent, phase in ([] if self.scheduler is not None else list(self.agent_phase.items())):
             if phase == "to_cashier" and getattr(agent, "is_waiting", False):
                 idx = self._cashier_reserved_for(agent)
                 if idx is not None:
@@ -93,6 +135,8 @@ class QueueManager:
                     if cashier["agent"] is None:
                         cashier["agent"] = agent      # faktyczne zajęcie kasy
                         cashier["reserved_by"] = None # rezerwacja wykorzystana
+                        if self.event_log is not None:
+                            self.event_log.emit(EventKind.SERVICE_START, agent, cashier=idx)
 
         # 3) Obsłuż agentów, którzy skończyli ścieżkę kolejki/kasy/wyjścia
         for agent, phase in list(self.agent_phase.items()):
@@ -100,6 +144,11 @@ class QueueManager:
                 continue
 
             if phase in ("to_queue_slot", "to_cashier", "to_exit") and getattr(agent, "finished_path", False):
+                if phase == "to_cashier" and self.scheduler is not None:
+                    # doszedł do kasy -> start obsługi (koniec obsługi to zdarzenie)
+                    if not agent.is_waiting:
+                        self._start_service(agent)
+                    continue
                 self._on_reached_destination(agent, phase)
 
         # 4) Wolne kasy pobierają agentów z kolejki
@@ -124,7 +173,7 @@ class QueueManager:
         if self.queue:
             if agent not in self.queue:
                 self.queue.append(agent)
-            self.agent_phase[agent] = "to_queue_slot"
+            self._set_phase(agent, "to_queue_slot", slot=self._queue_slot_of(agent))
             self._rebuild_queue_paths()
             return
 
@@ -145,7 +194,7 @@ class QueueManager:
             # 3) wszystkie kasy zajęte lub zarezerwowane -> zakładamy kolejkę
             if agent not in self.queue:
                 self.queue.append(agent)
-            self.agent_phase[agent] = "to_queue_slot"
+            self._set_phase(agent, "to_queue_slot", slot=self._queue_slot_of(agent))
             self._rebuild_queue_paths()
 
 
@@ -170,18 +219,18 @@ class QueueManager:
     def _on_reached_destination(self, agent, phase):
         """Reakcja na zakończenie ścieżki zależnie od fazy."""
         if phase == "to_queue_slot":
-            # agent stoi w kolejce – trzymamy go przy jego slocie
-            self.agent_phase[agent] = "in_queue"
-
             # wyznacz slot na podstawie miejsca agenta w kolejce
             if agent in self.queue:
-                idx = self.queue.index(agent)
-                slot_index = min(idx, len(self.queue_slots) - 1)
+                slot_index = self._queue_slot_of(agent)
                 slot_pos = self.queue_slots[slot_index]
             else:
                 # awaryjnie: jakby nie był w self.queue, trzymaj go tam, gdzie jest
+                slot_index = -1
                 slot_pos = agent.position.copy()
 
+            # agent stoi w kolejce – trzymamy go przy jego slocie
+            self._set_phase(agent, "in_queue", slot=slot_index)
+
             # stały goal na slot
             agent.path = None
             agent.path_index = 0
@@ -196,6 +245,8 @@ class QueueManager:
             idx = self._cashier_index_of(agent)
             if idx is not None:
                 self.cashiers[idx]["agent"] = None  # zwolnij kasę
+                if self.event_log is not None:
+                    self.event_log.emit(EventKind.SERVICE_END, agent, cashier=idx)
 
             # start sekwencji wyjścia
             self._start_exit_for(agent)
@@ -216,8 +267,9 @@ class QueueManager:
                     return  # nie kończymy jeszcze, agent idzie dalej
 
             # Jeśli nie ma kolejnych punktów — agent wychodzi ze sklepu
-            self.agent_phase[agent] = "exited"
+            self._set_phase(agent, "exited")
             agent.exited = True
+            self.env.mark_exited(agent)
             agent.active = False
             agent.goal = None
             agent.velocity *= 0.0
@@ -237,9 +289,13 @@ class QueueManager:
         # rezerwujemy kasę dla tego agenta
         cashier["reserved_by"] = agent
 
-        # ostatni punkt ścieżki ma wait = service_time (czas płacenia)
-        self._plan_path(agent, service_point, wait_at_end=service_time)
-        self.agent_phase[agent] = "to_cashier"
+        # ostatni punkt ścieżki ma wait = service_time (czas płacenia);
+        # z planistą czas obsługi liczy _start_service po dojściu do kasy
+        if self.scheduler is not None:
+            self._plan_path(agent, service_point)
+        else:
+            self._plan_path(agent, service_point, wait_at_end=service_time)
+        self._set_phase(agent, "to_cashier", cashier=cashier_idx)
 
         # na pewno nie jest już w kolejce
         if agent in self.queue:
@@ -250,6 +306,29 @@ class QueueManager:
 
 
 
+    def _start_service(self, agent):
+        """Agent stanął przy kasie: zajmuje ją i rejestruje zdarzenie końca obsługi."""
+        idx = self._cashier_reserved_for(agent)
+        if idx is not None:
+            cashier = self.cashiers[idx]
+            cashier["agent"] = agent       # faktyczne zajęcie kasy
+            cashier["reserved_by"] = None  # rezerwacja wykorzystana
+
+        agent.is_waiting = True
+        agent.wait_timer = float("inf")
+        self.scheduler.schedule_in(agent.service_time, self._on_service_end, agent)
+        if self.event_log is not None:
+            self.event_log.emit(EventKind.SERVICE_START, agent, cashier=-1 if idx is None else idx)
+
+    def _on_service_end(self, agent):
+        """Zdarzenie planisty: koniec obsługi – zwolnij kasę i idź do wyjścia."""
+        idx = self._cashier_index_of(agent)
+        if idx is not None:
+            self.cashiers[idx]["agent"] = None
+        if self.event_log is not None:
+            self.event_log.emit(EventKind.SERVICE_END, agent, cashier=-1 if idx is None else idx)
+        self._start_exit_for(agent)
+
     def _start_exit_for(self, agent):
         """
         Po zakończeniu stania przy kasie agent idzie do wyjścia
@@ -274,7 +353,7 @@ class QueueManager:
 
         # zaplanuj ścieżkę do pierwszego punktu wyjścia
         self._plan_path(agent, exit_sequence[0])
-        self.agent_phase[agent] = "to_exit"
+        self._set_phase(agent, "to_exit")
 
 
 
@@ -292,4 +371,4 @@ class QueueManager:
             slot_index = min(idx, len(self.queue_slots) - 1)
             target = self.queue_slots[slot_index]
             self._plan_path(agent, target)
-            self.agent_phase[agent] = "to_queue_slot"
+            self._set_phase(agent, "to_queue_slot", slot=slot_index)
@@ -0,0 +1,54 @@
+import heapq
+import itertools
+
+
+class EventScheduler:
+    """
+    Centralny planista zdarzeń czasowych (kopiec priorytetowy).
+
+    Komponenty rejestrują zdarzenia "w chwili t wywołaj callback(*args)"
+    (spawn, koniec czekania przy półce, koniec obsługi przy kasie),
+    a Simulation w każdym kroku odpala tylko zdarzenia, których czas już minął.
+    Długie czekanie nie kosztuje więc nic w kolejnych krokach.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self._heap = []
+        self._seq = itertools.count()  # kolejność FIFO dla zdarzeń o tym samym czasie
+
+    def schedule(self, t, callback, *args):
+        """Rejestruje zdarzenie w chwili t. Zwraca uchwyt do cancel()."""
+        event = [float(t), next(self._seq), callback, args, True]
+        heapq.heappush(self._heap, event)
+        return event
+
+    def schedule_in(self, delay, callback, *args):
+        """Rejestruje zdarzenie za `delay` sekund od bieżącego czasu."""
+        return self.schedule(self.now + delay, callback, *args)
+
+    @staticmethod
+    def cancel(event):
+        """Anuluje zdarzenie (leniwie – zostaje w kopcu, ale nie zostanie odpalone)."""
+        if event is not None:
+            event[4] = False
+
+    def next_time(self):
+        """Czas najbliższego aktywnego zdarzenia albo None."""
+        while self._heap and not self._heap[0][4]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def run_until(self, t):
+        """Odpala (w kolejności czasu) wszystkie zdarzenia z czasem <= t i ustawia now = t."""
+        heap = self._heap
+        while heap and heap[0][0] <= t:
+            event_t, _, callback, args, alive = heapq.heappop(heap)
+            if not alive:
+                continue
+            self.now = event_t
+            callback(*args)
+        self.now = t
+
+    def __len__(self):
+        return sum(1 for e in self._heap if e[4])
@@ -1,6 +1,9 @@
 import random
 import numpy as np
 
+from CellList import CellList
+from DomainDecomposition import DomainPool
+
 
 class Simulation:
     """
@@ -25,8 +28,105 @@ class Simulation:
         gen_conf = config["agent_generation"]
         self.spawn_rate = gen_conf.get("spawn_rate", 0.2)  # agenci / sekundę
 
-        # Timer ile zostało do kolejnego spawnu
-        self.time_until_next_spawn = 0.0
+        # Zdarzenia czasowe (spawny, koniec czekania, koniec obsługi)
+        # odpala wspólny planista – pierwszy spawn od razu
+        self.scheduler = environment.scheduler
+
+        # Statyczne segmenty odpychające (ściany + półki + palety) – liczone raz
+        self.force_walls = (
+            self.env.walls
+            + self.env.shelves
+            + self.env._pallet_rects_to_lines()
+        )
+
+        # Całkowanie: "euler" (semi-implicit, jak Agent.update) albo "verlet" (velocity Verlet),
+        # z adaptacyjnym podziałem kroku dt na max. max_substeps podkroków tak,
+        # żeby zmiana prędkości w podkroku nie przekraczała substep_dv (kontakty, tłok przy spawnie)
+        sfm_conf = config.get("sfm", {})
+        self.integrator = sfm_conf.get("integrator", "euler")
+        self.max_substeps = max(1, int(sfm_conf.get("max_substeps", 1)))
+        self.substep_dv = float(sfm_conf.get("substep_dv", 0.5))
+        self.last_substeps = 1
+        # Verlet: odroczone półkopnięcie z końca poprzedniego kroku (agent -> czas) i z bieżącego
+        self._kick_prev = {}
+        self._kick_next = {}
+        if self.integrator not in ("euler", "verlet"):
+            raise ValueError(f"Nieznany integrator: {self.integrator}")
+
+        # Aktualizacja wielotempowa:
+        # - park_waiting: czekający agenci (koniec czekania = zdarzenie planisty) są
+        #   zatrzymywani od razu i pomijani aż do zdarzenia,
+        # - isolation_check_every > 1: w pętli agent po agencie sąsiedzi są sprawdzani
+        #   co tyle kroków; agent bez nikogo w promieniu isolation_radius (+ zapas na ruch)
+        #   liczy tylko siłę celu i ścian
+        self.park_waiting = bool(sfm_conf.get("park_waiting", False))
+        self.isolation_every = max(1, int(sfm_conf.get("isolation_check_every", 1)))
+        self.isolation_radius = float(sfm_conf.get("isolation_radius") or sfm_conf.get("cutoff") or 2.5)
+        self._isolated = set()
+        self._isolation_next = 0
+        self._isolation_members = frozenset()
+        self._step_index = 0
+
+        # Poziom szczegółowości (LOD): agent bez sąsiadów idzie kinematycznie po ścieżce
+        # (z korektą od ścian), pełny SFM włącza się, gdy ktoś podejdzie bliżej niż
+        # lod_enter_radius, i wyłącza dopiero, gdy nikogo nie ma w lod_exit_radius (histereza)
+        self.lod = bool(sfm_conf.get("lod", False))
+        self.lod_enter_radius = float(sfm_conf.get("lod_enter_radius", 1.5))
+        self.lod_exit_radius = max(float(sfm_conf.get("lod_exit_radius", 2.5)), self.lod_enter_radius)
+        # Ruch swobodny w SFM: dv/dt = (v0 - v) / tau - 0.2 v, więc agent kinematyczny
+        # dochodzi do v0 / (1 + 0.2 tau) ze stałą czasową tau / (1 + 0.2 tau) – jak samotny agent w SFM
+        model = self.env.model
+        self.lod_speed = model.desired_speed / (1.0 + 0.2 * model.relax_time)
+        self.lod_tau = model.relax_time / (1.0 + 0.2 * model.relax_time)
+        self.lod_agent_steps = 0        # licznik kroków agentów (do raportu walidacji)
+        self.lod_kinematic_steps = 0    # w tym kroki kinematyczne
+
+        # Szybkie przewijanie pustych/rzadkich okresów: gdy nikt z nikim nie może się
+        # zetknąć, czas skacze (wielokrotność dt, max fast_forward_max s) do najbliższego
+        # zdarzenia planisty / aktywacji albo dojścia agenta do waypointu (ETA liczone analitycznie)
+        self.fast_forward = bool(sfm_conf.get("fast_forward", False))
+        self.fast_forward_max = float(sfm_conf.get("fast_forward_max", 60.0))
+        self.fast_forward_radius = float(sfm_conf.get("fast_forward_radius") or sfm_conf.get("cutoff") or 2.5)
+        self.ff_jumps = 0
+        self.ff_skipped_time = 0.0
+
+        # Dekompozycja na pasy obsługiwane przez procesy robocze (sfm.workers > 1)
+        self.domains = None
+        if int(sfm_conf.get("workers", 1)) > 1 and sfm_conf.get("backend", "native") == "native":
+            self.domains = DomainPool(
+                sfm_conf,
+                self.force_walls,
+                int(sfm_conf["workers"]),
+                0.0,
+                self.env.width,
+                seed=sfm_conf.get("seed", 0),
+            )
+
+        # pregenerate_seconds: cały harmonogram przyjść generowany z góry
+        # (uśpieni agenci w kopcu Environment.pending_agents) zamiast spawnów w locie
+        self.pregenerate_seconds = gen_conf.get("pregenerate_seconds", None)
+        if self.spawn_rate > 0:
+            if self.pregenerate_seconds:
+                self._pregenerate_arrivals(self.pregenerate_seconds)
+            else:
+                self.scheduler.schedule(self.current_time, self._spawn_event)
+
+    def _spawn_interval(self):
+        """Losowy odstęp do kolejnego spawnu (jak w master)."""
+        base_interval = 1.0 / self.spawn_rate
+        return random.uniform(base_interval * 0.2, base_interval * 1.8)
+
+    def _pregenerate_arrivals(self, horizon):
+        """Tworzy z góry wszystkich agentów przychodzących w [0, horizon) jako uśpionych."""
+        t = self.current_time
+        while t < self.current_time + horizon:
+            self.env.spawn_agent(spawn_time=t)
+            t += self._spawn_interval()
+
+    def _spawn_event(self):
+        """Zdarzenie planisty: spawn agenta i zaplanowanie kolejnego."""
+        self.env.spawn_agent()
+        self.scheduler.schedule_in(self._spawn_interval(), self._spawn_event)
     
     def _pallet_lines(self):
         lines = []
@@ -41,51 +141,45 @@ class Simulation:
             ])
         return lines
 
-    def update(self, on_before_remove=None):
+    def update(self, on_before_remove=None, max_span=None):
         """
         Jeden krok symulacji:
-        1) ewentualny spawn nowego agenta,
+        1) zdarzenia z planisty, których czas minął (m.in. spawn nowego agenta),
         2) update wszystkich aktywnych agentów,
         3) update kolejek,
         4) usunięcie agentów, którzy wyszli.
-        """
 
-        #  CIĄGŁE GENEROWANIE NOWYCH AGENTÓW 
-        if self.spawn_rate > 0:
-            self.time_until_next_spawn -= self.dt
+        Z fast_forward krok może objąć wiele dt naraz (nie dłużej niż max_span).
+        """
 
-            if self.time_until_next_spawn <= 0:
-                # Czas na nowego agenta
-                self.env.spawn_agent()
+        #  ZDARZENIA CZASOWE (spawny, koniec czekania, koniec obsługi)
+        self.scheduler.run_until(self.current_time)
 
-                # Wyznacz losowy odstęp do kolejnego spawnu (jak w master)
-                base_interval = 1.0 / self.spawn_rate
-                self.time_until_next_spawn = random.uniform(
-                    base_interval * 0.2,
-                    base_interval * 1.8,
-                )
-
-        #  AKTYWACJA AGENTÓW Z OPÓŹNIENIEM 
-        for agent in self.env.agents:
-            if not getattr(agent, "active", True) and \
-               self.current_time >= getattr(agent, "spawn_time", 0.0):
-                agent.active = True
+        #  AKTYWACJA AGENTÓW Z OPÓŹNIENIEM (tylko ci z kopca, których czas nadszedł)
+        self.env.activate_due(self.current_time)
 
         # UPDATE FIZYKI AGENTÓW 
-        for agent in self.env.agents:
-            if not getattr(agent, "active", True):
-                continue  # Pomiń nieaktywnych
+        qm = getattr(self.env, "queue_manager", None)
 
-            force = self.env.model.compute_force(
-                agent,
-                self.env.agents,
-                self.env.walls + self.env.shelves + self.env._pallet_rects_to_lines(),
-            )
-            agent.update(force, self.dt)
+        # Agenci trzymani przez model kas (AnalyticCheckout) nie biorą udziału w fizyce
+        held = getattr(qm, "held", None)
+        sources = [a for a in self.env.agents if a not in held] if held else self.env.agents
+        # półkopnięcia odroczone tylko o jeden krok (kto w nim nie był całkowany, traci je)
+        self._kick_prev, self._kick_next = self._kick_next, {}
 
-            # Twarde „odbicie” od kas
-            if hasattr(self.env, "keep_agent_out_of_cashiers"):
-                self.env.keep_agent_out_of_cashiers(agent)
+        # SZYBKIE PRZEWIJANIE (brak możliwych interakcji)
+        if self.fast_forward:
+            steps = self._fast_forward_steps(sources, qm, max_span)
+            if steps >= 2:
+                self._fast_forward_by(sources, steps, on_before_remove)
+                return
+
+        if self.domains is not None:
+            self._update_agents_domains(sources, qm)
+        elif getattr(self.env.model, "kernel", "agent") in ("agent", "scalar"):
+            self._update_agents_sequential(sources, qm)
+        else:
+            self._update_agents_batched(sources, qm)
 
         #  LOGIKA KOLEJEK DO KAS 
         if hasattr(self.env, "queue_manager"):
@@ -103,4 +197,396 @@ class Simulation:
 
         # POSUNIĘCIE CZASU 
         self.current_time += self.dt
+        self._step_index += 1
+
+    def _fast_forward_steps(self, sources, qm, max_span):
+        """
+        Ile kroków dt można przeskoczyć naraz (0 = zwykły krok). Warunki:
+        - żaden idący nie jest bliżej nikogo niż fast_forward_radius (z zapasem na ruch w czasie
+          skoku); stojący względem siebie nie są sprawdzani,
+        - idący agenci mają cel, idą już z prędkością marszu (>= 0.8 lod_speed, stały próg)
+          i nie dojdą do celu w czasie skoku,
+        - stojący to tylko czekający na zdarzenie planisty albo stojący w kolejce
+          (in_queue w promieniu 0.2 m od swojego miejsca – QueueManager trzyma tam cel),
+        - skok kończy się przed najbliższym zdarzeniem planisty i aktywacją uśpionego agenta.
+        """
+        span = self.fast_forward_max
+        if max_span is not None:
+            span = min(span, max_span)
+
+        next_event = self.scheduler.next_time()
+        if next_event is not None:
+            span = min(span, next_event - self.current_time)
+        if self.env.pending_agents:
+            span = min(span, self.env.pending_agents[0][0] - self.current_time)
+
+        active = [a for a in sources if a.active]
+        max_speed = 0.0  # największa prędkość idących (do zapasu na zbliżanie się)
+        movers = []
+        for agent in active:
+            if agent.is_waiting:
+                if agent.scheduler is None:
+                    return 0  # czekanie odliczane co krok (wait_timer)
+                continue
+            if self._ff_standing_in_queue(agent, qm):
+                continue
+            if agent.goal is None:
+                return 0  # koniec ścieżki – QueueManager musi zareagować
+            # jeszcze się rozpędza (np. po czekaniu) – to liczy zwykły krok
+            agent_speed = float(np.hypot(agent.velocity[0], agent.velocity[1]))
+            if agent_speed < 0.8 * self.lod_speed:
+                return 0
+            # czas do wejścia w promień 0.2 m wokół waypointu (Agent.advance_path)
+            dist = float(np.linalg.norm(agent.goal - agent.position))
+            span = min(span, (dist - 0.2) / agent_speed)
+            movers.append(agent)
+            max_speed = max(max_speed, agent_speed)
+
+        # Odległości liczone tylko w parach z co najmniej jednym idącym: stojący (kolejka,
+        # czekający) są w czasie skoku trzymani w miejscu, więc pary stojący–stojący
+        # (np. sąsiednie miejsca w kolejce co 0.75 m) nie blokują przewijania
+        if movers and len(active) > 1:
+            if len(active) > 200:
+                return 0  # tłum – przewijanie i tak by się nie opłaciło
+            pos = np.array([a.position for a in active], dtype=float)
+            mover_set = set(movers)
+            rows = np.array([k for k, a in enumerate(active) if a in mover_set])
+            d = np.hypot(pos[rows, None, 0] - pos[None, :, 0], pos[rows, None, 1] - pos[None, :, 1])
+            d[np.arange(len(rows)), rows] = np.inf
+            d_min = float(d.min())
+            if d_min < self.fast_forward_radius:
+                return 0
+            # w najgorszym razie dwóch idących zbliża się z prędkością 2 * (największa prędkość)
+            span = min(span, (d_min - self.fast_forward_radius) / (2.0 * max_speed))
+
+        if span <= 0:
+            return 0
+        return int(np.floor(span / self.dt + 1e-9))
+
+    @staticmethod
+    def _ff_standing_in_queue(agent, qm):
+        """Stoi w kolejce: faza in_queue i cel (miejsce w kolejce) bliżej niż 0.2 m albo brak celu."""
+        if qm is None or qm.agent_phase.get(agent) != "in_queue":
+            return False
+        return agent.goal is None or float(np.linalg.norm(agent.goal - agent.position)) < 0.2
+
+    def _fast_forward_by(self, sources, steps, on_before_remove):
+        """
+        Przesuwa czas o steps * dt jednym ruchem: idący agenci przechodzą prosto
+        w stronę waypointu z aktualną prędkością marszu, czekający są parkowani.
+        """
+        span = steps * self.dt
+        qm = getattr(self.env, "queue_manager", None)
+        for agent in sources:
+            if not agent.active:
+                continue
+            if agent.is_waiting:
+                if not agent.parked:
+                    agent.park(self.dt)
+                continue
+            if self._ff_standing_in_queue(agent, qm):
+                agent.velocity = np.zeros(2)  # stoi na swoim miejscu przez cały skok
+                continue
+            if agent.goal is None:
+                continue
+            dir_vec = agent.goal - agent.position
+            direction = dir_vec / np.linalg.norm(dir_vec)
+            agent.velocity = direction * float(np.hypot(agent.velocity[0], agent.velocity[1]))
+            agent.position += agent.velocity * span
+
+        if hasattr(self.env, "queue_manager"):
+            self.env.queue_manager.update(span)
+
+        if on_before_remove is not None:
+            on_before_remove(span, self.current_time + span, self.env.agents, self.env)
+
+        if hasattr(self.env, "remove_exited_agents"):
+            self.env.remove_exited_agents()
+
+        self.current_time += span
+        self._step_index += steps
+        self.ff_jumps += 1
+        self.ff_skipped_time += span
+
+    def _update_agents_sequential(self, sources, qm):
+        """Fizyka agent po agencie (compute_force + update dla każdego z osobna)."""
+        if self.isolation_every > 1:
+            self._update_isolation(sources)
+        lod_push = self._update_lod(sources) if self.lod else {}
+
+        for agent in sources:
+            if not getattr(agent, "active", True):
+                continue  # Pomiń nieaktywnych
+
+            if self._parked(agent):
+                continue
+
+            if agent in lod_push:
+                agent.move_kinematic(self.dt, push=lod_push[agent], speed=self.lod_speed, tau=self.lod_tau)
+                continue
+
+            # Kolejka kinematyczna: bez liczenia sił (agent nadal jest
+            # źródłem odpychania dla innych, bo zostaje w env.agents)
+            if qm is not None and qm.is_kinematic(agent):
+                agent.move_kinematic(self.dt)
+                continue
+
+            # Odizolowany agent: bez pętli po sąsiadach (nikt nie dojdzie do niego do kolejnego sprawdzenia)
+            others = () if agent in self._isolated else sources
+
+            force = self.env.model.compute_force(agent, others, self.force_walls)
+            if self._substepping() and not agent.is_waiting:
+                self._integrate_substeps(
+                    [agent],
+                    force[None, :],
+                    lambda: self.env.model.compute_force(agent, others, self.force_walls)[None, :],
+                )
+                agent.advance_path()
+            else:
+                agent.update(force, self.dt)
+
+            # Twarde „odbicie” od kas
+            if hasattr(self.env, "keep_agent_out_of_cashiers"):
+                self.env.keep_agent_out_of_cashiers(agent)
+
+    def _update_agents_batched(self, sources, qm):
+        """
+        Fizyka wsadowa: siły wszystkich agentów liczone naraz (NumPy, opcjonalnie
+        wątki) z pozycji na początku kroku, potem całkowanie agent po agencie.
+        """
+        model = self.env.model
+        lod_push = self._update_lod(sources) if self.lod else {}
+        kinematic = [(qm is not None and qm.is_kinematic(a)) or a in lod_push for a in sources]
+        receivers = np.logical_not(kinematic)
+        forces = model.compute_forces(sources, self.force_walls, receivers=receivers)
+
+        # Agenci całkowani poza Agent.update (podkroki albo kernel "numba"), bez czekających
+        integrated = np.zeros(len(sources), dtype=bool)
+        new_state = None  # (pos, vel) z całkowania na tablicach (kernel "numba")
+        movers = receivers & np.array(
+            [bool(a.active) and not a.is_waiting for a in sources], dtype=bool
+        ).reshape(-1)
+        if self._substepping():
+            idx = np.flatnonzero(movers)
+            self._integrate_substeps(
+                [sources[k] for k in idx],
+                forces[idx],
+                lambda: model.compute_forces(sources, self.force_walls, receivers=movers)[idx],
+            )
+            integrated = movers
+        elif model.kernel == "numba":
+            # całkowanie też w skompilowanej pętli (wiersze przypisywane w pętli niżej)
+            new_state = model.integrate(sources, forces, movers, self.dt)
+            integrated = movers
+
+        for k, (agent, force, is_kinematic, done) in enumerate(zip(sources, forces, kinematic, integrated)):
+            if not getattr(agent, "active", True):
+                continue
+
+            if self._parked(agent):
+                continue
+
+            if is_kinematic:
+                if agent in lod_push:
+                    agent.move_kinematic(self.dt, push=lod_push[agent], speed=self.lod_speed, tau=self.lod_tau)
+                else:
+                    agent.move_kinematic(self.dt)
+                continue
+
+            if done:
+                if new_state is not None:
+                    agent.position = new_state[0][k]
+                    agent.velocity = new_state[1][k]
+                agent.advance_path()
+            else:
+                agent.update(force, self.dt)
+            if hasattr(self.env, "keep_agent_out_of_cashiers"):
+                self.env.keep_agent_out_of_cashiers(agent)
+
+    def _parked(self, agent):
+        """
+        Czy agent jest zaparkowany (czeka na zdarzenie planisty) – wtedy nie jest
+        aktualizowany, a przy parkowaniu od razu się zatrzymuje (Agent.park).
+        Nadal odpycha innych, bo zostaje w env.agents.
+        """
+        if self.park_waiting and agent.is_waiting and agent.scheduler is not None:
+            if not agent.parked:
+                agent.park(self.dt)
+                if hasattr(self.env, "keep_agent_out_of_cashiers"):
+                    self.env.keep_agent_out_of_cashiers(agent)
+            return True
+        agent.parked = False
+        return False
+
+    def _update_isolation(self, sources):
+        """
+        Co isolation_every kroków (albo gdy zmieni się skład ruchomych agentów: spawn,
+        wyjście, aktywacja, wybudzenie z parkowania) wyznacza agentów bez sąsiadów
+        w promieniu isolation_radius + zapas = 2 * v_max * dt * isolation_every.
+        """
+        active = [a for a in sources if a.active]
+        # zbiór obiektów (nie liczność ani id(), które może przejść na nowego agenta);
+        # zaparkowany, którego zdarzenie już minęło (nie czeka), liczy się jako wybudzony
+        members = frozenset(a for a in active if not (a.parked and a.is_waiting))
+        if self._step_index < self._isolation_next and members == self._isolation_members:
+            return
+        self._isolation_next = self._step_index + self.isolation_every
+        self._isolation_members = members
+
+        if len(active) < 2:
+            self._isolated = set(active)
+            return
+
+        pos = np.array([a.position for a in active], dtype=float)
+        vel = np.array([a.velocity for a in active], dtype=float)
+        v_max = max(float(np.max(np.hypot(vel[:, 0], vel[:, 1]))), max(a.desired_speed for a in active))
+        radius = self.isolation_radius + 2.0 * v_max * self.dt * self.isolation_every
+
+        cells = CellList(pos, radius)
+        i, j, _, _ = cells.pairs_within(np.arange(len(active)), radius)
+        crowded = np.zeros(len(active), dtype=bool)
+        crowded[i] = True
+        crowded[j] = True
+        self._isolated = {a for a, c in zip(active, crowded) if not c}
+
+    def _update_lod(self, sources):
+        """
+        Przełącza agentów między pełnym SFM a ruchem kinematycznym (Agent.lod_full)
+        na podstawie sąsiadów z CellList; zwraca {agent kinematyczny: siła od ścian}.
+        """
+        movers = [a for a in sources if a.active and not a.is_waiting]
+        if not movers:
+            return {}
+
+        pos = np.array([a.position for a in movers], dtype=float)
+        near_exit = np.zeros(len(movers), dtype=bool)
+        near_enter = np.zeros(len(movers), dtype=bool)
+
+        # Sąsiadami są wszyscy aktywni (także czekający przy półkach)
+        others = [a for a in sources if a.active]
+        if len(others) > 1:
+            all_pos = np.array([a.position for a in others], dtype=float)
+            row_of = {id(a): k for k, a in enumerate(others)}
+            query = np.array([row_of[id(a)] for a in movers], dtype=np.int64)
+            cells = CellList(all_pos, self.lod_exit_radius)
+            i, _, _, dist = cells.pairs_within(query, self.lod_exit_radius)
+            mover_of = np.full(len(others), -1, dtype=np.int64)
+            mover_of[query] = np.arange(len(movers))
+            near_exit[mover_of[i]] = True
+            near_enter[mover_of[i[dist < self.lod_enter_radius]]] = True
+
+        kinematic = []
+        for k, agent in enumerate(movers):
+            if agent.lod_full and not near_exit[k]:
+                agent.lod_full = False
+            elif not agent.lod_full and near_enter[k]:
+                agent.lod_full = True
+            if not agent.lod_full:
+                kinematic.append(k)
+
+        self.lod_agent_steps += len(movers)
+        self.lod_kinematic_steps += len(kinematic)
+        if not kinematic:
+            return {}
+
+        # Korekta od ścian (ten sam wzór co w SFM) dla agentów kinematycznych
+        model = self.env.model
+        kin = np.array(kinematic, dtype=np.int64)
+        if hasattr(model, "_wall_forces_batched"):
+            radius = np.array([movers[k].radius for k in kin], dtype=float)
+            push = model._wall_forces_batched(pos[kin], radius, model._wall_array(self.force_walls))
+        else:
+            push = np.zeros((len(kin), 2))
+        return {movers[k]: f for k, f in zip(kin, push)}
+
+    def _substepping(self):
+        """Czy całkowanie wymaga czegoś więcej niż pojedynczego kroku Agent.update."""
+        return self.integrator != "euler" or self.max_substeps > 1
+
+    def _num_substeps(self, forces):
+        """Liczba podkroków: |F| * h <= substep_dv (siła kontaktowa rośnie z nakładaniem się)."""
+        if self.max_substeps <= 1 or len(forces) == 0:
+            return 1
+        max_force = float(np.max(np.hypot(forces[:, 0], forces[:, 1])))
+        k = int(np.ceil(max_force * self.dt / self.substep_dv))
+        return min(max(k, 1), self.max_substeps)
+
+    def _integrate_substeps(self, agents, forces, force_fn):
+        """
+        Całkuje `agents` przez dt w k podkrokach (k z _num_substeps).
+        forces: siły na początku kroku, force_fn(): siły po przesunięciu (te same wiersze).
+        Euler: v += F h, x += v h.  Verlet: v += F h/2, x += v h, F = force_fn(), v += F h/2.
+
+        W Verlecie końcowe v += F h/2 jest odraczane do następnego kroku: siła na końcu
+        kroku to ta sama siła, którą wywołujący i tak liczy na jego początku (te same
+        pozycje i prędkości), więc półkopnięcie łączy się z pierwszym kopnięciem następnego
+        kroku (leapfrog). Krok kosztuje k-1 dodatkowych force_fn zamiast k (0 przy k == 1);
+        prędkość agenta między krokami jest prędkością z połowy tego kopnięcia.
+        """
+        k = self._num_substeps(forces)
+        self.last_substeps = k
+        h = self.dt / k
+
+        for s in range(k):
+            if self.integrator == "verlet":
+                if s > 0:
+                    forces = force_fn()
+                for agent, f in zip(agents, forces):
+                    kick = h if s > 0 else 0.5 * h + self._kick_prev.get(agent, 0.0)
+                    agent.velocity += f * kick
+                    agent.position += agent.velocity * h
+                if s == k - 1:
+                    for agent in agents:
+                        self._kick_next[agent] = 0.5 * h
+            else:
+                if s > 0:
+                    forces = force_fn()
+                for agent, f in zip(agents, forces):
+                    agent.velocity += f * h
+                    agent.position += agent.velocity * h
+
+    def _update_agents_domains(self, sources, qm):
+        """Fizyka w procesach roboczych (pasy sklepu); logika ścieżek zostaje tutaj."""
+        kinematic = [qm is not None and qm.is_kinematic(a) for a in sources]
+        receivers = [
+            bool(a.active) and not a.is_waiting and not kin
+            for a, kin in zip(sources, kinematic)
+        ]
+        self.domains.step(sources, receivers, self.dt)
+
+        for agent, is_kinematic, is_receiver in zip(sources, kinematic, receivers):
+            if not getattr(agent, "active", True):
+                continue
+
+            if self._parked(agent):
+                continue
+
+            if is_kinematic:
+                agent.move_kinematic(self.dt)
+                continue
+
+            if is_receiver:
+                agent.advance_path()  # pozycję i prędkość scałkował proces roboczy
+            else:
+                agent.update(np.zeros(2), self.dt)  # czekanie (wygaszanie prędkości)
+
+            if hasattr(self.env, "keep_agent_out_of_cashiers"):
+                self.env.keep_agent_out_of_cashiers(agent)
+
+    def close(self):
+        """Zamyka procesy robocze (dekompozycja na pasy), pulę wątków modelu sił i dziennik zdarzeń."""
+        if self.domains is not None:
+            self.domains.close()
+            self.domains = None
+        close_model = getattr(self.env.model, "close", None)
+        if close_model is not None:
+            close_model()
+        event_log = getattr(self.env, "event_log", None)
+        if event_log is not None:
+            event_log.close()
 
+    def run(self, duration, on_before_remove=None):
+        """Uruchamia symulację bez okna (headless) przez `duration` sekund czasu symulacji."""
+        end_time = self.current_time + duration
+        while self.current_time < end_time - 1e-9:
+            self.update(on_before_remove=on_before_remove, max_span=end_time - self.current_time)
@@ -1,5 +1,11 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 
+import NumbaKernels
+from CellList import CellList
+
 
 class SocialForceModel:
     """
@@ -49,6 +55,33 @@ class SocialForceModel:
         self.desired_speed = params.get("desired_speed", 1.2)  # m/s
         self.relax_time = params.get("tau", 0.5)  # Agent reaction time
 
+        # Batched (NumPy) kernel options:
+        #   kernel: "agent" = per-agent compute_force loop,
+        #           "scalar" = the same loop on plain floats (no NumPy temporaries),
+        #           "batched" = compute_forces,
+        #           "numba" = compute_forces with JIT-compiled pair/wall loops
+        #           (falls back to "batched" when numba is not installed)
+        #   cutoff: agent-agent interaction radius for the cell list (None = all pairs)
+        #   threads: >1 splits receivers into spatial chunks on a thread pool
+        #   symmetric_pairs: batched kernel evaluates each unordered pair once
+        #                    and applies +f / -f (single-threaded NumPy path)
+        self.kernel = params.get("kernel", "agent")
+        self.cutoff = params.get("cutoff", None)
+        self.threads = int(params.get("threads", 1))
+        self.symmetric_pairs = bool(params.get("symmetric_pairs", True))
+        self.parallel_min_agents = int(params.get("parallel_min_agents", 64))
+        if self.threads > 1 and self.kernel == "agent":
+            self.kernel = "batched"
+        if self.kernel == "numba" and not NumbaKernels.NUMBA_AVAILABLE:
+            print("[SFM] numba niedostępna – używam kernel='batched' (NumPy)")
+            self.kernel = "batched"
+
+        self._pool = None
+        self._walls_key = None
+        self._walls_arr = None
+        self._walls_tuples = None
+        self._state = None  # (agents, state) gathered by the last compute_forces, reused by integrate
+
     def compute_force(self, agent, agents, walls, cashiers=None):
         """
         Compute the total force acting on an agent from all sources.
@@ -75,6 +108,9 @@ class SocialForceModel:
         if getattr(agent, "is_waiting", False):
             return np.zeros(2, dtype=float)
 
+        if self.kernel == "scalar":
+            return self._compute_force_scalar(agent, agents, walls)
+
         if cashiers is None:
             cashiers = []
         f_goal = self._force_to_goal(agent)
@@ -218,5 +254,386 @@ class SocialForceModel:
                 force += 200 * overlap * n_iw  # Contact force
                 
         return force
-    
 
+    # Scalar fast path (per agent, plain floats):
+
+    def _compute_force_scalar(self, agent, agents, walls):
+        """
+        Same force as compute_force, computed with Python floats and math.exp/hypot.
+
+        For small crowds the NumPy version is dominated by creating tiny arrays
+        (np.zeros(2), np.array(p1), np.clip on scalars, norm of 2-vectors);
+        here everything is accumulated in local floats and only the result
+        becomes an array.
+
+        Returns:
+            np.array: New [fx, fy] array (owned by the caller)
+        """
+        px, py = agent.position.tolist()
+        vx, vy = agent.velocity.tolist()
+        radius = agent.radius
+
+        # Goal-directed force
+        fx = -vx
+        fy = -vy
+        if agent.goal is not None and agent.active:
+            gx = float(agent.goal[0]) - px
+            gy = float(agent.goal[1]) - py
+            norm = math.hypot(gx, gy)
+            if norm > 1e-6:
+                fx += gx / norm * self.desired_speed
+                fy += gy / norm * self.desired_speed
+        fx /= self.relax_time
+        fy /= self.relax_time
+
+        # People repulsion
+        A, B = self.A, self.B
+        for other in agents:
+            if other is agent or not other.active:
+                continue
+            ox, oy = other.position.tolist()
+            dx = px - ox
+            dy = py - oy
+            dist = math.hypot(dx, dy)
+            if dist == 0:
+                # Same point: push apart slightly (same draws as np.random.rand(2))
+                dx = np.random.random() * 0.01
+                dy = np.random.random() * 0.01
+                dist = math.hypot(dx, dy)
+
+            overlap = radius + other.radius - dist
+            mag = A * math.exp(overlap / B)
+            if overlap > 0:
+                mag += 200 * overlap  # "Body force" during collision
+            fx += mag * dx / dist
+            fy += mag * dy / dist
+
+        # Wall repulsion
+        A_w, B_w = self.A_w, self.B_w
+        for x1, y1, ux, uy, length in self._wall_tuples(walls):
+            proj = (px - x1) * ux + (py - y1) * uy
+            if proj < 0.0:
+                proj = 0.0
+            elif proj > length:
+                proj = length
+            dx = px - (x1 + proj * ux)
+            dy = py - (y1 + proj * uy)
+            dist = math.hypot(dx, dy)
+            if dist == 0:
+                continue  # Agent exactly on wall
+
+            overlap = radius - dist
+            mag = A_w * math.exp(overlap / B_w)
+            if overlap > 0:
+                mag += 200 * overlap  # Contact force
+            fx += mag * dx / dist
+            fy += mag * dy / dist
+
+        # Damping
+        fx -= 0.2 * vx
+        fy -= 0.2 * vy
+
+        return np.array((fx, fy))
+
+    def _wall_tuples(self, walls):
+        """Walls as (x1, y1, unit_x, unit_y, length) float tuples, cached like _wall_array."""
+        arr = self._wall_array(walls)
+        if self._walls_tuples is None or self._walls_tuples[0] is not arr:
+            length = np.hypot(arr[:, 2] - arr[:, 0], arr[:, 3] - arr[:, 1])
+            ux = (arr[:, 2] - arr[:, 0]) / length
+            uy = (arr[:, 3] - arr[:, 1]) / length
+            tuples = list(zip(arr[:, 0].tolist(), arr[:, 1].tolist(), ux.tolist(), uy.tolist(), length.tolist()))
+            self._walls_tuples = (arr, tuples)
+        return self._walls_tuples[1]
+
+    # Batched kernel (all agents at once, NumPy):
+
+    def compute_forces(self, agents, walls, receivers=None):
+        """
+        Compute total forces for many agents at once from a common snapshot.
+
+        Same force terms as compute_force (goal, people, walls, damping,
+        200×overlap body force), but evaluated with array operations. All
+        forces are taken from positions at the start of the step, unlike the
+        per-agent loop where later agents see already-moved neighbors.
+
+        Args:
+            agents (list): All agents in the environment (force sources)
+            walls (list): Wall segments as ((x1,y1), (x2,y2)) tuples
+            receivers (np.array, optional): Boolean mask over `agents`
+                selecting who gets a force (default: everyone)
+
+        Returns:
+            np.array: (N, 2) forces, zero rows for non-receivers, inactive
+            and waiting agents
+        """
+        n = len(agents)
+        forces = np.zeros((n, 2))
+        if n == 0:
+            return forces
+
+        state = self._gather_state(agents)
+        self._state = (agents, state)
+        recv_mask = state["active"] & ~state["waiting"]
+        if receivers is not None:
+            recv_mask &= np.asarray(receivers, dtype=bool)
+        recv = np.flatnonzero(recv_mask)
+        if len(recv) == 0:
+            return forces
+
+        walls_arr = self._wall_array(walls)
+
+        cells = None
+        if self.cutoff is not None:
+            cells = CellList(state["pos"], self.cutoff, mask=state["active"])
+
+        if self.threads > 1 and len(recv) >= self.parallel_min_agents:
+            chunks = self._spatial_chunks(state["pos"], recv, cells)
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.threads)
+            futures = [
+                self._pool.submit(self._forces_chunk, state, chunk, walls_arr, cells, forces)
+                for chunk in chunks
+            ]
+            for fut in futures:
+                fut.result()  # re-raise worker exceptions
+        elif self.symmetric_pairs and self.kernel == "batched":
+            f_people = self._people_forces_symmetric(state, recv_mask, cells)
+            self._forces_chunk(state, recv, walls_arr, cells, forces, f_people=f_people[recv])
+        else:
+            self._forces_chunk(state, recv, walls_arr, cells, forces)
+
+        return forces
+
+    def close(self):
+        """Shut down the thread pool used by compute_forces (threads > 1); safe to call again."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _gather_state(self, agents):
+        """Copy agent attributes into arrays (one pass over the agent list)."""
+        pos = np.array([a.position for a in agents], dtype=float)
+        vel = np.array([a.velocity for a in agents], dtype=float)
+        radius = np.array([a.radius for a in agents], dtype=float)
+        active = np.array([bool(a.active) for a in agents])
+        waiting = np.array([bool(getattr(a, "is_waiting", False)) for a in agents])
+        goal = np.array([a.goal if a.goal is not None else a.position for a in agents], dtype=float)
+        has_goal = np.array([a.goal is not None for a in agents])
+        return {
+            "pos": pos, "vel": vel, "radius": radius, "active": active,
+            "waiting": waiting, "goal": goal, "has_goal": has_goal,
+        }
+
+    def _wall_array(self, walls):
+        """Cache walls as an (S, 4) array [x1, y1, x2, y2] (walls are static)."""
+        key = (id(walls), len(walls))
+        if key != self._walls_key:
+            arr = np.array([(p1[0], p1[1], p2[0], p2[1]) for (p1, p2) in walls], dtype=float).reshape(-1, 4)
+            length = np.hypot(arr[:, 2] - arr[:, 0], arr[:, 3] - arr[:, 1])
+            self._walls_arr = arr[length > 0]  # skip zero-length walls
+            self._walls_key = key
+        return self._walls_arr
+
+    def _spatial_chunks(self, pos, recv, cells):
+        """
+        Split receivers into spatially coherent chunks (bands of cell-list rows),
+        one per thread, cutting only at row boundaries.
+        """
+        if cells is not None:
+            rows = cells.rows_of(recv)
+        else:
+            rows = np.floor(pos[recv, 1]).astype(np.int64)
+
+        order = np.argsort(rows, kind="stable")
+        recv_sorted = recv[order]
+        row_starts = np.flatnonzero(np.diff(rows[order])) + 1
+        if len(row_starts) == 0:
+            return [recv_sorted]
+
+        targets = np.linspace(0, len(recv_sorted), self.threads + 1)[1:-1]
+        cuts = row_starts[np.clip(np.searchsorted(row_starts, targets), 0, len(row_starts) - 1)]
+        return [c for c in np.split(recv_sorted, np.unique(cuts)) if len(c)]
+
+    def _forces_chunk(self, state, idx, walls_arr, cells, out, f_people=None):
+        """
+        Total force for receivers `idx`; writes rows of `out` in place.
+        `f_people` (rows for `idx`) skips the people term when it is already known.
+        """
+        pos = state["pos"][idx]
+        vel = state["vel"][idx]
+
+        # Goal-directed force (desired_direction without the per-agent calls)
+        dir_vec = state["goal"][idx] - pos
+        norm = np.hypot(dir_vec[:, 0], dir_vec[:, 1])
+        ok = state["has_goal"][idx] & (norm > 1e-6)
+        desired_dir = np.zeros_like(dir_vec)
+        desired_dir[ok] = dir_vec[ok] / norm[ok, None]
+        f_goal = (desired_dir * self.desired_speed - vel) / self.relax_time
+
+        if self.kernel == "numba":
+            f_people, f_walls = self._people_wall_forces_numba(state, idx, walls_arr, cells)
+        else:
+            if f_people is None:
+                f_people = self._people_forces_batched(state, idx, cells)
+            f_walls = self._wall_forces_batched(pos, state["radius"][idx], walls_arr)
+        f_damping = -0.2 * vel
+
+        out[idx] = f_goal + f_people + f_walls + f_damping
+
+    def _people_forces_batched(self, state, idx, cells):
+        """Agent-agent repulsion for receivers `idx` (all pairs or cell list with cutoff)."""
+        all_pos = state["pos"]
+        radius = state["radius"]
+        k = len(idx)
+
+        if cells is None:
+            # Dense: receivers × all active agents
+            i = np.repeat(np.arange(k), len(all_pos))
+            j = np.tile(np.arange(len(all_pos)), k)
+            valid = state["active"][j] & (idx[i] != j)
+            i, j = i[valid], j[valid]
+            d_vec = all_pos[idx[i]] - all_pos[j]
+            dist = np.hypot(d_vec[:, 0], d_vec[:, 1])
+            gi = idx[i]
+        else:
+            gi, j, d_vec, dist = cells.pairs_within(idx, self.cutoff)
+            # map global receiver index -> row in this chunk
+            row_of = np.full(len(all_pos), -1, dtype=np.int64)
+            row_of[idx] = np.arange(k)
+            i = row_of[gi]
+
+        zero = dist == 0
+        if np.any(zero):
+            # Same point: push apart slightly in a random direction
+            d_vec[zero] = np.random.rand(int(zero.sum()), 2) * 0.01
+            dist[zero] = np.hypot(d_vec[zero, 0], d_vec[zero, 1])
+
+        n_ij = d_vec / dist[:, None]
+        overlap = radius[gi] + radius[j] - dist
+        mag = self.A * np.exp(overlap / self.B) + 200 * np.maximum(overlap, 0.0)
+
+        f = np.zeros((k, 2))
+        f[:, 0] = np.bincount(i, weights=mag * n_ij[:, 0], minlength=k)
+        f[:, 1] = np.bincount(i, weights=mag * n_ij[:, 1], minlength=k)
+        return f
+
+    def _people_forces_symmetric(self, state, recv_mask, cells):
+        """
+        Agent-agent repulsion visiting each unordered pair once (Newton's third law).
+
+        The pair force depends only on the distance and r_i + r_j, so the force
+        on j is minus the force on i: it is evaluated once and scattered as +f
+        to i and -f to j (only to agents in `recv_mask`).
+
+        Returns:
+            np.array: (N, 2) forces over all agents (rows outside recv_mask are zero)
+        """
+        all_pos = state["pos"]
+        radius = state["radius"]
+        n = len(all_pos)
+
+        if cells is None:
+            act = np.flatnonzero(state["active"])
+            iu, ju = np.triu_indices(len(act), 1)
+            i, j = act[iu], act[ju]
+            keep = recv_mask[i] | recv_mask[j]
+            i, j = i[keep], j[keep]
+            d_vec = all_pos[i] - all_pos[j]
+            dist = np.hypot(d_vec[:, 0], d_vec[:, 1])
+        else:
+            i, j, d_vec, dist = cells.unique_pairs_within(self.cutoff)
+            keep = recv_mask[i] | recv_mask[j]
+            i, j, d_vec, dist = i[keep], j[keep], d_vec[keep], dist[keep]
+
+        zero = dist == 0
+        if np.any(zero):
+            # Same point: push the pair apart slightly in a random direction
+            d_vec[zero] = np.random.rand(int(zero.sum()), 2) * 0.01
+            dist[zero] = np.hypot(d_vec[zero, 0], d_vec[zero, 1])
+
+        overlap = radius[i] + radius[j] - dist
+        mag = self.A * np.exp(overlap / self.B) + 200 * np.maximum(overlap, 0.0)
+        fx = mag * d_vec[:, 0] / dist
+        fy = mag * d_vec[:, 1] / dist
+
+        f = np.zeros((n, 2))
+        f[:, 0] = np.bincount(i, weights=fx, minlength=n) - np.bincount(j, weights=fx, minlength=n)
+        f[:, 1] = np.bincount(i, weights=fy, minlength=n) - np.bincount(j, weights=fy, minlength=n)
+        f[~recv_mask] = 0.0
+        return f
+
+    def _wall_forces_batched(self, pos, radius, walls_arr):
+        """Wall repulsion for positions `pos` (receivers × wall segments)."""
+        if len(walls_arr) == 0:
+            return np.zeros((len(pos), 2))
+
+        p1 = walls_arr[:, 0:2]
+        wall_vec = walls_arr[:, 2:4] - p1
+        wall_length = np.hypot(wall_vec[:, 0], wall_vec[:, 1])
+        wall_dir = wall_vec / wall_length[:, None]
+
+        diff = pos[:, None, :] - p1[None, :, :]                      # (k, S, 2)
+        proj = np.einsum("ksd,sd->ks", diff, wall_dir)
+        proj = np.clip(proj, 0.0, wall_length[None, :])
+        closest = p1[None, :, :] + proj[:, :, None] * wall_dir[None, :, :]
+
+        d_vec = pos[:, None, :] - closest
+        dist = np.hypot(d_vec[..., 0], d_vec[..., 1])
+        on_wall = dist == 0
+        dist_safe = np.where(on_wall, 1.0, dist)
+        n_iw = d_vec / dist_safe[..., None]
+
+        overlap = radius[:, None] - dist
+        mag = self.A_w * np.exp(overlap / self.B_w) + 200 * np.maximum(overlap, 0.0)
+        mag = np.where(on_wall, 0.0, mag)  # agent exactly on wall: skipped
+        return np.einsum("ks,ksd->kd", mag, n_iw)
+
+    def _people_wall_forces_numba(self, state, idx, walls_arr, cells):
+        """Agent-agent and wall repulsion for receivers `idx` with the JIT loops."""
+        pos = state["pos"]
+        radius = state["radius"]
+        idx = np.ascontiguousarray(idx, dtype=np.int64)
+        # The kernels' np.random has its own state; derive it from NumPy's so that
+        # np.random.seed (e.g. per worker step) also fixes the overlap jitter
+        NumbaKernels.seed(np.random.randint(2 ** 31))
+
+        f_people = np.zeros((len(idx), 2))
+        if cells is None:
+            NumbaKernels.people_forces_dense(pos, radius, state["active"], idx, self.A, self.B, f_people)
+        else:
+            NumbaKernels.people_forces_cells(
+                cells.positions, radius, idx, cells._sorted_keys, cells._sorted_idx,
+                float(cells.origin[0]), float(cells.origin[1]), cells.cell_size,
+                cells.ncols, cells.nrows, float(self.cutoff), self.A, self.B, f_people,
+            )
+
+        f_walls = np.zeros((len(idx), 2))
+        NumbaKernels.wall_forces(pos, radius, idx, walls_arr, self.A_w, self.B_w, f_walls)
+        return f_people, f_walls
+
+    def integrate(self, agents, forces, mask, dt):
+        """
+        Semi-implicit Euler (as in Agent.update) for agents selected by `mask`,
+        done on arrays with the JIT kernel.
+
+        Works on the position/velocity arrays already gathered by compute_forces
+        for the same `agents` list (gathered again otherwise), so no extra pass
+        over the agents is needed. Nothing is written to the agents here: the
+        caller assigns the returned rows in its own per-agent loop (together with
+        advance_path).
+
+        Returns:
+            tuple: (pos, vel) arrays of shape (N, 2); pos is float32 like Agent.position
+        """
+        if self._state is not None and self._state[0] is agents:
+            state = self._state[1]
+        else:
+            state = self._gather_state(agents)
+        self._state = None
+        pos = state["pos"]
+        vel = state["vel"]
+        idx = np.flatnonzero(mask).astype(np.int64)
+        if len(idx):
+            NumbaKernels.integrate_euler(pos, vel, np.asarray(forces, dtype=float), idx, dt)
+        return pos.astype(np.float32), vel
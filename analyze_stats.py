@@ -5,6 +5,8 @@ import csv
 import numpy as np
 import matplotlib.pyplot as plt
 
+from stats.columnar import load_table
+
 
 def _read_csv(path):
     with open(path, "r", encoding="utf-8") as f:
@@ -33,20 +35,24 @@ def main():
     if stats_dir is None:
         raise SystemExit("No stats_output found.")
 
-    frames_path = os.path.join(stats_dir, "stats_frames.csv")
-    agents_path = os.path.join(stats_dir, "stats_agents.csv")
     heat_npy = os.path.join(stats_dir, "stats_heatmap.npy")
 
     out_dir = args.out or stats_dir
     os.makedirs(out_dir, exist_ok=True)
 
-    frames = _read_csv(frames_path)
-    t = np.array([float(r["time"]) for r in frames])
-    queue_len = np.array([float(r.get("queue_len", 0)) for r in frames])
-    entry_rate = np.array([float(r.get("entry_rate_s", 0)) * 60.0 for r in frames])
-    exit_rate = np.array([float(r.get("exit_rate_s", 0)) * 60.0 for r in frames])
-    inside = np.array([float(r.get("inside_est", 0)) for r in frames])
-    density = np.array([float(r.get("density_store", 0)) for r in frames])
+    # stats_frames.npy / .parquet / .csv (columnar formats load without parsing)
+    frames = load_table(stats_dir, "frames")
+    t = np.asarray(frames["time"], dtype=float)
+    zeros = np.zeros_like(t)
+
+    def col(name):
+        return np.asarray(frames[name], dtype=float) if name in frames else zeros
+
+    queue_len = col("queue_len")
+    entry_rate = col("entry_rate_s") * 60.0
+    exit_rate = col("exit_rate_s") * 60.0
+    inside = col("inside_est")
+    density = col("density_store")
 
     real = None
     if args.real_csv and os.path.isfile(args.real_csv):
@@ -78,15 +84,14 @@ def main():
     plot_series(inside, "Inside (estimated) over time", "people", "inside.png")
     plot_series(density, "Store density over time", "people/m^2", "density.png")
 
-    if os.path.isfile(agents_path):
-        agents = _read_csv(agents_path)
-        tt = []
-        for r in agents:
-            v = r.get("travel_time", "")
-            if v is None or v == "" or v == "None":
-                continue
-            tt.append(float(v))
-        if tt:
+    try:
+        agents = load_table(stats_dir, "agents")
+    except FileNotFoundError:
+        agents = None
+    if agents is not None and "travel_time" in agents:
+        tt = np.asarray(agents["travel_time"], dtype=float)
+        tt = tt[~np.isnan(tt)]
+        if len(tt):
             plt.figure()
             plt.hist(tt, bins=30)
             plt.title("Travel time distribution")
@@ -0,0 +1,126 @@
+import argparse
+import copy
+import csv
+import random
+import time
+
+import numpy as np
+
+from Config4 import CONFIG
+from Environment import Environment
+from Simulation import Simulation
+
+
+class _TrajectoryProbe:
+    """Zapisuje pozycje agentów (po stabilnym agent.id) co `every` kroków."""
+
+    def __init__(self, every=10):
+        self.every = max(1, int(every))
+        self.step = 0
+        self.positions = {}  # (id, nr próbki) -> (x, y)
+        self.spawn = {}
+        self.exit = {}
+
+    def __call__(self, dt, t, agents, env):
+        sample = self.step % self.every == 0
+        for agent in agents:
+            self.spawn.setdefault(agent.id, t)
+            if agent.exited:
+                self.exit.setdefault(agent.id, t)
+            elif sample and agent.active:
+                self.positions[(agent.id, self.step)] = (float(agent.position[0]), float(agent.position[1]))
+        self.step += 1
+
+
+def _config_for(backend, kernel):
+    cfg = copy.deepcopy(CONFIG)
+    cfg["sfm"]["backend"] = backend
+    if kernel is not None:
+        cfg["sfm"]["kernel"] = kernel
+    return cfg
+
+
+def run_engine(backend, kernel, duration, seed, every):
+    random.seed(seed)
+    np.random.seed(seed)
+    cfg = _config_for(backend, kernel)
+    env = Environment(cfg)
+    sim = Simulation(env, cfg)
+    probe = _TrajectoryProbe(every)
+
+    t0 = time.perf_counter()
+    sim.run(duration, on_before_remove=probe)
+    wall = time.perf_counter() - t0
+    sim.close()
+
+    trips = [probe.exit[k] - probe.spawn[k] for k in probe.exit if k in probe.spawn]
+    return {
+        "wall_s": wall,
+        "ms_per_step": wall / max(probe.step, 1) * 1e3,
+        "agents": len(probe.spawn),
+        "exits": len(probe.exit),
+        "mean_trip_s": float(np.mean(trips)) if trips else 0.0,
+    }, probe
+
+
+def trajectory_difference(ref, other):
+    """Odchylenie pozycji tych samych agentów (id) w tych samych krokach: średnie, p90, max [m]."""
+    common = ref.positions.keys() & other.positions.keys()
+    if not common:
+        return {"samples": 0, "mean_dev_m": 0.0, "p90_dev_m": 0.0, "max_dev_m": 0.0}
+    a = np.array([ref.positions[k] for k in common])
+    b = np.array([other.positions[k] for k in common])
+    dev = np.hypot(a[:, 0] - b[:, 0], a[:, 1] - b[:, 1])
+    return {
+        "samples": len(common),
+        "mean_dev_m": float(dev.mean()),
+        "p90_dev_m": float(np.percentile(dev, 90)),
+        "max_dev_m": float(dev.max()),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare physics backends on Config4: speed and trajectory differences.")
+    ap.add_argument("--duration", type=float, default=300.0, help="Simulated seconds per run")
+    ap.add_argument("--seeds", type=int, nargs="+", default=[1])
+    ap.add_argument("--engines", nargs="+", default=["native:agent", "native:batched", "pysocialforce"],
+                    help="backend[:kernel]; the first one is the reference for trajectory differences")
+    ap.add_argument("--every", type=int, default=10, help="Record positions every N steps")
+    ap.add_argument("--out", default=None, help="Optional CSV with per-run results")
+    args = ap.parse_args()
+
+    rows = []
+    for seed in args.seeds:
+        ref = None
+        for engine in args.engines:
+            backend, _, kernel = engine.partition(":")
+            res, probe = run_engine(backend, kernel or None, args.duration, seed, args.every)
+            if ref is None:
+                ref = probe
+            res.update(trajectory_difference(ref, probe))
+            res.update({"engine": engine, "seed": seed})
+            rows.append(res)
+            print(f"[seed={seed}] {engine:16s} " + "  ".join(
+                f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}"
+                for k, v in res.items() if k not in ("engine", "seed")))
+
+    print("\nMean over seeds:")
+    print(f"{'engine':>16} {'ms/step':>8} {'exits':>6} {'trip_s':>7} {'mean_dev':>9} {'max_dev':>8}")
+    for engine in args.engines:
+        sel = [r for r in rows if r["engine"] == engine]
+        print(f"{engine:>16} {np.mean([r['ms_per_step'] for r in sel]):>8.2f}"
+              f" {np.mean([r['exits'] for r in sel]):>6.1f}"
+              f" {np.mean([r['mean_trip_s'] for r in sel]):>7.1f}"
+              f" {np.mean([r['mean_dev_m'] for r in sel]):>9.3f}"
+              f" {np.max([r['max_dev_m'] for r in sel]):>8.3f}")
+
+    if args.out:
+        with open(args.out, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            w.writeheader()
+            w.writerows(rows)
+        print("Saved:", args.out)
+
+
+if __name__ == "__main__":
+    main()
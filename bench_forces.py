@@ -0,0 +1,72 @@
+import argparse
+import copy
+import random
+import timeit
+
+import numpy as np
+
+from Config4 import CONFIG
+from Environment import Environment
+from Simulation import Simulation
+from SocialForceModel import SocialForceModel
+
+
+def build_scene(n_agents, seed, warmup):
+    """Config4 z n_agents aktywnymi agentami po `warmup` sekundach ruchu."""
+    random.seed(seed)
+    np.random.seed(seed)
+    cfg = copy.deepcopy(CONFIG)
+    cfg["sfm"]["kernel"] = "batched"
+    cfg["agent_generation"]["spawn_rate"] = 0.0
+    env = Environment(cfg)
+    sim = Simulation(env, cfg)
+    # wejścia co 0.5 s, żeby agenci nie startowali z jednego punktu
+    for k in range(n_agents):
+        env.spawn_agent(spawn_time=0.5 * k)
+    sim.run(warmup + 0.5 * n_agents)
+    return env, sim
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-call cost of compute_force: NumPy per-agent vs scalar fast path vs batched.")
+    ap.add_argument("--agents", type=int, nargs="+", default=[5, 10, 20, 40])
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--warmup", type=float, default=5.0, help="Simulated seconds before measuring")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    print(f"{'agents':>6} {'numpy_us':>9} {'scalar_us':>10} {'speedup':>8} {'batched_us':>11} {'max_diff':>9}")
+    for n in args.agents:
+        env, sim = build_scene(n, args.seed, args.warmup)
+        agents = env.agents
+        walls = sim.force_walls
+        movers = [a for a in agents if a.active and not a.is_waiting]
+        if not movers:
+            print(f"{n:>6}  (no moving agents)")
+            continue
+
+        numpy_model = SocialForceModel(dict(CONFIG["sfm"], kernel="agent"))
+        scalar_model = SocialForceModel(dict(CONFIG["sfm"], kernel="scalar"))
+        batched_model = SocialForceModel(dict(CONFIG["sfm"], kernel="batched"))
+
+        max_diff = max(
+            float(np.abs(numpy_model.compute_force(a, agents, walls)
+                         - scalar_model.compute_force(a, agents, walls)).max())
+            for a in movers
+        )
+
+        def loop(model):
+            for a in movers:
+                model.compute_force(a, agents, walls)
+
+        t_numpy = min(timeit.repeat(lambda: loop(numpy_model), number=1, repeat=args.repeat)) / len(movers)
+        t_scalar = min(timeit.repeat(lambda: loop(scalar_model), number=1, repeat=args.repeat)) / len(movers)
+        t_batched = min(timeit.repeat(lambda: batched_model.compute_forces(agents, walls),
+                                      number=1, repeat=args.repeat)) / len(movers)
+
+        print(f"{len(agents):>6} {t_numpy * 1e6:>9.1f} {t_scalar * 1e6:>10.1f} {t_numpy / t_scalar:>7.1f}x"
+              f" {t_batched * 1e6:>11.1f} {max_diff:>9.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import argparse
+import copy
+import csv
+import random
+import time
+
+import numpy as np
+
+from Config4 import CONFIG
+from Environment import Environment
+from Simulation import Simulation
+from CheckoutModel import make_service_sampler, simulate_checkout, erlang_c
+
+
+class _CheckoutProbe:
+    """Śledzi przejścia faz QueueManager: dojście do kas i koniec obsługi (oba modele)."""
+
+    def __init__(self):
+        self.arrival = {}
+        self.service_end = {}
+        self.exit_times = []
+        self.queue_len = []
+
+    def __call__(self, dt, t, agents, env):
+        qm = env.queue_manager
+        for agent, phase in qm.agent_phase.items():
+            key = id(agent)
+            if phase != "shopping" and key not in self.arrival:
+                self.arrival[key] = t
+            if phase in ("to_exit", "exited") and key not in self.service_end:
+                self.service_end[key] = t
+        for agent in agents:
+            if agent.exited:
+                self.exit_times.append(t)
+        self.queue_len.append(len(qm.queue))
+
+    def summary(self, duration):
+        done = [k for k in self.service_end if k in self.arrival]
+        checkout_times = [self.service_end[k] - self.arrival[k] for k in done]
+        return {
+            "arrived": len(self.arrival),
+            "served": len(done),
+            "exits": len(self.exit_times),
+            "exits_per_min": len(self.exit_times) / duration * 60.0,
+            "mean_checkout_s": float(np.mean(checkout_times)) if checkout_times else 0.0,
+            "mean_queue": float(np.mean(self.queue_len)) if self.queue_len else 0.0,
+            "max_queue": int(max(self.queue_len)) if self.queue_len else 0,
+        }
+
+
+def _config_for(model, n_cashiers=None):
+    cfg = copy.deepcopy(CONFIG)
+    cfg.setdefault("checkout", {})["model"] = model
+    if n_cashiers is not None:
+        pts = cfg["environment"]["cash_payment"]
+        cfg["environment"]["cash_payment"] = pts[:n_cashiers]
+    return cfg
+
+
+def run_model(model, duration, seed, n_cashiers=None):
+    random.seed(seed)
+    np.random.seed(seed)
+    cfg = _config_for(model, n_cashiers)
+    env = Environment(cfg)
+    sim = Simulation(env, cfg)
+    probe = _CheckoutProbe()
+
+    t0 = time.perf_counter()
+    sim.run(duration, on_before_remove=probe)
+    wall = time.perf_counter() - t0
+
+    out = probe.summary(duration)
+    out["wall_s"] = wall
+    return out, env
+
+
+def cmd_validate(args):
+    rows = []
+    for seed in args.seeds:
+        for model in ("physical", "analytic"):
+            res, _ = run_model(model, args.duration, seed, args.cashiers)
+            res.update({"model": model, "seed": seed})
+            rows.append(res)
+            print(f"[seed={seed}] {model:9s} " + "  ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}"
+                                                          for k, v in res.items() if k not in ("model", "seed")))
+
+    print("\nMean over seeds:")
+    for model in ("physical", "analytic"):
+        sel = [r for r in rows if r["model"] == model]
+        print(f"  {model:9s} exits/min={np.mean([r['exits_per_min'] for r in sel]):.2f}"
+              f"  checkout_s={np.mean([r['mean_checkout_s'] for r in sel]):.1f}"
+              f"  mean_queue={np.mean([r['mean_queue'] for r in sel]):.2f}"
+              f"  wall_s={np.mean([r['wall_s'] for r in sel]):.1f}")
+
+    if args.out:
+        with open(args.out, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            w.writeheader()
+            w.writerows(rows)
+        print("Saved:", args.out)
+
+
+def cmd_screen(args):
+    if args.arrivals:
+        with open(args.arrivals, "r", encoding="utf-8") as f:
+            arrivals = [float(r["t"]) for r in csv.DictReader(f)]
+    else:
+        # Jeden przebieg hybrydowy daje strumień dojść do kas (niezależny od liczby kas)
+        _, env = run_model("analytic", args.duration, args.seeds[0])
+        arrivals = list(env.queue_manager.arrival_log)
+        print(f"Recorded {len(arrivals)} checkout arrivals from a {args.duration:.0f}s hybrid run")
+
+    if len(arrivals) < 2:
+        raise SystemExit("Not enough arrivals to screen.")
+
+    checkout_conf = CONFIG.get("checkout", {})
+    sampler = make_service_sampler(checkout_conf)
+    lam = (len(arrivals) - 1) / (max(arrivals) - min(arrivals))
+    mu = 1.0 / float(np.mean([sampler() for _ in range(10000)]))
+
+    print(f"\nlambda={lam * 60:.2f}/min  mu={mu * 60:.2f}/min per cashier")
+    print(f"{'cashiers':>8} {'thr/min':>8} {'wait_s':>8} {'p90_s':>8} {'maxQ':>6} {'util':>6} {'ErlangC_Wq':>11}")
+    for c in range(args.min_cashiers, args.max_cashiers + 1):
+        reps = []
+        for r in range(args.reps):
+            random.seed(1000 * c + r)
+            reps.append(simulate_checkout(arrivals, c, sampler, walk_time=args.walk_time))
+        _, wq = erlang_c(lam, mu, c)
+        print(f"{c:>8} {np.mean([x['throughput_per_min'] for x in reps]):>8.2f}"
+              f" {np.mean([x['mean_wait'] for x in reps]):>8.1f}"
+              f" {np.mean([x['p90_wait'] for x in reps]):>8.1f}"
+              f" {np.mean([x['max_queue'] for x in reps]):>6.1f}"
+              f" {np.mean([x['utilization'] for x in reps]):>6.2f}"
+              f" {wq:>11.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Checkout what-if: validate the hybrid model and screen cashier counts (Config4).")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    v = sub.add_parser("validate", help="Run full physics vs hybrid checkout on Config4 and compare throughput")
+    v.add_argument("--duration", type=float, default=900.0, help="Simulated seconds per run")
+    v.add_argument("--seeds", type=int, nargs="+", default=[1, 2])
+    v.add_argument("--cashiers", type=int, default=None, help="Use only the first N cash_payment points")
+    v.add_argument("--out", default=None, help="Optional CSV with per-run results")
+    v.set_defaults(func=cmd_validate)
+
+    s = sub.add_parser("screen", help="Screen cashier counts with the discrete-event checkout model")
+    s.add_argument("--arrivals", default=None, help="CSV with column 't' (checkout arrival times); default: record from a hybrid run")
+    s.add_argument("--duration", type=float, default=1800.0, help="Simulated seconds of the hybrid run used to record arrivals")
+    s.add_argument("--seeds", type=int, nargs="+", default=[1])
+    s.add_argument("--min_cashiers", type=int, default=1)
+    s.add_argument("--max_cashiers", type=int, default=10)
+    s.add_argument("--reps", type=int, default=20)
+    s.add_argument("--walk_time", type=float, default=2.0, help="Seconds from queue head to cashier (cashier reserved meanwhile)")
+    s.set_defaults(func=cmd_screen)
+
+    args = ap.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+import os
+import traceback
+
 import pygame
 
 from Config4 import CONFIG
@@ -5,7 +8,7 @@ from Environment import Environment
 from Simulation import Simulation
 from Visualization import Visualization
 
-from stats import StatsGeometry, StatsManager, StatsWriter, StatsHUD
+from stats import StatsGeometry, StatsManager, StatsWriter, StatsHUD, TrajectoryRecorder
 
 
 def main():
@@ -22,11 +25,47 @@ def main():
     vis = Visualization(env)
 
     # Stats (CSV + heatmap + live HUD)
-    writer = StatsWriter()
+    stats_conf = CONFIG.get("stats", {})
+    writer = StatsWriter(
+        flush_rows=stats_conf.get("flush_rows", 1000),
+        flush_interval=stats_conf.get("flush_interval", 2.0),
+        background=stats_conf.get("background", True),
+        fmt=stats_conf.get("format", "csv"),
+        chunk_rows=stats_conf.get("chunk_rows", 65536),
+    )
     geom = StatsGeometry.from_environment(env)
-    stats = StatsManager(geom, writer)
+    stats = StatsManager(
+        geom,
+        writer,
+        pressure_every=stats_conf.get("pressure_every", 1),
+        pressure_cell=stats_conf.get("pressure_cell"),
+        pressure_sigma=stats_conf.get("pressure_sigma", 0.7),
+        exposure_radii=stats_conf.get("exposure_radii", ()),
+    )
     hud = StatsHUD(font=font, small_font=small_font)
 
+    # Opcjonalny zapis pełnych trajektorii (do odtwarzania i analiz offline)
+    traj_conf = CONFIG.get("trajectory", {})
+    recorder = None
+    if traj_conf.get("enabled", False):
+        recorder = TrajectoryRecorder(
+            os.path.join(writer.base_dir, "trajectory"),
+            chunk_steps=traj_conf.get("chunk_steps", 200),
+            encoding=traj_conf.get("encoding", "delta"),
+            precision=traj_conf.get("precision", 0.001),
+            compression=traj_conf.get("compression", "zlib"),
+            meta={"config": "Config4", "dt": CONFIG["dt"]},
+        )
+
+    # Dziennik zdarzeń domyślnie obok statystyk
+    if env.event_log is not None and env.event_log.path is None:
+        env.event_log.open(os.path.join(writer.base_dir, "events.bin"))
+
+    def on_before_remove(dt, t, agents, env):
+        stats.update(dt, t, agents, env)
+        if recorder is not None:
+            recorder(dt, t, agents, env)
+
     running = True
     paused = False
     target_fps = 30
@@ -43,7 +82,7 @@ def main():
                         paused = not paused
 
                     # HUD toggles
-                    elif event.key in (pygame.K_F1, pygame.K_g, pygame.K_h):
+                    elif event.key in (pygame.K_F1, pygame.K_g, pygame.K_h, pygame.K_p):
                         hud.handle_key(event.key)
 
                     # Speed control
@@ -55,7 +94,7 @@ def main():
                         print(f"Prędkość zmniejszona: {target_fps} FPS")
 
             if not paused:
-                sim.update(on_before_remove=stats.update)
+                sim.update(on_before_remove=on_before_remove)
 
             # Draw scene without flipping; we will overlay HUD and then flip once.
             vis.draw(flip=False)
@@ -74,12 +113,23 @@ def main():
             clock.tick(target_fps)
 
     finally:
+        # Close each resource on its own, so one failing does not skip the others
         try:
-            stats.close()
-            print("Stats saved to:", writer.base_dir)
-        except Exception:
-            pass
-        pygame.quit()
+            if recorder is not None:
+                recorder.close()
+        finally:
+            try:
+                stats.close()
+                print("Stats saved to:", writer.base_dir)
+            except Exception:
+                # e.g. RuntimeError("StatsWriter background thread failed"): rows were lost
+                print("Saving stats failed:")
+                traceback.print_exc()
+            finally:
+                try:
+                    sim.close()
+                finally:
+                    pygame.quit()
 
 
 if __name__ == "__main__":
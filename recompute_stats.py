@@ -0,0 +1,67 @@
+import argparse
+import importlib
+import json
+import os
+import time
+
+from Environment import Environment
+from stats import StatsGeometry, StatsWriter
+from stats.offline import recompute_stats, with_zones
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Recompute stats_frames / stats_agents / heatmap from a trajectory recording (no physics). "
+                    "Values match the live run only up to the recording precision (positions rounded "
+                    "to 1 mm in delta mode), so edge-of-zone counts and pressure can differ slightly."
+    )
+    ap.add_argument("recording", help="Trajectory folder written by TrajectoryRecorder")
+    ap.add_argument("--out", default=None, help="Output folder (default: <recording>/../recomputed)")
+    ap.add_argument("--config", default=None, help="Config module with the store layout (default: from the recording)")
+    ap.add_argument("--format", default="npy", choices=("csv", "npy", "parquet"))
+    ap.add_argument("--idle_speed_thresh", type=float, default=0.05, help="Speed below which an agent counts as idle [m/s]")
+    ap.add_argument("--street_width", type=float, default=3.0)
+    ap.add_argument("--heat_cell", type=float, default=0.25, help="Heatmap cell size [m]")
+    ap.add_argument("--pressure_sigma", type=float, default=0.7, help="Crowd pressure kernel width [m]")
+    ap.add_argument("--exposure_radii", type=float, nargs="*", default=[],
+                    help="Contact radii [m] for pairwise exposure, e.g. --exposure_radii 1.0 1.5")
+    ap.add_argument("--zones", default=None,
+                    help='JSON (or a path to a JSON file) overriding zones, e.g. \'{"vestibule": [0, 9, 3, 12]}\'')
+    ap.add_argument("--t0", type=float, default=None, help="First recorded time to use [s]")
+    ap.add_argument("--t1", type=float, default=None, help="Last recorded time to use [s]")
+    ap.add_argument("--no_plots", action="store_true", help="Skip PNG plots (faster)")
+    args = ap.parse_args()
+
+    with open(os.path.join(args.recording, "trajectory_meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    config = importlib.import_module(args.config or meta.get("config", "Config4")).CONFIG
+
+    # Geometria stref jak w symulacji (Environment tylko do odczytu układu sklepu)
+    env = Environment(config)
+    geom = StatsGeometry.from_environment(env, street_width=args.street_width, heat_cell=args.heat_cell)
+    if args.zones:
+        text = args.zones
+        if os.path.isfile(text):
+            with open(text, "r", encoding="utf-8") as f:
+                text = f.read()
+        geom = with_zones(geom, json.loads(text))
+
+    out = args.out or os.path.join(os.path.dirname(os.path.abspath(args.recording)), "recomputed")
+    writer = StatsWriter(out, fmt=args.format, background=False)
+
+    t = time.perf_counter()
+    stats = recompute_stats(args.recording, geom, writer, t0=args.t0, t1=args.t1,
+                            plots=not args.no_plots, idle_speed_thresh=args.idle_speed_thresh,
+                            pressure_sigma=args.pressure_sigma, exposure_radii=args.exposure_radii)
+    wall = time.perf_counter() - t
+
+    sim_span = float(stats.last_frame.get("time", 0.0))
+    print(f"Recomputed {sim_span:.0f}s of simulation in {wall:.2f}s"
+          f" (x{sim_span / max(wall, 1e-9):.0f} real time)")
+    print(f"entered={stats.entries_total} exited={stats.exits_total}"
+          f" shopping_median_min={stats.last_frame.get('shopping_median_min')}")
+    print("Saved to:", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import argparse
+import glob
+import importlib
+import os
+
+import numpy as np
+import pygame
+
+from Environment import Environment
+from Visualization import Visualization
+from stats import StatsGeometry, StatsHUD, StatsManager, TrajectoryReader
+from stats.trajectory import FLAG_ACTIVE, FLAG_EXITED, FLAG_PARKED, FLAG_RESERVED, FLAG_WAITING, PHASES
+
+
+class _NullWriter:
+    """StatsManager w odtwarzaniu liczy tylko HUD – nic nie zapisuje."""
+
+    base_dir = None
+
+    def write_frame(self, row):
+        pass
+
+    def write_agent(self, row):
+        pass
+
+
+class _ReplayAgent:
+    """Agent z nagrania: tylko pola czytane przez Visualization i QueueManager.agent_phase."""
+
+    def __init__(self, aid, radius, spawn_time):
+        self.id = aid
+        self.radius = radius
+        self.spawn_time = spawn_time
+        self.position = np.zeros(2)
+        self.velocity = np.zeros(2)
+        self.active = True
+        self.is_waiting = False
+        self.exited = False
+        self.parked = False
+        self.path = None
+
+
+class ReplayScene:
+    """
+    Podmienia agentów w Environment na agentów z nagrania (bez fizyki).
+    Environment jest budowany z tej samej konfiguracji co nagrany przebieg,
+    więc ściany, półki i kasy rysują się tak jak w symulacji. Kolejka (w nagranej
+    kolejności, także agenci idący na swoje miejsce) i zajęcie/rezerwacje kas są
+    odtwarzane z pól queue_slot/cashier nagrania (starsze nagrania ich nie mają –
+    wtedy kolejka i kasy zostają puste).
+    """
+
+    def __init__(self, env):
+        self.env = env
+        self._proxies = {}
+
+    def show(self, frame):
+        proxies = {}
+        agents = []
+        phase_map = {}
+        queue = []  # (miejsce w kolejce, agent)
+        qm = self.env.queue_manager
+        for c in qm.cashiers:
+            c["agent"] = None
+            c["reserved_by"] = None
+        for k, aid in enumerate(frame.ids.tolist()):
+            a = self._proxies.get(aid)
+            if a is None:
+                a = _ReplayAgent(aid, float(frame.radius[k]), float(frame.spawn_time[k]))
+            flags = int(frame.flags[k])
+            a.position = frame.pos[k]
+            a.velocity = frame.vel[k]
+            a.active = bool(flags & FLAG_ACTIVE)
+            a.is_waiting = bool(flags & FLAG_WAITING)
+            a.exited = bool(flags & FLAG_EXITED)
+            a.parked = bool(flags & FLAG_PARKED)
+            proxies[aid] = a
+            agents.append(a)
+            phase = int(frame.phase[k])
+            if phase:
+                phase_map[a] = PHASES[phase]
+            slot = int(frame.queue_slot[k])
+            if slot >= 0:
+                queue.append((slot, a))
+            cashier = int(frame.cashier[k])
+            if 0 <= cashier < len(qm.cashiers):
+                qm.cashiers[cashier]["reserved_by" if flags & FLAG_RESERVED else "agent"] = a
+        self._proxies = proxies
+        self.env.agents = agents
+        qm.agent_phase = phase_map
+        qm.queue = [a for _, a in sorted(queue, key=lambda item: item[0])]
+
+
+class ReplayStats:
+    """
+    StatsManager zasilany klatkami z nagrania (dla StatsHUD).
+    Po przewinięciu statystyki liczone są od nowa od `warmup` sekund przed
+    nowym czasem (sumy wejść/wyjść dotyczą więc tylko tego okna).
+    """
+
+    def __init__(self, reader, geom, warmup):
+        self.reader = reader
+        self.geom = geom
+        self.warmup = float(warmup)
+        self.stats = None
+        self.t = 0.0
+
+    def reset(self, t):
+        self.stats = StatsManager(self.geom, _NullWriter())
+        self.t = max(self.reader.start_time, t - self.warmup) - 1e-9
+        self.advance(t)
+
+    def advance(self, t):
+        """Dokłada do statystyk klatki z przedziału (poprzedni czas, t]."""
+        t_from = self.t
+        for fr in self.reader.frames(t_from, t):
+            if fr.time <= t_from:
+                continue
+            self.stats.update_frame(fr)
+        self.t = t
+
+
+def _latest_recording(root="stats_output"):
+    dirs = sorted(d for d in glob.glob(os.path.join(root, "*", "trajectory")) if os.path.isdir(d))
+    return dirs[-1] if dirs else None
+
+
+def _draw_timeline(screen, font, t, t0, t1, speed, paused):
+    """Pasek czasu na dole okna; zwraca jego prostokąt (kliknięcie = przewinięcie)."""
+    w, h = screen.get_size()
+    bar = pygame.Rect(10, h - 22, w - 20, 10)
+    pygame.draw.rect(screen, (200, 200, 200), bar, border_radius=4)
+    frac = (t - t0) / (t1 - t0) if t1 > t0 else 0.0
+    pygame.draw.rect(screen, (60, 120, 220), (bar.x, bar.y, int(bar.w * frac), bar.h), border_radius=4)
+    label = f"t={t:8.1f}s / {t1:.1f}s   x{speed:g}" + ("  [PAUZA]" if paused else "")
+    label += "   Spacja: pauza  Lewo/Prawo: -/+10s (Shift 60s)  Góra/Dół: prędkość  Home/End"
+    screen.blit(font.render(label, True, (0, 0, 0)), (10, h - 44))
+    return bar
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay a recorded trajectory (stats.trajectory) without running physics.")
+    ap.add_argument("recording", nargs="?", default=None,
+                    help="Trajectory folder (default: latest stats_output/*/trajectory)")
+    ap.add_argument("--config", default=None, help="Config module with the store layout (default: from the recording)")
+    ap.add_argument("--speed", type=float, default=1.0, help="Simulated seconds per real second")
+    ap.add_argument("--start", type=float, default=None, help="Start time [s]")
+    ap.add_argument("--fps", type=int, default=30)
+    ap.add_argument("--hud_warmup", type=float, default=30.0,
+                    help="After a seek, HUD stats are rebuilt from this many seconds before the new time")
+    args = ap.parse_args()
+
+    path = args.recording or _latest_recording()
+    if path is None:
+        raise SystemExit("No trajectory recording found.")
+    reader = TrajectoryReader(path)
+    if reader.n_chunks == 0:
+        raise SystemExit(f"Empty recording: {path}")
+
+    config_name = args.config or reader.meta.get("config", "Config4")
+    config = importlib.import_module(config_name).CONFIG
+
+    pygame.init()
+    pygame.font.init()
+    font = pygame.font.SysFont(None, 24)
+    small_font = pygame.font.SysFont(None, 20)
+    clock = pygame.time.Clock()
+
+    env = Environment(config)
+    scene = ReplayScene(env)
+    vis = Visualization(env)
+    pygame.display.set_caption(f"Replay - {path}")
+    hud = StatsHUD(font=font, small_font=small_font)
+    replay_stats = ReplayStats(reader, StatsGeometry.from_environment(env), args.hud_warmup)
+
+    t0, t1 = reader.start_time, reader.end_time
+    t = min(max(args.start if args.start is not None else t0, t0), t1)
+    speed = args.speed
+    paused = False
+    replay_stats.reset(t)
+    bar = None
+
+    def seek(target):
+        nonlocal t
+        t = min(max(target, t0), t1)
+        replay_stats.reset(t)
+
+    running = True
+    while running:
+        real_dt = clock.tick(args.fps) / 1000.0
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                step = 60.0 if event.mod & pygame.KMOD_SHIFT else 10.0
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:
+                    seek(t + step)
+                elif event.key == pygame.K_LEFT:
+                    seek(t - step)
+                elif event.key == pygame.K_HOME:
+                    seek(t0)
+                elif event.key == pygame.K_END:
+                    seek(t1)
+                elif event.key == pygame.K_UP:
+                    speed = min(speed * 2.0, 512.0)
+                elif event.key == pygame.K_DOWN:
+                    speed = max(speed / 2.0, 1.0 / 16.0)
+                elif event.key in (pygame.K_F1, pygame.K_g, pygame.K_h, pygame.K_p):
+                    hud.handle_key(event.key)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                if bar is not None and bar.inflate(0, 12).collidepoint(event.pos):
+                    seek(t0 + (event.pos[0] - bar.x) / max(bar.w, 1) * (t1 - t0))
+
+        if not paused and t < t1:
+            t = min(t + real_dt * speed, t1)
+            replay_stats.advance(t)
+
+        frame = reader.frame_at(t)
+        scene.show(frame)
+        vis.draw(flip=False)
+        hud.draw(vis.screen, replay_stats.stats, vis=vis)
+        bar = _draw_timeline(vis.screen, small_font, frame.time, t0, t1, speed, paused)
+        pygame.display.flip()
+
+    reader.close()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
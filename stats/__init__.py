@@ -1,4 +1,4 @@
-"""Statistics collection for the simulation (CSV + live HUD + heatmap).
+"""Statistics collection for the simulation (CSV/NPY/Parquet + live HUD + heatmap).
 
 This package only *reads* Environment/Agent state; it should not change simulation behavior.
 """
@@ -6,7 +6,20 @@ This package only *reads* Environment/Agent state; it should not change simulati
 from .geometry import StatsGeometry
 from .manager import StatsManager
 from .writer import StatsWriter
+from .columnar import load_table
+from .trajectory import TrajectoryReader, TrajectoryRecorder
+from .offline import recompute_stats
 from .real_data import RealDataSeries
 from .hud import StatsHUD
 
-__all__ = ["StatsGeometry", "StatsManager", "StatsWriter", "RealDataSeries", "StatsHUD"]
+__all__ = [
+    "StatsGeometry",
+    "StatsManager",
+    "StatsWriter",
+    "RealDataSeries",
+    "StatsHUD",
+    "load_table",
+    "TrajectoryRecorder",
+    "TrajectoryReader",
+    "recompute_stats",
+]
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import csv
+import os
+import struct
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+FORMATS = ("csv", "npy", "parquet")
+
+
+def _npy_header(dtype: np.dtype, n: int, size: Optional[int] = None) -> bytes:
+    """NPY v1.0 header for a 1-D structured array of n rows, space-padded to `size` bytes.
+
+    The first header reserves spare room, so later rewrites with a larger row
+    count keep the same length and the data offset never moves.
+    """
+    d = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (int(n),)}
+    body = repr(d).encode("latin1")
+    used = 10 + len(body) + 1  # magic + version + uint16 length + body + "\n"
+    if size is None:
+        size = ((used + 63) // 64 + 1) * 64
+    if used > size:
+        raise ValueError("npy header does not fit into the reserved space")
+    body = body + b" " * (size - used) + b"\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(body)) + body
+
+
+class ColumnarTable:
+    """Append-only table of numeric rows written in chunks.
+
+    Columns are taken from the first row; every column is stored as float64
+    (None -> NaN), so the file can be memory-mapped and read without parsing.
+
+    - "npy": one structured-array ``.npy`` file. Each chunk is appended to the
+      data block and the header's row count is rewritten, so the file is a
+      valid ``.npy`` after every chunk (a crash loses at most the rows still
+      buffered in memory, i.e. fewer than ``chunk_rows``).
+    - "parquet": one row group per chunk (requires pyarrow).
+
+    The file is only touched when the buffer reaches ``chunk_rows`` rows or on
+    ``flush(final=True)``/``close()``, so chunks keep their full size no matter
+    how often the caller flushes.
+    """
+
+    def __init__(self, path: str, fmt: str = "npy", chunk_rows: int = 65536):
+        if fmt not in ("npy", "parquet"):
+            raise ValueError(f"Unknown columnar format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.chunk_rows = max(1, int(chunk_rows))
+        self.columns: Optional[List[str]] = None
+        self.rows = 0  # rows already on disk
+
+        self._buf: List[tuple] = []
+        self._dtype: Optional[np.dtype] = None
+        self._f = None
+        self._header_size: Optional[int] = None
+        self._pq_writer = None
+
+    def append(self, row: Dict):
+        if self.columns is None:
+            self.columns = list(row.keys())
+            self._dtype = np.dtype([(c, np.float64) for c in self.columns])
+        values = (row.get(c) for c in self.columns)
+        self._buf.append(tuple(np.nan if v is None else v for v in values))
+        if len(self._buf) >= self.chunk_rows:
+            self._write_chunk()
+
+    def flush(self, final: bool = False):
+        """Write a partial chunk only if `final`; otherwise just flush what is already written."""
+        if self._buf and final:
+            self._write_chunk()
+        if self._f is not None:
+            self._f.flush()
+
+    def _write_chunk(self):
+        chunk = np.array(self._buf, dtype=self._dtype)
+        self._buf = []
+        if self.fmt == "npy":
+            if self._f is None:
+                self._f = open(self.path, "wb")
+                header = _npy_header(self._dtype, 0)
+                self._header_size = len(header) - 10
+                self._f.write(header)
+            self._f.write(chunk.tobytes())
+            self.rows += len(chunk)
+            # Rewrite the row count in place and return to the end of the data
+            self._f.seek(0)
+            self._f.write(_npy_header(self._dtype, self.rows, self._header_size + 10))
+            self._f.seek(0, os.SEEK_END)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.table({c: chunk[c] for c in self.columns})
+            if self._pq_writer is None:
+                self._pq_writer = pq.ParquetWriter(self.path, table.schema)
+            self._pq_writer.write_table(table)
+            self.rows += len(chunk)
+
+    def close(self):
+        self.flush(final=True)
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+        if self._pq_writer is not None:
+            self._pq_writer.close()
+            self._pq_writer = None
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def load_table(base_dir: str, name: str, mmap: bool = True) -> Dict[str, np.ndarray]:
+    """Load `stats_<name>` ("frames", "agents" or a ``StatsWriter.save_table`` name) as a dict of column arrays.
+
+    Looks for ``.npy``, then ``.parquet``, then ``.csv``. The ``.npy`` file is
+    memory-mapped and the columns are field views into it (no copy, no
+    parsing); Parquet is read through a memory map and converted column by
+    column. CSV is parsed as a fallback (empty/None -> NaN).
+    """
+    stem = os.path.join(base_dir, f"stats_{name}")
+
+    if os.path.isfile(stem + ".npy"):
+        arr = np.load(stem + ".npy", mmap_mode="r" if mmap else None)
+        return {c: arr[c] for c in arr.dtype.names}
+
+    if os.path.isfile(stem + ".parquet"):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(stem + ".parquet", memory_map=mmap)
+        return {c: table.column(c).to_numpy() for c in table.column_names}
+
+    if os.path.isfile(stem + ".csv"):
+        with open(stem + ".csv", "r", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        if not rows:
+            return {}
+        header, data = rows[0], rows[1:]
+        out = {}
+        for k, c in enumerate(header):
+            col = np.full(len(data), np.nan)
+            for i, r in enumerate(data):
+                v = r[k] if k < len(r) else ""
+                if v not in ("", "None"):
+                    try:
+                        col[i] = float(v)
+                    except ValueError:
+                        pass
+            out[c] = col
+        return out
+
+    raise FileNotFoundError(f"No stats_{name}.npy/.parquet/.csv in {base_dir}")
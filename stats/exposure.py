@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from CellList import CellList
+
+
+def radius_label(r: float) -> str:
+    """Column suffix for a contact radius, e.g. 1.5 -> "1.5m"."""
+    return f"{float(r):g}m"
+
+
+class ExposureTracker:
+    """Accumulates, per agent pair, the time spent closer than each of `radii` [m].
+
+    Every step the close pairs come from a ``CellList`` with cell size max(radii)
+    (``unique_pairs_within``), so the cost is O(N + close pairs) instead of
+    O(N^2). Only pairs that ever came within max(radii) get a row in parallel
+    arrays that grow by doubling (same layout as ``manager._AgentTable``); rows
+    are found through a dict of pair keys (id_a << 31 | id_b, id_a < id_b), so
+    agent ids must be non-negative and below 2**31. A step costs O(close pairs)
+    however many pairs have met before (a sorted key array would need a full
+    copy per step to insert new keys).
+
+    Results: ``edges()`` - contact edge list; ``totals()`` - per-agent exposure.
+    """
+
+    def __init__(self, radii: Sequence[float] = (1.0, 1.5), capacity: int = 1024):
+        radii = sorted({float(r) for r in radii})
+        if not radii or radii[0] <= 0:
+            raise ValueError("ExposureTracker needs at least one positive radius")
+        self.radii = np.array(radii)
+        self.max_radius = float(self.radii[-1])
+
+        self._row: Dict[int, int] = {}  # pair key -> row
+        self.n = 0
+        cap = max(1, int(capacity))
+        self.agent_a = np.zeros(cap, dtype=np.int64)
+        self.agent_b = np.zeros(cap, dtype=np.int64)
+        self.first_contact = np.zeros(cap, dtype=np.float64)
+        self.last_contact = np.zeros(cap, dtype=np.float64)
+        self.min_dist = np.full(cap, np.inf)
+        self.exposure = np.zeros((cap, len(radii)), dtype=np.float64)  # seconds within radii[k]
+
+        self.pairs_now = 0  # pairs within min(radii) in the last step
+
+    def _grow(self, need: int):
+        cap = len(self.agent_a)
+        if need <= cap:
+            return
+        new_cap = max(need, 2 * cap)
+        for name, fill in (
+            ("agent_a", 0), ("agent_b", 0), ("first_contact", 0.0), ("last_contact", 0.0),
+            ("min_dist", np.inf), ("exposure", 0.0),
+        ):
+            old = getattr(self, name)
+            arr = np.full((new_cap,) + old.shape[1:], fill, dtype=old.dtype)
+            arr[:cap] = old
+            setattr(self, name, arr)
+
+    def _slots(self, a: np.ndarray, b: np.ndarray, sim_time: float) -> np.ndarray:
+        """Rows for the (unique) pairs a[k] < b[k], allocating rows for pairs seen the first time."""
+        keys = ((a << 31) | b).tolist()
+        get = self._row.get
+        out = np.fromiter((get(k, -1) for k in keys), dtype=np.int64, count=len(keys))
+
+        new = np.flatnonzero(out < 0)
+        if len(new):
+            s = np.arange(self.n, self.n + len(new))
+            self._grow(self.n + len(new))
+            self.agent_a[s] = a[new]
+            self.agent_b[s] = b[new]
+            self.first_contact[s] = sim_time
+            self.n += len(new)
+            out[new] = s
+            self._row.update(zip([keys[k] for k in new.tolist()], s.tolist()))
+        return out
+
+    def update_arrays(self, dt: float, sim_time: float, ids: np.ndarray, pos: np.ndarray, alive: np.ndarray):
+        """One step: ids (N,), pos (N, 2), alive (N,) - only alive agents can be in contact."""
+        cells = CellList(pos, self.max_radius, mask=alive)
+        i, j, _, dist = cells.unique_pairs_within(self.max_radius)
+        if len(i) == 0:
+            self.pairs_now = 0
+            return
+
+        ids = np.asarray(ids, dtype=np.int64)
+        ia = ids[i]
+        ib = ids[j]
+        a = np.minimum(ia, ib)
+        b = np.maximum(ia, ib)
+        s = self._slots(a, b, float(sim_time))
+
+        # Pairs are unique within a step, so plain fancy-index updates are safe
+        self.exposure[s] += float(dt) * (dist[:, None] < self.radii[None, :])
+        self.last_contact[s] = sim_time
+        self.min_dist[s] = np.minimum(self.min_dist[s], dist)
+        self.pairs_now = int(np.count_nonzero(dist < self.radii[0]))
+
+    def edges(self) -> Dict[str, np.ndarray]:
+        """Contact edge list: one row per pair that ever came within max(radii)."""
+        n = self.n
+        out = {
+            "agent_a": self.agent_a[:n].copy(),
+            "agent_b": self.agent_b[:n].copy(),
+            "first_contact": self.first_contact[:n].copy(),
+            "last_contact": self.last_contact[:n].copy(),
+            "min_dist": self.min_dist[:n].copy(),
+        }
+        for k, r in enumerate(self.radii):
+            out["exposure_" + radius_label(r)] = self.exposure[:n, k].copy()
+        return out
+
+    def totals(self, ids: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """Per-agent exposure summed over partners, and number of distinct partners per radius.
+
+        `ids`: agents to report (e.g. every agent seen by StatsManager, so agents
+        without contacts get zeros); default - agents that appear in the edge list.
+        """
+        n = self.n
+        both = np.concatenate([self.agent_a[:n], self.agent_b[:n]])
+        if ids is None:
+            agent_id = np.unique(both)
+        else:
+            agent_id = np.unique(np.asarray(ids, dtype=np.int64))
+        m = len(agent_id)
+        # edge endpoints that are not in `ids` are dropped
+        pos = np.clip(np.searchsorted(agent_id, both), 0, max(m - 1, 0))
+        known = (agent_id[pos] == both) if m else np.zeros(len(both), dtype=bool)
+        idx = pos[known]
+
+        out = {"agent_id": agent_id}
+        for k, r in enumerate(self.radii):
+            t = np.concatenate([self.exposure[:n, k], self.exposure[:n, k]])[known]
+            label = radius_label(r)
+            out["exposure_" + label] = np.bincount(idx, weights=t, minlength=m)
+            out["contacts_" + label] = np.bincount(idx[t > 0], minlength=m)
+        return out
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Optional, Tuple
 
 import numpy as np
 
 
+# Zone codes used by the vectorized lookups (index into ZONES)
+ZONES = ("outside", "street", "store", "vestibule", "queue")
+ZONE_CODE = {name: code for code, name in enumerate(ZONES)}
+# Boolean lookup: INSIDE_ZONE[code] is True for zones counted as "inside the store"
+INSIDE_ZONE = np.array([name in ("vestibule", "store", "queue") for name in ZONES], dtype=bool)
+
+
 @dataclass(frozen=True)
 class Rect:
     x0: float
@@ -43,6 +50,11 @@ class StatsGeometry:
     heat_y1: float
     heat_cell: float
 
+    # Cached zone raster (built lazily from the rectangles above)
+    _zone_edges: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
     @staticmethod
     def from_environment(env, street_width: float = 3.0, heat_cell: float = 0.25) -> "StatsGeometry":
         width = float(getattr(env, "width", 0.0))
@@ -112,6 +124,55 @@ class StatsGeometry:
             return "store"
         return "outside"
 
+    def _zone_raster(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Raster of zone codes on the grid spanned by all rectangle edges.
+
+        Every zone is an axis-aligned rectangle, so a grid whose lines are the
+        rectangle edges is exact. Along each axis the raster alternates open
+        intervals (even index) and the edge lines themselves (odd index), because
+        the rectangles are closed and a point on an edge can belong to a different
+        zone than either neighbouring interval. Each entry is ``classify`` of a
+        representative point (interval midpoint or the edge coordinate); the first
+        and last intervals extend to infinity.
+        """
+        if self._zone_edges is None:
+            rects = [r for r in (self.street, self.store, self.vestibule, self.queue) if r is not None]
+            xs = np.unique([v for r in rects for v in (r.x0, r.x1)]).astype(np.float64)
+            ys = np.unique([v for r in rects for v in (r.y0, r.y1)]).astype(np.float64)
+
+            def samples(edges):
+                inner = 0.5 * (edges[:-1] + edges[1:])
+                out = np.empty(2 * len(edges) + 1)
+                out[0] = edges[0] - 1.0
+                out[-1] = edges[-1] + 1.0
+                out[1::2] = edges
+                out[2:-1:2] = inner
+                return out
+
+            sx = samples(xs)
+            sy = samples(ys)
+            table = np.zeros((len(sy), len(sx)), dtype=np.int8)
+            for j, y in enumerate(sy):
+                for i, x in enumerate(sx):
+                    table[j, i] = ZONE_CODE[self.classify(np.array((x, y)))]
+            self._zone_edges = (xs, ys, table)
+        return self._zone_edges
+
+    @staticmethod
+    def _raster_index(edges: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """Raster index along one axis: 2k for the interval below edges[k], 2k + 1 on edges[k]."""
+        k = np.searchsorted(edges, v, side="left")
+        on_edge = edges[np.minimum(k, len(edges) - 1)] == v
+        return 2 * k + on_edge
+
+    def classify_many(self, xy: np.ndarray) -> np.ndarray:
+        """Vectorized ``classify`` for an (N, 2) array; returns int8 codes into ``ZONES``."""
+        xs, ys, table = self._zone_raster()
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        col = self._raster_index(xs, xy[:, 0])
+        row = self._raster_index(ys, xy[:, 1])
+        return table[row, col]
+
     def heatmap_shape(self) -> Tuple[int, int]:
         w = int(np.ceil((self.heat_x1 - self.heat_x0) / self.heat_cell))
         h = int(np.ceil((self.heat_y1 - self.heat_y0) / self.heat_cell))
@@ -129,6 +190,18 @@ class StatsGeometry:
             return (row, col)
         return None
 
+    def heatmap_cells(self, xy: np.ndarray) -> np.ndarray:
+        """Flat (row * cols + col) heatmap indices for an (N, 2) array; points off the grid are dropped."""
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        x = xy[:, 0]
+        y = xy[:, 1]
+        h, w = self.heatmap_shape()
+        ok = (x >= self.heat_x0) & (x <= self.heat_x1) & (y >= self.heat_y0) & (y <= self.heat_y1)
+        col = ((x[ok] - self.heat_x0) / self.heat_cell).astype(np.int64)
+        row = ((y[ok] - self.heat_y0) / self.heat_cell).astype(np.int64)
+        keep = (row < h) & (col < w)
+        return row[keep] * w + col[keep]
+
     def heat_cell_center(self, row: int, col: int) -> Tuple[float, float]:
         x = self.heat_x0 + (col + 0.5) * self.heat_cell
         y = self.heat_y0 + (row + 0.5) * self.heat_cell
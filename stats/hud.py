@@ -12,6 +12,7 @@ class HUDToggles:
     show_hud: bool = True
     show_graphs: bool = True
     show_heatmap: bool = False
+    show_pressure: bool = False
 
 
 class StatsHUD:
@@ -20,6 +21,7 @@ class StatsHUD:
     - Text block with key metrics
     - Optional mini time-series graphs
     - Optional heatmap hotspots overlay
+    - Optional crowd pressure field overlay (stats.pressure)
 
     Note on time mapping:
     `real_seconds_per_sim_second` controls how simulation time is interpreted for display:
@@ -49,6 +51,8 @@ class StatsHUD:
             self.toggles.show_graphs = not self.toggles.show_graphs
         elif key == pygame.K_h:
             self.toggles.show_heatmap = not self.toggles.show_heatmap
+        elif key == pygame.K_p:
+            self.toggles.show_pressure = not self.toggles.show_pressure
 
 
     @staticmethod
@@ -221,6 +225,36 @@ class StatsHUD:
             s.fill((255, 0, 0, alpha))
             screen.blit(s, (rx, ry))
 
+    def _draw_pressure_overlay(self, screen: pygame.Surface, stats, vis, p_max: float = 0.02):
+        # Whole pressure grid as one translucent surface, scaled onto the world rectangle.
+        # Colour/alpha saturate at p_max [1/s^2] (~ the critical value reported by Helbing et al.).
+        field = getattr(stats, "pressure", None)
+        if field is None:
+            return
+        p = field.pressure
+        if p.size == 0 or not np.any(p > 0):
+            return
+        a = np.clip(p / p_max, 0.0, 1.0).T  # surfarray is indexed (x, y)
+        surf = pygame.Surface((field.cols, field.rows), pygame.SRCALPHA)
+        rgb = pygame.surfarray.pixels3d(surf)
+        rgb[:, :, 0] = 255
+        rgb[:, :, 1] = (200 * (1.0 - a)).astype(np.uint8)
+        rgb[:, :, 2] = 0
+        del rgb
+        alpha = pygame.surfarray.pixels_alpha(surf)
+        alpha[:, :] = (170 * np.sqrt(a)).astype(np.uint8)
+        del alpha
+
+        p1 = vis.world_to_screen((field.x0, field.y0))
+        p2 = vis.world_to_screen((field.x0 + field.cols * field.cell, field.y0 + field.rows * field.cell))
+        flip_x = p2[0] < p1[0]
+        flip_y = p2[1] < p1[1]
+        if flip_x or flip_y:
+            surf = pygame.transform.flip(surf, flip_x, flip_y)
+        rw = max(1, abs(int(p2[0] - p1[0])))
+        rh = max(1, abs(int(p2[1] - p1[1])))
+        screen.blit(pygame.transform.scale(surf, (rw, rh)), (min(p1[0], p2[0]), min(p1[1], p2[1])))
+
     def draw(self, screen: pygame.Surface, stats, vis=None):
         if not self.toggles.show_hud:
             return
@@ -243,6 +277,8 @@ class StatsHUD:
         queue_total = int(last.get("queue_total", 0))
         serving_now = int(last.get("serving_now", 0))
         density = float(last.get("density_store", 0.0))
+        pressure_max = float(last.get("pressure_max", 0.0))
+        density_peak = float(last.get("density_peak", 0.0))
 
         med_shop_sim_min = last.get("shop_median_min")
         med_shop_real_min = float(med_shop_sim_min) * self.real_seconds_per_sim_second if med_shop_sim_min is not None else None
@@ -252,12 +288,15 @@ class StatsHUD:
             f"inside={inside} total={total} exited={exited}",
             f"queue_total={queue_total} serving_now={serving_now}",
             f"density={density:.3f}" + (f" shop_med={med_shop_real_min:.1f}min" if med_shop_real_min is not None else ""),
-            "F1 HUD   G graphs   H heatmap",
+            f"pressure_max={pressure_max:.4f}/s^2 density_peak={density_peak:.2f}p/m^2",
+            "F1 HUD   G graphs   H heatmap   P pressure",
         ]
         self._draw_text_block(screen, lines, 10, 40)
 
         if self.toggles.show_heatmap and vis is not None:
             self._draw_heatmap_overlay(screen, stats, vis)
+        if self.toggles.show_pressure and vis is not None:
+            self._draw_pressure_overlay(screen, stats, vis)
 
         if not self.toggles.show_graphs:
             return
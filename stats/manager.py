@@ -1,33 +1,110 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Deque, Dict, Optional, Tuple
+from typing import Deque, Dict, Optional, Sequence, Tuple
 
 from collections import deque
 import numpy as np
 
-from .geometry import StatsGeometry
+from .exposure import ExposureTracker
+from .geometry import INSIDE_ZONE, StatsGeometry
+from .pressure import PressureField
+from .quantiles import P2Quantile, RunningMedian
 from .writer import StatsWriter
 
 
-@dataclass
-class _AgentState:
-    agent_id: int
-    spawn_time: float
+def queue_metrics(env) -> Tuple[int, int, int]:
+    """queue_total, serving_now, max_queue.
 
-    entry_time: Optional[float] = None  # first time inside store
-    exit_time: Optional[float] = None   # when agent.exited becomes True
-
-    inside_at_entry: Optional[int] = None  # number of people inside at entry moment
-
-    last_pos: Optional[np.ndarray] = None
-    distance: float = 0.0
-
-    idle_time: float = 0.0
-    mean_speed_sum: float = 0.0
-    mean_speed_n: int = 0
+    queue_total: waiting agents (not including those being served).
+    serving_now: number of busy cashiers (cashier.agent is not None).
+    max_queue: max queue length among cashiers. If model uses a single shared queue, max_queue=len(queue).
+    """
+    qm = getattr(env, "queue_manager", None)
+    if qm is None:
+        return 0, 0, 0
+
+    queue = getattr(qm, "queue", []) or []
+    queue_total = int(len(queue))
+
+    cashiers = getattr(qm, "cashiers", []) or []
+    serving_now = 0
+    agent_phase = getattr(qm, "agent_phase", {}) or {}
+    for c in cashiers:
+        a = c.get("agent")
+        if a is None:
+            continue
+        # Count only agents that are actually being served: they reached the cashier
+        # and are currently waiting there for service_time.
+        if agent_phase.get(a) == "to_cashier" and getattr(a, "is_waiting", False):
+            serving_now += 1
+
+    # This project uses a single shared physical queue.
+    # For HUD/plots we expose a proxy "max_queue" as an estimate of the
+    # longest per-cashier waiting line if the shared queue were split evenly.
+    n_cashiers = len(cashiers) if cashiers else 0
+    if n_cashiers > 0:
+        max_queue = int((queue_total + n_cashiers - 1) // n_cashiers)  # ceil
+    else:
+        max_queue = queue_total
+
+    return queue_total, serving_now, max_queue
+
+
+class _AgentTable:
+    """Per-agent running state as parallel arrays (structure of arrays).
+
+    Rows are addressed by slot; ``slots()`` maps agent ids to slots, allocating
+    new rows (and growing the arrays by doubling) for agents seen the first time.
+    NaN in entry_time / exit_time / last_pos means "not set yet".
+    """
 
-    zone: str = "outside"
+    def __init__(self, capacity: int = 256):
+        self.slot: Dict[int, int] = {}
+        self.n = 0
+        cap = max(1, int(capacity))
+        self.agent_id = np.zeros(cap, dtype=np.int64)
+        self.spawn_time = np.zeros(cap, dtype=np.float64)
+        self.entry_time = np.full(cap, np.nan)       # first time inside store
+        self.exit_time = np.full(cap, np.nan)        # when agent.exited becomes True
+        self.inside_at_entry = np.full(cap, -1, dtype=np.int64)  # people inside at entry moment
+        self.last_pos = np.full((cap, 2), np.nan)
+        self.distance = np.zeros(cap, dtype=np.float64)
+        self.idle_time = np.zeros(cap, dtype=np.float64)
+        self.speed_sum = np.zeros(cap, dtype=np.float64)
+        self.speed_n = np.zeros(cap, dtype=np.int64)
+        self.zone = np.zeros(cap, dtype=np.int8)     # code into geometry.ZONES
+
+    def _grow(self, need: int):
+        cap = len(self.agent_id)
+        if need <= cap:
+            return
+        new_cap = max(need, 2 * cap)
+        for name, fill in (
+            ("agent_id", 0), ("spawn_time", 0.0), ("entry_time", np.nan), ("exit_time", np.nan),
+            ("inside_at_entry", -1), ("last_pos", np.nan), ("distance", 0.0), ("idle_time", 0.0),
+            ("speed_sum", 0.0), ("speed_n", 0), ("zone", 0),
+        ):
+            old = getattr(self, name)
+            arr = np.full((new_cap,) + old.shape[1:], fill, dtype=old.dtype)
+            arr[:cap] = old
+            setattr(self, name, arr)
+
+    def slots(self, ids: np.ndarray, spawn_time: np.ndarray) -> np.ndarray:
+        out = np.empty(len(ids), dtype=np.int64)
+        for k, aid in enumerate(ids.tolist()):
+            s = self.slot.get(aid)
+            if s is None:
+                s = self.n
+                self._grow(s + 1)
+                self.slot[aid] = s
+                self.agent_id[s] = aid
+                self.spawn_time[s] = spawn_time[k]
+                self.n += 1
+            out[k] = s
+        return out
+
+    def mean_speed(self, s: int) -> float:
+        return float(self.speed_sum[s] / self.speed_n[s]) if self.speed_n[s] > 0 else 0.0
 
 
 class StatsManager:
@@ -42,6 +119,13 @@ class StatsManager:
     - inside_now: how many agents are currently inside store zones (vestibule/store/queue).
     - total_entered: how many unique agents crossed from outside to inside (entry_time set).
     - exited_total: how many agents finished and left (agent.exited).
+    - pressure_max / density_peak: maximum of the local crowd pressure field
+      rho * Var(v) [1/s^2] and of the Gaussian-kernel local density [p/m^2]
+      (see ``stats.pressure.PressureField``), refreshed every `pressure_every` steps
+      (0 disables the field).
+    - contact_pairs_now: agent pairs closer than the smallest of `exposure_radii`
+      (only with exposure tracking on; totals and the contact edge list are
+      written at close as stats_exposure / stats_contacts).
     """
 
     def __init__(
@@ -53,6 +137,10 @@ class StatsManager:
         history_seconds: float = 240.0,
         keep_shopping_points: int = 800,
         idle_speed_thresh: float = 0.05,
+        pressure_every: int = 1,
+        pressure_cell: Optional[float] = None,
+        pressure_sigma: float = 0.7,
+        exposure_radii: Sequence[float] = (),
     ):
         self.geom = geom
         self.writer = writer
@@ -60,7 +148,7 @@ class StatsManager:
 
         self.idle_speed_thresh = float(idle_speed_thresh)
 
-        self._agents: Dict[int, _AgentState] = {}
+        self._table = _AgentTable()
 
         # Totals
         self.entries_total = 0
@@ -78,6 +166,7 @@ class StatsManager:
         self.serving_now_hist: Deque[int] = deque()
         self.serving_median_hist: Deque[float] = deque()
         self.max_queue_hist: Deque[int] = deque()
+        self.pressure_max_hist: Deque[float] = deque()
 
         # Shopping time points (time series by exit time)
         self.keep_shopping_points = int(keep_shopping_points)
@@ -85,27 +174,34 @@ class StatsManager:
         self.shop_time_min: Deque[float] = deque()
         # Median of shopping time over all completed agents so far (aligned with shop_exit_t)
         self.shop_median_min: Deque[float] = deque()
-        # Keep all completed times for true global median (do not trim)
-        self._all_shop_time_min: list[float] = []
+        # Global median over all completed agents (exact, streaming - no full history kept)
+        self._shop_median = RunningMedian()
+        # p90 of shopping time (P² estimate, constant memory)
+        self._shop_p90 = P2Quantile(0.9)
 
-        # Keep all serving_now values for global median line
-        self._all_serving_now: list[int] = []
+        # Global median of serving_now over all frames
+        self._serving_median = RunningMedian()
 
         # Heatmap (optional)
         self._heatmap = np.zeros(self.geom.heatmap_shape(), dtype=np.float32)
+        self._heatmap_flat = self._heatmap.reshape(-1)  # view used for np.add.at
+
+        # Crowd pressure field (optional, every `pressure_every` steps)
+        self.pressure_every = max(0, int(pressure_every))
+        self.pressure: Optional[PressureField] = None
+        if self.pressure_every > 0:
+            self.pressure = PressureField.from_geometry(geom, cell=pressure_cell, sigma=pressure_sigma)
+        self._pressure_step = 0
+        self._pressure_max = 0.0
+        self._density_peak = 0.0
+
+        # Pairwise contact exposure (optional, e.g. radii (1.0, 1.5) m)
+        self.exposure: Optional[ExposureTracker] = ExposureTracker(exposure_radii) if exposure_radii else None
 
     @property
     def heatmap(self) -> np.ndarray:
         return self._heatmap
 
-    def _get_state(self, agent) -> _AgentState:
-        aid = id(agent)
-        st = self._agents.get(aid)
-        if st is None:
-            st = _AgentState(agent_id=aid, spawn_time=float(getattr(agent, "spawn_time", 0.0)))
-            self._agents[aid] = st
-        return st
-
     def _trim_history(self, now: float):
         limit = now - self.history_seconds
         while self.t_hist and self.t_hist[0] < limit:
@@ -116,145 +212,165 @@ class StatsManager:
             self.serving_now_hist.popleft()
             self.serving_median_hist.popleft()
             self.max_queue_hist.popleft()
+            self.pressure_max_hist.popleft()
 
     def _queue_metrics(self, env) -> Tuple[int, int, int]:
-        """queue_total, serving_now, max_queue.
-
-        queue_total: waiting agents (not including those being served).
-        serving_now: number of busy cashiers (cashier.agent is not None).
-        max_queue: max queue length among cashiers. If model uses a single shared queue, max_queue=len(queue).
-        """
-        qm = getattr(env, "queue_manager", None)
-        if qm is None:
-            return 0, 0, 0
-
-        queue = getattr(qm, "queue", []) or []
-        queue_total = int(len(queue))
-
-        cashiers = getattr(qm, "cashiers", []) or []
-        serving_now = 0
-        agent_phase = getattr(qm, "agent_phase", {}) or {}
-        for c in cashiers:
-            a = c.get("agent")
-            if a is None:
-                continue
-            # Count only agents that are actually being served: they reached the cashier
-            # and are currently waiting there for service_time.
-            if agent_phase.get(a) == "to_cashier" and getattr(a, "is_waiting", False):
-                serving_now += 1
-
-        # This project uses a single shared physical queue.
-        # For HUD/plots we expose a proxy "max_queue" as an estimate of the
-        # longest per-cashier waiting line if the shared queue were split evenly.
-        n_cashiers = len(cashiers) if cashiers else 0
-        if n_cashiers > 0:
-            max_queue = int((queue_total + n_cashiers - 1) // n_cashiers)  # ceil
-        else:
-            max_queue = queue_total
-
-        return queue_total, serving_now, max_queue
+        return queue_metrics(env)
 
     def update(self, dt: float, sim_time: float, agents, env=None):
-        dt = float(dt)
-        sim_time = float(sim_time)
         if env is None:
             return
 
-        # Count inside_now first (only active and not exited)
-        inside_now = 0
-        for a in agents:
-            if getattr(a, "exited", False):
-                continue
-            if not getattr(a, "active", True):
-                continue
-            z = self.geom.classify(np.asarray(a.position, dtype=np.float32))
-            if z in ("vestibule", "store", "queue"):
-                inside_now += 1
+        n = len(agents)
+        # Stable Environment id when available (id(agent) as a fallback for bare objects)
+        ids = np.fromiter(
+            (a.id if getattr(a, "id", None) is not None else id(a) for a in agents), dtype=np.int64, count=n
+        )
+        spawn = np.fromiter((float(getattr(a, "spawn_time", 0.0)) for a in agents), dtype=np.float64, count=n)
+        pos = np.array([a.position for a in agents], dtype=np.float64).reshape(n, 2)
+        vel = np.array([getattr(a, "velocity", (0.0, 0.0)) for a in agents], dtype=np.float64).reshape(n, 2)
+        exited = np.fromiter((bool(getattr(a, "exited", False)) for a in agents), dtype=bool, count=n)
+        alive = np.fromiter((bool(getattr(a, "active", True)) for a in agents), dtype=bool, count=n) & ~exited
+
+        self.update_arrays(dt, sim_time, ids, spawn, pos, vel, alive, exited, self._queue_metrics(env))
+
+    def update_frame(self, frame):
+        """One stats step from a recorded ``stats.trajectory.TrajectoryFrame`` (offline recompute / replay)."""
+        self.update_arrays(
+            frame.dt,
+            frame.time,
+            frame.ids,
+            frame.spawn_time,
+            frame.pos,
+            frame.vel,
+            frame.active & ~frame.exited,
+            frame.exited,
+            (frame.queue_total, frame.serving_now, frame.max_queue),
+        )
+
+    def update_arrays(
+        self,
+        dt: float,
+        sim_time: float,
+        ids: np.ndarray,
+        spawn_time: np.ndarray,
+        pos: np.ndarray,
+        vel: np.ndarray,
+        alive: np.ndarray,
+        exited: np.ndarray,
+        queue: Tuple[int, int, int],
+    ):
+        """One stats step from plain arrays (the live ``update`` and offline replays both end here).
+
+        ids/spawn_time: (N,) agent ids and spawn times; pos/vel: (N, 2);
+        alive: active and not exited; exited: finished this step or earlier;
+        queue: (queue_total, serving_now, max_queue) as returned by ``_queue_metrics``.
+        """
+        dt = float(dt)
+        sim_time = float(sim_time)
+        tab = self._table
+
+        slots = tab.slots(ids, spawn_time)
+        zone = self.geom.classify_many(pos)
+
+        # inside_now: active, not exited agents in store zones
+        inside = alive & INSIDE_ZONE[zone]
+        inside_now = int(np.count_nonzero(inside))
 
         store_area = self.geom.store.area() if self.geom.store is not None else 0.0
         density_store = (inside_now / store_area) if store_area > 0 else 0.0
 
-        queue_total, serving_now, max_queue = self._queue_metrics(env)
+        queue_total, serving_now, max_queue = queue
 
         # Keep history of "serving_now" (busy cashiers right now) + its global median.
         # This is separate from the shopping-time median.
-        self._all_serving_now.append(int(serving_now))
-        serving_med = float(np.median(np.asarray(self._all_serving_now, dtype=np.float32))) if self._all_serving_now else 0.0
-
-        # Per-agent updates (entry/exit + movement)
-        for a in agents:
-            st = self._get_state(a)
-
-            # Update movement only for active agents
-            if getattr(a, "active", True) and not getattr(a, "exited", False):
-                pos = np.asarray(a.position, dtype=np.float32)
-                vel = np.asarray(getattr(a, "velocity", (0.0, 0.0)), dtype=np.float32)
-                spd = float(np.linalg.norm(vel))
-
-                if st.last_pos is not None:
-                    st.distance += float(np.linalg.norm(pos - st.last_pos))
-                st.last_pos = pos
-
-                if spd < self.idle_speed_thresh:
-                    st.idle_time += dt
-                st.mean_speed_sum += spd
-                st.mean_speed_n += 1
-
-                st.zone = self.geom.classify(pos)
-
-                # Entry time: first moment agent is inside store zones
-                if st.entry_time is None and st.zone in ("vestibule", "store", "queue"):
-                    st.entry_time = sim_time
-                    st.inside_at_entry = int(inside_now)
-                    self.entries_total += 1
-
-                    # Track heatmap
-                idx = self.geom.heatmap_index(pos)
-                if idx is not None:
-                    self._heatmap[idx] += dt
-
-            # Exit time: agent finished and left
-            if getattr(a, "exited", False) and st.exit_time is None:
-                st.exit_time = sim_time
-                self.exits_total += 1
-
-                # Shopping time requires entry_time
-                if st.entry_time is not None and st.exit_time >= st.entry_time:
-                    shop_s = float(st.exit_time - st.entry_time)
-                    shop_min = shop_s / 60.0
-
-                    # Global median across ALL completed agents from the beginning.
-                    self._all_shop_time_min.append(float(shop_min))
-                    cur_med = float(np.median(np.asarray(self._all_shop_time_min, dtype=np.float32)))
-
-                    # Store time series point
-                    self.shop_exit_t.append(float(st.exit_time))
-                    self.shop_time_min.append(float(shop_min))
-                    self.shop_median_min.append(float(cur_med))
-                    while len(self.shop_exit_t) > self.keep_shopping_points:
-                        self.shop_exit_t.popleft()
-                        self.shop_time_min.popleft()
-                        self.shop_median_min.popleft()
-
-                    # Write per-agent row
-                self.writer.write_agent(
-                    {
-                        "agent_id": st.agent_id,
-                        "spawn_time": st.spawn_time,
-                        "entry_time": st.entry_time,
-                        "exit_time": st.exit_time,
-                        "shopping_time_s": (st.exit_time - st.entry_time) if st.entry_time is not None else None,
-                        "shopping_time_min": ((st.exit_time - st.entry_time) / 60.0) if st.entry_time is not None else None,
-                        "inside_at_entry": st.inside_at_entry,
-                        "distance": st.distance,
-                        "idle_time": st.idle_time,
-                        "mean_speed": (st.mean_speed_sum / st.mean_speed_n) if st.mean_speed_n > 0 else 0.0,
-                    }
-                )
-
-        # Median shopping time (minutes) among completed agents so far
-        # Median shopping time in minutes across all completed agents so far
-        median_shop = float(np.median(np.asarray(self._all_shop_time_min, dtype=np.float32))) if self._all_shop_time_min else None
+        self._serving_median.add(int(serving_now))
+        serving_med = float(self._serving_median.median)
+
+        # Movement for active agents
+        s = slots[alive]
+        if len(s):
+            p = pos[alive]
+            v = vel[alive]
+            spd = np.hypot(v[:, 0], v[:, 1])
+
+            last = tab.last_pos[s]
+            seen = ~np.isnan(last[:, 0])
+            step = p[seen] - last[seen]
+            tab.distance[s[seen]] += np.hypot(step[:, 0], step[:, 1])
+            tab.last_pos[s] = p
+
+            tab.idle_time[s[spd < self.idle_speed_thresh]] += dt
+            tab.speed_sum[s] += spd
+            tab.speed_n[s] += 1
+            tab.zone[s] = zone[alive]
+
+            # Entry time: first moment agent is inside store zones
+            new = s[inside[alive] & np.isnan(tab.entry_time[s])]
+            tab.entry_time[new] = sim_time
+            tab.inside_at_entry[new] = inside_now
+            self.entries_total += len(new)
+
+            # Heatmap: dwell time per cell
+            np.add.at(self._heatmap_flat, self.geom.heatmap_cells(p), np.float32(dt))
+
+        # Crowd pressure field (kept from the last refresh between refreshes)
+        if self.pressure is not None:
+            if self._pressure_step % self.pressure_every == 0:
+                self.pressure.update(pos[alive], vel[alive], dt * self.pressure_every)
+                self._pressure_max = float(self.pressure.pressure.max())
+                self._density_peak = float(self.pressure.density.max())
+            self._pressure_step += 1
+
+        # Exposure is keyed by table slot (small dense ints); mapped back to agent ids at close
+        if self.exposure is not None:
+            self.exposure.update_arrays(dt, sim_time, slots, pos, alive)
+
+        # Exit time: agent finished and left
+        ex = slots[exited]
+        for st in ex[np.isnan(tab.exit_time[ex])].tolist():
+            tab.exit_time[st] = sim_time
+            self.exits_total += 1
+            entry = tab.entry_time[st]
+            entered = not np.isnan(entry)
+
+            # Shopping time requires entry_time
+            if entered and sim_time >= entry:
+                shop_min = float(sim_time - entry) / 60.0
+
+                # Global median across ALL completed agents from the beginning.
+                self._shop_median.add(shop_min)
+                self._shop_p90.add(shop_min)
+                cur_med = float(self._shop_median.median)
+
+                # Store time series point
+                self.shop_exit_t.append(sim_time)
+                self.shop_time_min.append(shop_min)
+                self.shop_median_min.append(cur_med)
+                while len(self.shop_exit_t) > self.keep_shopping_points:
+                    self.shop_exit_t.popleft()
+                    self.shop_time_min.popleft()
+                    self.shop_median_min.popleft()
+
+            # Write per-agent row
+            self.writer.write_agent(
+                {
+                    "agent_id": int(tab.agent_id[st]),
+                    "spawn_time": float(tab.spawn_time[st]),
+                    "entry_time": float(entry) if entered else None,
+                    "exit_time": sim_time,
+                    "shopping_time_s": (sim_time - entry) if entered else None,
+                    "shopping_time_min": ((sim_time - entry) / 60.0) if entered else None,
+                    "inside_at_entry": int(tab.inside_at_entry[st]) if entered else None,
+                    "distance": float(tab.distance[st]),
+                    "idle_time": float(tab.idle_time[st]),
+                    "mean_speed": tab.mean_speed(st),
+                }
+            )
+
+        # Median / p90 shopping time in minutes across all completed agents so far
+        median_shop = self._shop_median.median
+        p90_shop = self._shop_p90.value
 
         # Save frame row + history
         self.t_hist.append(sim_time)
@@ -264,6 +380,7 @@ class StatsManager:
         self.serving_now_hist.append(int(serving_now))
         self.serving_median_hist.append(float(serving_med))
         self.max_queue_hist.append(int(max_queue))
+        self.pressure_max_hist.append(self._pressure_max)
 
         self._trim_history(sim_time)
 
@@ -279,19 +396,36 @@ class StatsManager:
             "serving_median": float(serving_med),
             "max_queue": int(max_queue),
             "shopping_median_min": median_shop,
+            "shopping_p90_min": p90_shop,
+            "pressure_max": self._pressure_max,
+            "density_peak": self._density_peak,
         }
+        if self.exposure is not None:
+            self.last_frame["contact_pairs_now"] = self.exposure.pairs_now
 
         # Persist frame to CSV
         self.writer.write_frame(self.last_frame)
 
-    def close(self):
+    def close(self, plots: bool = True):
         # Save heatmap on close for offline analysis
         self.writer.save_heatmap(self._heatmap, self.geom.heat_x0, self.geom.heat_y0, self.geom.heat_cell)
+        if self.pressure is not None:
+            self.writer.save_pressure(self.pressure)
+        if self.exposure is not None:
+            tab = self._table
+            totals = self.exposure.totals(np.arange(tab.n))
+            totals["agent_id"] = tab.agent_id[totals["agent_id"]]
+            edges = self.exposure.edges()
+            edges["agent_a"] = tab.agent_id[edges["agent_a"]]
+            edges["agent_b"] = tab.agent_id[edges["agent_b"]]
+            self.writer.save_table("exposure", totals)
+            self.writer.save_table("contacts", edges)
         # Save PNG plots with axes and legend (for reports)
-        try:
-            from .plots import save_all_plots
+        if plots:
+            try:
+                from .plots import save_all_plots
 
-            save_all_plots(self, self.writer.base_dir)
-        except Exception:
-            pass
+                save_all_plots(self, self.writer.base_dir)
+            except Exception:
+                pass
         self.writer.close()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import dataclasses
+from typing import Dict, Optional, Sequence
+
+from .geometry import Rect, StatsGeometry
+from .manager import StatsManager
+from .trajectory import TrajectoryReader
+from .writer import StatsWriter
+
+
+ZONE_FIELDS = ("store", "street", "vestibule", "queue")
+
+
+def with_zones(geom: StatsGeometry, zones: Optional[Dict[str, Sequence[float]]]) -> StatsGeometry:
+    """Copy of `geom` with zone rectangles replaced, e.g. {"vestibule": (x0, y0, x1, y1)}.
+
+    A value of None removes the zone (only meaningful for "queue").
+    """
+    if not zones:
+        return geom
+    changes = {}
+    for name, rect in zones.items():
+        if name not in ZONE_FIELDS:
+            raise ValueError(f"Unknown zone: {name} (expected one of {ZONE_FIELDS})")
+        changes[name] = None if rect is None else Rect(*(float(v) for v in rect))
+    return dataclasses.replace(geom, **changes)
+
+
+def recompute_stats(
+    recording: str,
+    geom: StatsGeometry,
+    writer: StatsWriter,
+    *,
+    t0: Optional[float] = None,
+    t1: Optional[float] = None,
+    plots: bool = True,
+    **manager_kwargs,
+) -> StatsManager:
+    """Rebuild stats_frames / stats_agents / heatmap from a trajectory recording.
+
+    The recording is read chunk by chunk and every step goes through the same
+    vectorized ``StatsManager.update_arrays`` core as a live run, so changing
+    zones (`geom`) or thresholds (`manager_kwargs`, e.g. idle_speed_thresh)
+    only needs this pass, not a new simulation. The manager is closed (files,
+    heatmap and, unless ``plots=False``, PNG plots written) before it is returned.
+
+    Results match the live run only up to the recording precision: positions
+    are stored rounded (1 mm by default in "delta" mode, float16/float32
+    otherwise), so agents right on a zone edge or a contact/speed threshold can
+    be counted differently, and velocity-based fields (pressure) differ slightly.
+    Record with ``encoding="float32"`` for the closest match.
+    """
+    reader = TrajectoryReader(recording)
+    stats = StatsManager(geom, writer, **manager_kwargs)
+    try:
+        for frame in reader.frames(t0, t1):
+            stats.update_frame(frame)
+    finally:
+        reader.close()
+    stats.close(plots=plots)
+    return stats
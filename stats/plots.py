@@ -120,6 +120,18 @@ def save_all_plots(stats, base_dir: str):
             label="serving_now",
         )
 
+    pressure = list(getattr(stats, "pressure_max_hist", []))
+    if len(t) >= 2 and len(pressure) >= 2 and getattr(stats, "pressure", None) is not None:
+        _save_line_plot(
+            path=os.path.join(out_dir, "pressure.png"),
+            xs=t,
+            ys=pressure,
+            title="Crowd pressure (max of rho * Var(v))",
+            x_label="time (real s)",
+            y_label="1 / s^2",
+            label="pressure_max",
+        )
+
     shop_t_sim = list(getattr(stats, "shop_exit_t", []))
     shop_t = [x * time_factor for x in shop_t_sim]
     shop_y = [y * time_factor for y in list(getattr(stats, "shop_time_min", []))]
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import heapq
+import math
+from typing import List, Optional
+
+
+class RunningMedian:
+    """Exact median of a growing stream using two heaps.
+
+    ``add`` is O(log n) and ``median`` is O(1), so keeping a global median over
+    the whole run no longer requires re-sorting the full history every step.
+    For an even number of values the median is the mean of the two middle
+    values (same convention as ``np.median``).
+    """
+
+    def __init__(self):
+        self._low: List[float] = []   # max-heap (negated) with the lower half
+        self._high: List[float] = []  # min-heap with the upper half
+
+    def __len__(self) -> int:
+        return len(self._low) + len(self._high)
+
+    def add(self, x: float) -> None:
+        x = float(x)
+        if not self._low or x <= -self._low[0]:
+            heapq.heappush(self._low, -x)
+        else:
+            heapq.heappush(self._high, x)
+
+        # Rebalance: len(low) == len(high) or len(low) == len(high) + 1
+        if len(self._low) > len(self._high) + 1:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+        elif len(self._high) > len(self._low):
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+
+    @property
+    def median(self) -> Optional[float]:
+        if not self._low:
+            return None
+        if len(self._low) > len(self._high):
+            return -self._low[0]
+        return (-self._low[0] + self._high[0]) / 2.0
+
+
+class P2Quantile:
+    """Streaming estimate of a single quantile with the P² algorithm.
+
+    Jain & Chlamtac (1985): five markers track the minimum, p/2, p, (1+p)/2
+    and the maximum; marker heights are adjusted with a piecewise-parabolic
+    formula. Memory and per-value cost are constant. Until five values have
+    been seen the quantile is computed exactly from the stored values.
+    """
+
+    def __init__(self, p: float):
+        if not 0.0 < p < 1.0:
+            raise ValueError("p must be in (0, 1)")
+        self.p = float(p)
+        self._init: List[float] = []
+        self._q: List[float] = []            # marker heights
+        self._n: List[int] = []              # marker positions (0-based)
+        self._np: List[float] = []           # desired marker positions
+        self._dn = [0.0, p / 2.0, p, (1.0 + p) / 2.0, 1.0]
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, x: float) -> None:
+        x = float(x)
+        self.count += 1
+
+        if not self._q:
+            self._init.append(x)
+            if len(self._init) == 5:
+                self._init.sort()
+                p = self.p
+                self._q = list(self._init)
+                self._n = [0, 1, 2, 3, 4]
+                self._np = [0.0, 2.0 * p, 4.0 * p, 2.0 + 2.0 * p, 4.0]
+            return
+
+        q, n = self._q, self._n
+
+        # Cell k such that q[k] <= x < q[k+1]; extend the extremes if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while k < 3 and x >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._np[i] += self._dn[i]
+
+        # Adjust the three middle markers
+        for i in range(1, 4):
+            d = self._np[i] - n[i]
+            if (d >= 1.0 and n[i + 1] - n[i] > 1) or (d <= -1.0 and n[i - 1] - n[i] < -1):
+                s = 1 if d > 0 else -1
+                qp = self._parabolic(i, s)
+                if not (q[i - 1] < qp < q[i + 1]):
+                    qp = q[i] + s * (q[i + s] - q[i]) / (n[i + s] - n[i])
+                q[i] = qp
+                n[i] += s
+
+    def _parabolic(self, i: int, s: int) -> float:
+        q, n = self._q, self._n
+        return q[i] + s / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self) -> Optional[float]:
+        if self._q:
+            return self._q[2]
+        if not self._init:
+            return None
+        # Exact (linear interpolation, as np.percentile) for the first few values
+        xs = sorted(self._init)
+        pos = self.p * (len(xs) - 1)
+        lo = int(math.floor(pos))
+        hi = min(lo + 1, len(xs) - 1)
+        return xs[lo] + (xs[hi] - xs[lo]) * (pos - lo)
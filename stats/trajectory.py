@@ -0,0 +1,444 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import zlib
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .manager import queue_metrics
+
+
+# Phase codes (QueueManager.agent_phase); "none" = no phase entry yet
+PHASES = ("none", "shopping", "to_queue_slot", "in_queue", "to_cashier", "to_exit", "exited")
+PHASE_CODE = {name: code for code, name in enumerate(PHASES)}
+
+# Flag bits
+FLAG_ACTIVE = 1
+FLAG_WAITING = 2
+FLAG_EXITED = 4
+FLAG_PARKED = 8
+FLAG_KINEMATIC = 16  # LOD: agent moved kinematically this step
+FLAG_RESERVED = 32   # the agent's cashier is only reserved (on the way), not occupied
+
+ENCODINGS = ("float32", "float16", "delta")
+COMPRESSIONS = (None, "zlib", "lz4")
+
+INDEX_DTYPE = np.dtype([
+    ("t0", np.float64),      # time of the first step (keyframe) in the chunk
+    ("t1", np.float64),      # time of the last step in the chunk
+    ("step0", np.int64),     # global index of the first step
+    ("steps", np.int32),
+    ("rows", np.int64),      # agent rows in the chunk
+    ("offset", np.int64),    # byte offset in trajectory.bin
+    ("nbytes", np.int64),
+])
+
+
+def _compress(data: bytes, method: Optional[str], level: int) -> bytes:
+    if method is None:
+        return data
+    if method == "zlib":
+        return zlib.compress(data, level)
+    import lz4.frame
+
+    return lz4.frame.compress(data)
+
+
+def _decompress(data: bytes, method: Optional[str]) -> bytes:
+    if method is None:
+        return data
+    if method == "zlib":
+        return zlib.decompress(data)
+    import lz4.frame
+
+    return lz4.frame.decompress(data)
+
+
+def _delta_order(ids: np.ndarray):
+    """Row order grouping rows by agent (stable in time) and the group-start mask in that order."""
+    order = np.lexsort((np.arange(len(ids)), ids))
+    ids_s = ids[order]
+    start = np.ones(len(ids), dtype=bool)
+    start[1:] = ids_s[1:] != ids_s[:-1]
+    return order, start
+
+
+def _delta_encode(ids: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """Per-agent differences of quantized positions; an agent's first row in the chunk stays absolute."""
+    order, start = _delta_order(ids)
+    qs = q[order]
+    d = np.empty_like(qs)
+    d[0:1] = qs[0:1]
+    d[1:] = qs[1:] - qs[:-1]
+    d[start] = qs[start]
+    out = np.empty_like(d)
+    out[order] = d
+    return out
+
+
+def _delta_decode(ids: np.ndarray, d: np.ndarray) -> np.ndarray:
+    order, start = _delta_order(ids)
+    ds = d[order].astype(np.int64)
+    cs = np.cumsum(ds, axis=0)
+    first = np.flatnonzero(start)
+    base = cs[first] - ds[first]
+    group = np.cumsum(start) - 1
+    qs = cs - base[group]
+    out = np.empty_like(qs)
+    out[order] = qs
+    return out
+
+
+@dataclass
+class TrajectoryFrame:
+    """One recorded step: per-agent arrays (aligned) plus queue state."""
+
+    time: float
+    dt: float
+    ids: np.ndarray
+    pos: np.ndarray        # (N, 2)
+    vel: np.ndarray        # (N, 2)
+    phase: np.ndarray      # codes into PHASES
+    flags: np.ndarray      # FLAG_* bits
+    spawn_time: np.ndarray
+    radius: np.ndarray
+    queue_slot: np.ndarray  # position in QueueManager.queue, -1 = not queued
+    cashier: np.ndarray     # cashier occupied (or reserved, FLAG_RESERVED), -1 = none
+    queue_total: int
+    serving_now: int
+    max_queue: int
+
+    @property
+    def active(self) -> np.ndarray:
+        return (self.flags & FLAG_ACTIVE) != 0
+
+    @property
+    def exited(self) -> np.ndarray:
+        return (self.flags & FLAG_EXITED) != 0
+
+
+class TrajectoryRecorder:
+    """Records every agent's position/velocity/phase at every step.
+
+    Use as (or inside) the ``on_before_remove`` callback of ``Simulation.update``.
+    Steps are buffered and written every ``chunk_steps`` steps as one
+    compressed chunk appended to ``trajectory.bin``. The first step of each
+    chunk is a keyframe (absolute positions), so any chunk decodes on its own
+    and ``TrajectoryReader`` can seek by time through ``trajectory_index.bin``
+    (one raw ``INDEX_DTYPE`` record appended per chunk).
+
+    encoding:
+    - "float32": positions and velocities as float32,
+    - "float16": both as float16 (about 1.5 cm resolution at 30 m),
+    - "delta":   positions quantized to ``precision`` metres and stored as
+                 per-agent differences inside the chunk (compresses best),
+                 velocities as float32 (float16 noticeably shifts Var(v) in
+                 the pressure field and speed-threshold counts).
+    compression: "zlib", "lz4" (needs the lz4 package, falls back to zlib) or None.
+    """
+
+    def __init__(
+        self,
+        base_dir: str,
+        *,
+        chunk_steps: int = 200,
+        encoding: str = "delta",
+        precision: float = 0.001,
+        compression: Optional[str] = "zlib",
+        level: int = 6,
+        meta: Optional[Dict] = None,
+    ):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown trajectory encoding: {encoding}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown trajectory compression: {compression}")
+        if compression == "lz4":
+            try:
+                import lz4.frame  # noqa: F401
+            except ImportError:
+                print("trajectory compression 'lz4' needs the lz4 package - using zlib")
+                compression = "zlib"
+
+        os.makedirs(base_dir, exist_ok=True)
+        self.base_dir = base_dir
+        self.chunk_steps = max(1, int(chunk_steps))
+        self.encoding = encoding
+        self.precision = float(precision)
+        self.compression = compression
+        self.level = int(level)
+
+        self.bin_path = os.path.join(base_dir, "trajectory.bin")
+        self.index_path = os.path.join(base_dir, "trajectory_index.bin")
+        self._f = open(self.bin_path, "wb")
+        self._index_f = open(self.index_path, "wb")
+        self.steps = 0
+
+        self._steps_buf: List[tuple] = []
+        self._rows_buf: List[Dict[str, np.ndarray]] = []
+        self._agent_meta: Dict[int, tuple] = {}  # id -> (spawn_time, radius), for agents in the current chunk
+
+        with open(os.path.join(base_dir, "trajectory_meta.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": 2,  # 2: raw appended index (trajectory_index.bin)
+                    "encoding": encoding,
+                    "precision": self.precision,
+                    "compression": compression,
+                    "chunk_steps": self.chunk_steps,
+                    "phases": list(PHASES),
+                    "flags": {"active": FLAG_ACTIVE, "waiting": FLAG_WAITING, "exited": FLAG_EXITED,
+                              "parked": FLAG_PARKED, "kinematic": FLAG_KINEMATIC, "reserved": FLAG_RESERVED},
+                    **(meta or {}),
+                },
+                f,
+                indent=2,
+            )
+
+    def __call__(self, dt: float, sim_time: float, agents, env=None):
+        n = len(agents)
+        qm = getattr(env, "queue_manager", None)
+        agent_phase = getattr(qm, "agent_phase", {}) or {}
+
+        ids = np.fromiter(
+            (a.id if getattr(a, "id", None) is not None else id(a) for a in agents), dtype=np.int64, count=n
+        )
+        pos = np.array([a.position for a in agents], dtype=np.float64).reshape(n, 2)
+        vel = np.array([getattr(a, "velocity", (0.0, 0.0)) for a in agents], dtype=np.float64).reshape(n, 2)
+        phase = np.fromiter((PHASE_CODE.get(agent_phase.get(a), 0) for a in agents), dtype=np.uint8, count=n)
+
+        # Queue order and cashier occupancy/reservations, so a replay can rebuild QueueManager
+        queue_pos = {a: k for k, a in enumerate(getattr(qm, "queue", None) or [])}
+        cashier_of = {}
+        for k, c in enumerate(getattr(qm, "cashiers", None) or []):
+            if c.get("reserved_by") is not None:
+                cashier_of[c["reserved_by"]] = (k, FLAG_RESERVED)
+            if c.get("agent") is not None:
+                cashier_of[c["agent"]] = (k, 0)
+        queue_slot = np.fromiter((queue_pos.get(a, -1) for a in agents), dtype=np.int16, count=n)
+        cashier = np.fromiter((cashier_of.get(a, (-1, 0))[0] for a in agents), dtype=np.int16, count=n)
+
+        flags = np.fromiter(
+            (
+                (FLAG_ACTIVE if getattr(a, "active", True) else 0)
+                | (FLAG_WAITING if getattr(a, "is_waiting", False) else 0)
+                | (FLAG_EXITED if getattr(a, "exited", False) else 0)
+                | (FLAG_PARKED if getattr(a, "parked", False) else 0)
+                | (FLAG_KINEMATIC if not getattr(a, "lod_full", True) else 0)
+                | cashier_of.get(a, (-1, 0))[1]
+                for a in agents
+            ),
+            dtype=np.uint8,
+            count=n,
+        )
+        for a, aid in zip(agents, ids.tolist()):
+            if aid not in self._agent_meta:
+                self._agent_meta[aid] = (float(getattr(a, "spawn_time", 0.0)), float(getattr(a, "radius", 0.0)))
+
+        self.record_arrays(dt, sim_time, ids, pos, vel, phase, flags, queue_metrics(env), queue_slot, cashier)
+
+    def record_arrays(self, dt, sim_time, ids, pos, vel, phase, flags, queue=(0, 0, 0), queue_slot=None, cashier=None):
+        """Append one step given as arrays (agent metadata must already be in ``_agent_meta``).
+
+        queue_slot/cashier: per-agent position in the queue and cashier index (-1 = none, the default).
+        """
+        none = np.full(len(ids), -1, dtype=np.int16)
+        self._steps_buf.append((float(sim_time), float(dt), len(ids)) + tuple(int(v) for v in queue))
+        self._rows_buf.append({
+            "ids": ids, "pos": pos, "vel": vel, "phase": phase, "flags": flags,
+            "queue_slot": none if queue_slot is None else np.asarray(queue_slot, dtype=np.int16),
+            "cashier": none if cashier is None else np.asarray(cashier, dtype=np.int16),
+        })
+        self.steps += 1
+        if len(self._steps_buf) >= self.chunk_steps:
+            self._write_chunk()
+
+    def _write_chunk(self):
+        if not self._steps_buf:
+            return
+        steps = np.array(self._steps_buf, dtype=np.float64)
+        ids = np.concatenate([r["ids"] for r in self._rows_buf]).astype(np.int64)
+        pos = np.concatenate([r["pos"] for r in self._rows_buf]).reshape(-1, 2)
+        vel = np.concatenate([r["vel"] for r in self._rows_buf]).reshape(-1, 2)
+
+        uniq = np.unique(ids)
+        meta = np.array([self._agent_meta[i] for i in uniq.tolist()], dtype=np.float64).reshape(-1, 2)
+
+        arrays = {
+            "time": steps[:, 0],
+            "dt": steps[:, 1].astype(np.float32),
+            "count": steps[:, 2].astype(np.int32),
+            "queue": steps[:, 3:6].astype(np.int32),
+            "ids": ids.astype(np.int32) if ids.size and ids.max() < 2**31 else ids,
+            "phase": np.concatenate([r["phase"] for r in self._rows_buf]),
+            "flags": np.concatenate([r["flags"] for r in self._rows_buf]),
+            "queue_slot": np.concatenate([r["queue_slot"] for r in self._rows_buf]),
+            "cashier": np.concatenate([r["cashier"] for r in self._rows_buf]),
+            "agent_ids": uniq,
+            "agent_meta": meta,
+        }
+        if self.encoding == "delta":
+            q = np.round(pos / self.precision).astype(np.int64)
+            arrays["pos"] = _delta_encode(ids, q).astype(np.int32)
+            arrays["vel"] = vel.astype(np.float32)
+        else:
+            dtype = np.float32 if self.encoding == "float32" else np.float16
+            arrays["pos"] = pos.astype(dtype)
+            arrays["vel"] = vel.astype(dtype)
+
+        buf = io.BytesIO()
+        np.savez(buf, **arrays)
+        blob = _compress(buf.getvalue(), self.compression, self.level)
+
+        offset = self._f.tell()
+        self._f.write(blob)
+        self._f.flush()
+        step0 = self.steps - len(steps)
+        record = np.array([(steps[0, 0], steps[-1, 0], step0, len(steps), len(ids), offset, len(blob))],
+                          dtype=INDEX_DTYPE)
+        self._index_f.write(record.tobytes())
+        self._index_f.flush()
+
+        # Keep metadata only for agents still present at the last step (removed agents never return)
+        last = set(self._rows_buf[-1]["ids"].tolist())
+        self._agent_meta = {k: v for k, v in self._agent_meta.items() if k in last}
+        self._steps_buf = []
+        self._rows_buf = []
+
+    def close(self):
+        if self._f is None:
+            return
+        self._write_chunk()
+        self._f.close()
+        self._f = None
+        self._index_f.close()
+
+
+class TrajectoryReader:
+    """Random access to a recording made by ``TrajectoryRecorder``."""
+
+    def __init__(self, base_dir: str, cache_chunks: int = 4):
+        self.base_dir = base_dir
+        with open(os.path.join(base_dir, "trajectory_meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.index = self._load_index(base_dir)
+        self._f = open(os.path.join(base_dir, "trajectory.bin"), "rb")
+        self._t0 = self.index["t0"].tolist()
+        self._cache: Dict[int, Dict[str, np.ndarray]] = {}
+        self._cache_order: List[int] = []
+        self.cache_chunks = max(1, int(cache_chunks))
+
+    @staticmethod
+    def _load_index(base_dir: str) -> np.ndarray:
+        """Chunk index: whole records of ``trajectory_index.bin`` (a record cut off by a crash
+        is ignored), or ``trajectory_index.npy`` of version-1 recordings."""
+        path = os.path.join(base_dir, "trajectory_index.bin")
+        if not os.path.isfile(path):
+            return np.load(os.path.join(base_dir, "trajectory_index.npy"))
+        count = os.path.getsize(path) // INDEX_DTYPE.itemsize
+        return np.fromfile(path, dtype=INDEX_DTYPE, count=count)
+
+    @property
+    def n_chunks(self) -> int:
+        return len(self.index)
+
+    @property
+    def n_steps(self) -> int:
+        return int(self.index["steps"].sum()) if len(self.index) else 0
+
+    @property
+    def start_time(self) -> float:
+        return float(self.index["t0"][0]) if len(self.index) else 0.0
+
+    @property
+    def end_time(self) -> float:
+        return float(self.index["t1"][-1]) if len(self.index) else 0.0
+
+    def chunk_for(self, t: float) -> int:
+        """Index of the chunk containing time t (clamped to the recording)."""
+        return min(max(bisect_right(self._t0, t) - 1, 0), self.n_chunks - 1)
+
+    def read_chunk(self, k: int) -> Dict[str, np.ndarray]:
+        """Decoded chunk: step arrays (time, dt, count, queue, start) and row arrays (ids, pos, vel, ...)."""
+        if k in self._cache:
+            return self._cache[k]
+        rec = self.index[k]
+        self._f.seek(int(rec["offset"]))
+        blob = _decompress(self._f.read(int(rec["nbytes"])), self.meta.get("compression"))
+        with np.load(io.BytesIO(blob)) as z:
+            c = {name: z[name] for name in z.files}
+
+        ids = c["ids"].astype(np.int64)
+        if self.meta["encoding"] == "delta":
+            c["pos"] = _delta_decode(ids, c["pos"]) * float(self.meta["precision"])
+        else:
+            c["pos"] = c["pos"].astype(np.float64)
+        c["vel"] = c["vel"].astype(np.float64)
+        c["ids"] = ids
+        c["start"] = np.concatenate(([0], np.cumsum(c["count"])))
+        for name in ("queue_slot", "cashier"):  # not in recordings made before they were added
+            if name not in c:
+                c[name] = np.full(len(ids), -1, dtype=np.int16)
+
+        # Per-row spawn_time / radius from the chunk's agent table
+        slot = np.searchsorted(c["agent_ids"], ids)
+        c["spawn_time"] = c["agent_meta"][slot, 0]
+        c["radius"] = c["agent_meta"][slot, 1]
+
+        self._cache[k] = c
+        self._cache_order.append(k)
+        if len(self._cache_order) > self.cache_chunks:
+            self._cache.pop(self._cache_order.pop(0), None)
+        return c
+
+    def _frame(self, c: Dict[str, np.ndarray], i: int) -> TrajectoryFrame:
+        a, b = int(c["start"][i]), int(c["start"][i + 1])
+        q = c["queue"][i]
+        return TrajectoryFrame(
+            time=float(c["time"][i]),
+            dt=float(c["dt"][i]),
+            ids=c["ids"][a:b],
+            pos=c["pos"][a:b],
+            vel=c["vel"][a:b],
+            phase=c["phase"][a:b],
+            flags=c["flags"][a:b],
+            spawn_time=c["spawn_time"][a:b],
+            radius=c["radius"][a:b],
+            queue_slot=c["queue_slot"][a:b],
+            cashier=c["cashier"][a:b],
+            queue_total=int(q[0]),
+            serving_now=int(q[1]),
+            max_queue=int(q[2]),
+        )
+
+    def frame_at(self, t: float) -> Optional[TrajectoryFrame]:
+        """Last recorded step with time <= t (or the first step if t is before the recording)."""
+        if not self.n_chunks:
+            return None
+        c = self.read_chunk(self.chunk_for(t))
+        i = max(int(np.searchsorted(c["time"], t, side="right")) - 1, 0)
+        return self._frame(c, i)
+
+    def frames(self, t0: Optional[float] = None, t1: Optional[float] = None) -> Iterator[TrajectoryFrame]:
+        """Iterate over steps with t0 <= time <= t1 (whole recording by default)."""
+        if not self.n_chunks:
+            return
+        k0 = self.chunk_for(t0) if t0 is not None else 0
+        for k in range(k0, self.n_chunks):
+            if t1 is not None and self.index["t0"][k] > t1:
+                break
+            c = self.read_chunk(k)
+            for i in range(len(c["time"])):
+                t = c["time"][i]
+                if t0 is not None and t < t0:
+                    continue
+                if t1 is not None and t > t1:
+                    return
+                yield self._frame(c, i)
+
+    def close(self):
+        self._f.close()
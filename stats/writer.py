@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import atexit
 import csv
 import os
+import queue
+import threading
+import time
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, List, Optional
 
 import numpy as np
 
+from .columnar import FORMATS, ColumnarTable, parquet_available
+
 
 @dataclass
 class StatsPaths:
@@ -17,12 +23,41 @@ class StatsPaths:
     heatmap_npy: str
     heatmap_csv: str
     hotspots_csv: str
+    pressure_npz: str = ""
+    frames_columnar: str = ""
+    agents_columnar: str = ""
 
 
 class StatsWriter:
-    """Writes simulation statistics to CSV/NPY."""
+    """Writes simulation statistics to CSV/NPY.
+
+    Frame and agent rows are buffered: ``write_frame``/``write_agent`` only put
+    the row on a queue, and a background thread writes them and flushes the
+    files every ``flush_rows`` rows or ``flush_interval`` seconds, whichever
+    comes first. ``close()`` (also registered with ``atexit``, so it runs on an
+    unhandled exception or Ctrl+C) drains the queue and flushes everything.
+    With ``background=False`` rows are written synchronously on the caller's
+    thread, still with batched flushes.
+
+    ``fmt`` selects the frame/agent row format: "csv" (default), "npy"
+    (memory-mappable structured arrays) or "parquet" (needs pyarrow, falls back
+    to "npy"); see ``stats.columnar.load_table`` for reading them back. The
+    columnar formats write whole ``chunk_rows`` chunks (and the rest on close);
+    the timed flush only moves queued rows into their buffers.
+    """
 
-    def __init__(self, base_dir: Optional[str] = None):
+    _STOP = object()
+
+    def __init__(
+        self,
+        base_dir: Optional[str] = None,
+        *,
+        flush_rows: int = 1000,
+        flush_interval: float = 2.0,
+        background: bool = True,
+        fmt: str = "csv",
+        chunk_rows: int = 65536,
+    ):
         if base_dir is None:
             stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             base_dir = os.path.join("stats_output", stamp)
@@ -36,33 +71,126 @@ class StatsWriter:
             heatmap_npy=os.path.join(base_dir, "stats_heatmap.npy"),
             heatmap_csv=os.path.join(base_dir, "stats_heatmap.csv"),
             hotspots_csv=os.path.join(base_dir, "stats_hotspots.csv"),
+            pressure_npz=os.path.join(base_dir, "stats_pressure.npz"),
         )
 
-        self._frames_f = open(self.paths.frames_csv, "w", newline="", encoding="utf-8")
-        self._agents_f = open(self.paths.agents_csv, "w", newline="", encoding="utf-8")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown stats format: {fmt}")
+        if fmt == "parquet" and not parquet_available():
+            print("stats format 'parquet' needs pyarrow - writing npy instead")
+            fmt = "npy"
+        self.fmt = fmt
+
+        self._frames_f = None
+        self._agents_f = None
+        self._columns: Optional[List[ColumnarTable]] = None
+        if fmt == "csv":
+            self._frames_f = open(self.paths.frames_csv, "w", newline="", encoding="utf-8")
+            self._agents_f = open(self.paths.agents_csv, "w", newline="", encoding="utf-8")
+        else:
+            ext = "." + fmt
+            self.paths.frames_columnar = os.path.join(base_dir, "stats_frames" + ext)
+            self.paths.agents_columnar = os.path.join(base_dir, "stats_agents" + ext)
+            self._columns = [
+                ColumnarTable(self.paths.frames_columnar, fmt, chunk_rows),
+                ColumnarTable(self.paths.agents_columnar, fmt, chunk_rows),
+            ]
 
         self._frames_writer = None
         self._agents_writer = None
 
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_interval = float(flush_interval)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        if background:
+            self._queue = queue.Queue()
+            # daemon: the interpreter must not wait for it before running atexit (close joins it)
+            self._thread = threading.Thread(target=self._drain, name="StatsWriter", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
     @property
     def base_dir(self) -> str:
         return self.paths.base_dir
 
     def write_frame(self, row: Dict):
-        if self._frames_writer is None:
-            fieldnames = list(row.keys())
-            self._frames_writer = csv.DictWriter(self._frames_f, fieldnames=fieldnames)
-            self._frames_writer.writeheader()
-        self._frames_writer.writerow(row)
-        self._frames_f.flush()
+        self._submit(0, row)
 
     def write_agent(self, row: Dict):
-        if self._agents_writer is None:
-            fieldnames = list(row.keys())
-            self._agents_writer = csv.DictWriter(self._agents_f, fieldnames=fieldnames)
-            self._agents_writer.writeheader()
-        self._agents_writer.writerow(row)
-        self._agents_f.flush()
+        self._submit(1, row)
+
+    def _submit(self, kind: int, row: Dict):
+        if self._error is not None:
+            raise RuntimeError("StatsWriter background thread failed") from self._error
+        if self._closed:
+            return
+        if self._queue is not None:
+            self._queue.put((kind, row))
+        else:
+            self._write_row(kind, row)
+            self._maybe_flush()
+
+    def _write_row(self, kind: int, row: Dict):
+        if self._columns is not None:
+            self._columns[kind].append(row)
+        elif kind == 0:
+            if self._frames_writer is None:
+                self._frames_writer = csv.DictWriter(self._frames_f, fieldnames=list(row.keys()))
+                self._frames_writer.writeheader()
+            self._frames_writer.writerow(row)
+        else:
+            if self._agents_writer is None:
+                self._agents_writer = csv.DictWriter(self._agents_f, fieldnames=list(row.keys()))
+                self._agents_writer.writeheader()
+            self._agents_writer.writerow(row)
+        self._pending += 1
+
+    def _maybe_flush(self, force: bool = False):
+        if not self._pending:
+            return
+        now = time.monotonic()
+        if force or self._pending >= self.flush_rows or now - self._last_flush >= self.flush_interval:
+            # Columnar tables write whole chunks by themselves (and the rest on close),
+            # so for them a timed flush only means the queue was drained into their buffers
+            if self._columns is None:
+                self._frames_f.flush()
+                self._agents_f.flush()
+            self._pending = 0
+            self._last_flush = now
+
+    def _drain(self):
+        """Background thread: write queued rows, flush in batches, stop on _STOP."""
+        q = self._queue
+        try:
+            while True:
+                try:
+                    item = q.get(timeout=max(self.flush_interval, 0.05))
+                except queue.Empty:
+                    self._maybe_flush(force=True)
+                    continue
+                if item is self._STOP:
+                    break
+                self._write_row(*item)
+                # Take whatever else is already waiting before deciding to flush
+                while True:
+                    try:
+                        item = q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is self._STOP:
+                        self._maybe_flush(force=True)
+                        return
+                    self._write_row(*item)
+                self._maybe_flush()
+            self._maybe_flush(force=True)
+        except BaseException as exc:  # surfaced to the simulation thread on the next write/close
+            self._error = exc
 
     def save_heatmap(self, heatmap: np.ndarray, heat_x0: float, heat_y0: float, heat_cell: float):
         np.save(self.paths.heatmap_npy, heatmap)
@@ -78,6 +206,45 @@ class StatsWriter:
             for r in range(heatmap.shape[0]):
                 w.writerow([float(x) for x in heatmap[r, :]])
 
+    def save_pressure(self, field):
+        """Peak and time-averaged crowd pressure maps (``stats.pressure.PressureField``) with grid extents."""
+        np.savez(
+            self.paths.pressure_npz,
+            pressure_peak=field.pressure_peak,
+            pressure_mean=field.mean_pressure(),
+            x0=field.x0,
+            y0=field.y0,
+            cell=field.cell,
+            sigma=field.sigma,
+        )
+
+    def save_table(self, name: str, columns: Dict[str, np.ndarray]):
+        """Write a whole table of equal-length columns as stats_<name> in the writer's format.
+
+        Used for results produced once at close (e.g. exposure totals and contact
+        edges); read back with ``stats.columnar.load_table(base_dir, name)``.
+        """
+        names = list(columns.keys())
+        n = len(columns[names[0]]) if names else 0
+        stem = os.path.join(self.base_dir, f"stats_{name}")
+        if self.fmt == "csv":
+            with open(stem + ".csv", "w", newline="", encoding="utf-8") as f:
+                w = csv.writer(f)
+                w.writerow(names)
+                cols = [np.asarray(columns[c]).tolist() for c in names]
+                for r in range(n):
+                    w.writerow([col[r] for col in cols])
+        elif self.fmt == "npy":
+            arr = np.zeros(n, dtype=[(c, np.asarray(columns[c]).dtype) for c in names])
+            for c in names:
+                arr[c] = columns[c]
+            np.save(stem + ".npy", arr)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            pq.write_table(pa.table({c: np.asarray(columns[c]) for c in names}), stem + ".parquet")
+
     def save_hotspots(self, hotspots: List[Dict]):
         if not hotspots:
             return
@@ -88,7 +255,25 @@ class StatsWriter:
                 w.writerow(row)
 
     def close(self):
+        """Drain queued rows, flush and close the files (safe to call more than once)."""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
         try:
-            self._frames_f.close()
+            if self._thread is not None:
+                self._queue.put(self._STOP)
+                self._thread.join()
+            else:
+                self._maybe_flush(force=True)
         finally:
-            self._agents_f.close()
+            if self._columns is not None:
+                for table in self._columns:
+                    table.close()
+            else:
+                try:
+                    self._frames_f.close()
+                finally:
+                    self._agents_f.close()
+        if self._error is not None:
+            raise RuntimeError("StatsWriter background thread failed") from self._error
@@ -0,0 +1,124 @@
+import argparse
+import copy
+import csv
+import random
+import time
+
+import numpy as np
+
+from Config4 import CONFIG
+from Environment import Environment
+from Simulation import Simulation
+
+
+METRICS = ("exits_per_min", "mean_trip_s", "p90_trip_s", "mean_speed", "mean_queue")
+
+
+class _CrowdProbe:
+    """Zbiera metryki porównawcze: czasy przejścia, prędkość idących, długość kolejki."""
+
+    def __init__(self):
+        self.spawn = {}
+        self.exit = {}
+        self.speed_sum = 0.0
+        self.speed_n = 0
+        self.queue_len = []
+
+    def __call__(self, dt, t, agents, env):
+        for agent in agents:
+            self.spawn.setdefault(agent.id, t)
+            if agent.exited:
+                self.exit.setdefault(agent.id, t)
+            elif agent.active and not agent.is_waiting:
+                self.speed_sum += float(np.hypot(agent.velocity[0], agent.velocity[1]))
+                self.speed_n += 1
+        self.queue_len.append(len(env.queue_manager.queue))
+
+    def summary(self, duration):
+        trips = [self.exit[k] - self.spawn[k] for k in self.exit if k in self.spawn]
+        return {
+            "exits_per_min": len(self.exit) / duration * 60.0,
+            "mean_trip_s": float(np.mean(trips)) if trips else 0.0,
+            "p90_trip_s": float(np.percentile(trips, 90)) if trips else 0.0,
+            "mean_speed": self.speed_sum / max(self.speed_n, 1),
+            "mean_queue": float(np.mean(self.queue_len)) if self.queue_len else 0.0,
+        }
+
+
+def run(lod, args, seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    cfg = copy.deepcopy(CONFIG)
+    cfg["sfm"]["kernel"] = args.kernel
+    cfg["sfm"]["lod"] = lod
+    cfg["sfm"]["lod_enter_radius"] = args.enter
+    cfg["sfm"]["lod_exit_radius"] = args.exit
+    if args.spawn_rate is not None:
+        cfg["agent_generation"]["spawn_rate"] = args.spawn_rate
+
+    env = Environment(cfg)
+    sim = Simulation(env, cfg)
+    probe = _CrowdProbe()
+
+    t0 = time.perf_counter()
+    sim.run(args.duration, on_before_remove=probe)
+    wall = time.perf_counter() - t0
+    sim.close()
+
+    out = probe.summary(args.duration)
+    out["wall_s"] = wall
+    out["lod_share"] = sim.lod_kinematic_steps / max(sim.lod_agent_steps, 1)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Validate the LOD crowd model (kinematic isolated agents) against full SFM on Config4.")
+    ap.add_argument("--duration", type=float, default=600.0, help="Simulated seconds per run")
+    ap.add_argument("--seeds", type=int, nargs="+", default=[1, 2, 3])
+    ap.add_argument("--spawn_rate", type=float, default=0.05, help="Off-peak arrivals per second")
+    ap.add_argument("--kernel", default="scalar", help="sfm.kernel used by both runs")
+    ap.add_argument("--enter", type=float, default=1.5, help="lod_enter_radius [m]")
+    ap.add_argument("--exit", type=float, default=2.5, help="lod_exit_radius [m]")
+    ap.add_argument("--tol", type=float, default=0.05, help="Accepted relative difference of the mean metrics")
+    ap.add_argument("--out", default=None, help="Optional CSV with per-run results")
+    args = ap.parse_args()
+
+    rows = []
+    for seed in args.seeds:
+        for lod in (False, True):
+            res = run(lod, args, seed)
+            res.update({"model": "lod" if lod else "full", "seed": seed})
+            rows.append(res)
+            print(f"[seed={seed}] {res['model']:4s} " + "  ".join(
+                f"{k}={v:.3f}" for k, v in res.items() if isinstance(v, float)))
+
+    full = [r for r in rows if r["model"] == "full"]
+    lod = [r for r in rows if r["model"] == "lod"]
+
+    print(f"\nLOD validation report ({len(args.seeds)} seeds, {args.duration:.0f}s, spawn_rate={args.spawn_rate})")
+    print(f"{'metric':>14} {'full':>9} {'lod':>9} {'rel_diff':>9}  verdict")
+    ok_all = True
+    for m in METRICS:
+        a = float(np.mean([r[m] for r in full]))
+        b = float(np.mean([r[m] for r in lod]))
+        rel = abs(b - a) / abs(a) if a else abs(b)
+        ok = rel <= args.tol
+        ok_all &= ok
+        print(f"{m:>14} {a:>9.3f} {b:>9.3f} {rel:>8.1%}  {'OK' if ok else 'DIFF'}")
+
+    wall_full = float(np.mean([r["wall_s"] for r in full]))
+    wall_lod = float(np.mean([r["wall_s"] for r in lod]))
+    print(f"{'wall_s':>14} {wall_full:>9.1f} {wall_lod:>9.1f}  speedup x{wall_full / max(wall_lod, 1e-9):.2f}")
+    print(f"{'lod_share':>14} {'':>9} {np.mean([r['lod_share'] for r in lod]):>9.1%}  (agent-steps in kinematic mode)")
+    print("\nResult:", "PASS" if ok_all else f"metrics differ by more than {args.tol:.0%}")
+
+    if args.out:
+        with open(args.out, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            w.writeheader()
+            w.writerows(rows)
+        print("Saved:", args.out)
+
+
+if __name__ == "__main__":
+    main()